@@ -0,0 +1,9 @@
+"""
+Performance benchmarks for GenSON. Run them with::
+
+    $ python -m benchmarks --output results.json
+
+or with pytest-benchmark::
+
+    $ pytest benchmarks/bench_genson.py
+"""
@@ -0,0 +1,231 @@
+"""
+Standalone benchmark runner.
+
+Measures throughput of ``add_object``/``add_objects`` (with and without
+the shape cache), the cost of ``add_schema`` and ``merge``,
+``to_schema`` latency, peak memory and end-to-end CLI time for each
+synthetic dataset, and writes the results as JSON so runs can be
+compared with ``--compare``.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from genson import SchemaBuilder, __version__
+
+from . import datasets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    if args.child:
+        print(json.dumps(_peak_rss_child(args.child, args.records)))
+        return
+
+    names = args.dataset or sorted(datasets.DATASETS)
+    results = {}
+    for name in names:
+        print('benchmarking %s...' % name, file=sys.stderr)
+        results[name] = run_dataset(name, args.records, args.repeat)
+
+    report = {
+        'meta': {
+            'genson': __version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'records': args.records,
+            'repeat': args.repeat,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as fp:
+            fp.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)
+        print_comparison(baseline['results'], results)
+
+
+def run_dataset(name, records, repeat):
+    schemas, objects = datasets.make(name, records)
+    result = {}
+
+    def build(add, shape_cache_size=None):
+        builder = SchemaBuilder(shape_cache_size=shape_cache_size)
+        for schema in schemas:
+            builder.add_schema(schema)
+        add(builder)
+        return builder
+
+    def add_each(builder):
+        for obj in objects:
+            builder.add_object(obj)
+
+    def add_batch(builder):
+        builder.add_objects(objects)
+
+    n = len(objects)
+    for key, add, cache in [('add_object', add_each, None),
+                            ('add_objects', add_batch, None),
+                            ('add_object_cached', add_each, 1024)]:
+        seconds = best_of(repeat, lambda: build(add, cache))
+        result[key + '_per_sec'] = n / seconds
+
+    half = n // 2
+    left = build(lambda b: b.add_objects(objects[:half]))
+    right = build(lambda b: b.add_objects(objects[half:]))
+    right_schema = right.to_schema()
+
+    result['add_schema_ms'] = 1000 * best_of(
+        repeat, lambda: _copy(left).add_schema(right_schema))
+    result['merge_ms'] = 1000 * best_of(
+        repeat, lambda: _copy(left).merge(right))
+    result['copy_ms'] = 1000 * best_of(repeat, lambda: _copy(left))
+    # adjust for the cost of copying the receiver
+    result['add_schema_ms'] -= result['copy_ms']
+    result['merge_ms'] -= result['copy_ms']
+
+    # time a fresh copy each round, since the schema is cached once
+    # it has been generated
+    full = build(add_batch)
+    result['to_schema_ms'] = 1000 * best_of(
+        repeat, lambda builder: builder.to_schema(),
+        setup=lambda: _copy(full))
+    result.update(_measure_peak_rss(name, records))
+    result['cli_s'] = cli_time(schemas, objects, repeat)
+    return result
+
+
+def best_of(repeat, func, setup=None):
+    """
+    the fastest of ``repeat`` timed calls, each passed the result of an
+    untimed call to ``setup`` if it is given
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        args = (setup(),) if setup is not None else ()
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def cli_time(schemas, objects, repeat):
+    """ wall time for ``python -m genson`` over an NDJSON file """
+    with tempfile.TemporaryDirectory() as tmp:
+        command = [sys.executable, '-m', 'genson']
+        for i, schema in enumerate(schemas):
+            path = os.path.join(tmp, 'schema%d.json' % i)
+            _write_json(path, [schema])
+            command += ['-s', path]
+        path = os.path.join(tmp, 'objects.json')
+        _write_json(path, objects)
+        command.append(path)
+        return best_of(repeat, lambda: subprocess.run(
+            command, check=True, cwd=ROOT, stdout=subprocess.DEVNULL))
+
+
+def print_comparison(baseline, results):
+    """ print each metric as a ratio to the baseline run """
+    print('%-10s %-24s %12s %12s %8s' % (
+        'dataset', 'metric', 'baseline', 'current', 'ratio'))
+    for name, metrics in sorted(results.items()):
+        for key, value in sorted(metrics.items()):
+            old = baseline.get(name, {}).get(key)
+            if old is None or value is None:
+                continue
+            ratio = value / old if old else float('nan')
+            print('%-10s %-24s %12.4g %12.4g %8.2f' % (
+                name, key, old, value, ratio))
+
+
+def _measure_peak_rss(name, records):
+    """
+    run the build in a fresh process so its peak RSS is its own, and
+    trace the memory allocated while building (excluding the dataset)
+    """
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks', '--child', name,
+         '--records', str(records)],
+        check=True, cwd=ROOT, stdout=subprocess.PIPE).stdout
+    return json.loads(output)
+
+
+def _peak_rss_child(name, records):
+    schemas, objects = datasets.make(name, records)
+    tracemalloc.start()
+    builder = SchemaBuilder()
+    for schema in schemas:
+        builder.add_schema(schema)
+    builder.add_objects(objects)
+    builder.to_schema()
+    build_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        peak_rss = None
+    else:
+        peak_rss = _max_rss(resource)
+    return {'peak_rss_kb': peak_rss, 'build_peak_kb': build_peak // 1024}
+
+
+def _max_rss(resource):
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def _copy(builder):
+    copy = SchemaBuilder(builder.schema_uri)
+    copy.merge(builder)
+    return copy
+
+
+def _write_json(path, objects):
+    with open(path, 'w') as fp:
+        for obj in objects:
+            fp.write(json.dumps(obj) + '\n')
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark schema inference on synthetic datasets.')
+    parser.add_argument(
+        '-d', '--dataset', action='append',
+        choices=sorted(datasets.DATASETS),
+        help='dataset to run (repeatable; default: all)')
+    parser.add_argument(
+        '-n', '--records', type=int, default=2000,
+        help='number of records per dataset (default: %(default)s)')
+    parser.add_argument(
+        '-r', '--repeat', type=int, default=3,
+        help='timed repetitions; the fastest counts (default: %(default)s)')
+    parser.add_argument(
+        '-o', '--output', metavar='FILE',
+        help='write the JSON results here instead of stdout')
+    parser.add_argument(
+        '-c', '--compare', metavar='FILE',
+        help='print a comparison against a previous results file')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+pytest-benchmark versions of the throughput benchmarks. These are not
+collected by the test suite; run them explicitly::
+
+    $ pytest benchmarks/bench_genson.py --benchmark-autosave
+"""
+import pytest
+
+from genson import SchemaBuilder
+
+from . import datasets
+
+pytest.importorskip('pytest_benchmark')
+
+RECORDS = 1000
+
+
+@pytest.fixture(params=sorted(datasets.DATASETS))
+def dataset(request):
+    return datasets.make(request.param, RECORDS)
+
+
+def _builder(schemas, **kwargs):
+    builder = SchemaBuilder(**kwargs)
+    for schema in schemas:
+        builder.add_schema(schema)
+    return builder
+
+
+def test_add_object(benchmark, dataset):
+    schemas, objects = dataset
+
+    def run():
+        builder = _builder(schemas)
+        for obj in objects:
+            builder.add_object(obj)
+    benchmark(run)
+
+
+def test_add_objects(benchmark, dataset):
+    schemas, objects = dataset
+    benchmark(lambda: _builder(schemas).add_objects(objects))
+
+
+def test_add_object_shape_cache(benchmark, dataset):
+    schemas, objects = dataset
+
+    def run():
+        builder = _builder(schemas, shape_cache_size=1024)
+        for obj in objects:
+            builder.add_object(obj)
+    benchmark(run)
+
+
+def test_merge(benchmark, dataset):
+    schemas, objects = dataset
+    half = len(objects) // 2
+    left = _builder(schemas)
+    left.add_objects(objects[:half])
+    right = _builder(schemas)
+    right.add_objects(objects[half:])
+    benchmark(lambda: _builder([]).merge(left).merge(right))
+
+
+def test_to_schema(benchmark, dataset):
+    schemas, objects = dataset
+    builder = _builder(schemas)
+    builder.add_objects(objects)
+
+    # the schema is cached once it has been generated, so each round
+    # gets a fresh copy
+    def setup():
+        return (_builder([]).merge(builder),), {}
+    benchmark.pedantic(lambda copy: copy.to_schema(), setup=setup,
+                       rounds=20)
@@ -0,0 +1,92 @@
+"""
+Deterministic synthetic datasets. Each one is a ``(schemas, objects)``
+pair: seed schemas to add first, and the objects to infer from.
+"""
+import random
+import string
+import uuid
+
+SEED = 1234
+
+
+def wide(n, rng):
+    """ flat objects with 200 properties of stable, mixed types """
+    makers = [int, _word, float, bool, lambda rng: None]
+    key_makers = [(('key_%03d' % i), makers[i % len(makers)])
+                  for i in range(200)]
+    objects = [{key: _make(maker, rng) for key, maker in key_makers}
+               for _ in range(n)]
+    return [], objects
+
+
+def deep(n, rng):
+    """ objects nested 50 levels deep """
+    def nest(depth):
+        if depth == 0:
+            return rng.randrange(100)
+        return {'level': depth, 'tags': [_word(rng)],
+                'child': nest(depth - 1)}
+    return [], [nest(50) for _ in range(n)]
+
+
+def arrays(n, rng):
+    """ objects holding large homogeneous arrays """
+    objects = [{'ints': [rng.randrange(1000) for _ in range(1000)],
+                'words': [_word(rng) for _ in range(200)]}
+               for _ in range(max(1, n // 10))]
+    return [], objects
+
+
+def tuples(n, rng):
+    """ positional arrays, seeded as a tuple """
+    objects = [[rng.randrange(100), _word(rng), rng.random(), None,
+                [rng.randrange(10)]] for _ in range(n)]
+    return [{'type': 'array', 'items': []}], objects
+
+
+def patterns(n, rng):
+    """ map-like objects keyed by ids matched by patternProperties """
+    pattern_properties = {'^prefix%02d-' % i: None for i in range(50)}
+    pattern_properties['^[0-9a-f]{8}-[0-9a-f]{4}-'] = None
+    objects = [{str(uuid.UUID(int=rng.getrandbits(128))): rng.randrange(9)
+                for _ in range(20)} for _ in range(n)]
+    schema = {'type': 'object', 'patternProperties': pattern_properties}
+    return [schema], objects
+
+
+def mixed(n, rng):
+    """ objects whose values change type from record to record """
+    choices = [lambda: rng.randrange(100), lambda: _word(rng),
+               lambda: rng.random(), lambda: None, lambda: True,
+               lambda: [_word(rng)], lambda: {'x': rng.randrange(5)}]
+    objects = [{'field_%d' % i: rng.choice(choices)() for i in range(20)}
+               for _ in range(n)]
+    return [], objects
+
+
+DATASETS = {
+    'wide': wide,
+    'deep': deep,
+    'arrays': arrays,
+    'tuples': tuples,
+    'patterns': patterns,
+    'mixed': mixed,
+}
+
+
+def make(name, n):
+    return DATASETS[name](n, random.Random(SEED))
+
+
+def _word(rng):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(8))
+
+
+def _make(maker, rng):
+    if maker is int:
+        return rng.randrange(1000)
+    if maker is float:
+        return rng.random()
+    if maker is bool:
+        return rng.random() < 0.5
+    return maker(rng)
@@ -1,12 +1,24 @@
 from .schema.builder import SchemaBuilder, Schema
+from .schema.checkpoint import CheckpointError
 from .schema.node import SchemaNode, SchemaGenerationError
 from .schema.strategies.base import SchemaStrategy, TypedSchemaStrategy
 
 __version__ = '1.3.0'
 __all__ = [
     'SchemaBuilder',
+    'AsyncSchemaBuilder',
     'SchemaNode',
     'SchemaGenerationError',
+    'CheckpointError',
     'Schema',
     'SchemaStrategy',
     'TypedSchemaStrategy']
+
+
+def __getattr__(name):
+    # asyncio is slow to import, so it is only loaded when asked for
+    if name == 'AsyncSchemaBuilder':
+        from .schema.aio import AsyncSchemaBuilder
+        return AsyncSchemaBuilder
+    raise AttributeError(
+        'module {0!r} has no attribute {1!r}'.format(__name__, name))
@@ -1,43 +1,131 @@
 import argparse
+import codecs
+import mmap
+import os
+import pickle
+import stat
 import sys
-import re
 import json
-from . import SchemaBuilder, __version__
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from . import CheckpointError, SchemaBuilder, __version__
+from .parsers import PARSER_NAMES, get_parser
+from .scanner import BoundaryScanner
+from .schema.parallel import dump_seed
+from .schema.stats import format_stats
 
 
 class CLI:
-    def __init__(self, prog=None):
-        self._make_parser(prog)
-        self._prepare_args()
-        self.builder = SchemaBuilder(schema_uri=self.args.schema_uri)
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, prog=None, argv=None):
+        self._make_parser(prog, argv)
+        self._prepare_args(argv)
+        self.builder = SchemaBuilder(schema_uri=self.args.schema_uri,
+                                     profile=self.args.stats)
+        # the pickled builder that each input file's partial starts from
+        self.seed = None
+        # number of input objects already in a resumed builder
+        self.position = None
 
     def run(self):
+        if self.args.serve is not None:
+            from .server import make_server, serve
+            try:
+                server = make_server(self.args.serve)
+            except (OSError, ValueError) as err:
+                self.fail('can not serve on {}: {}'.format(
+                    self.args.serve, err))
+            serve(server)
+            return
         if not self.args.schema and not self.args.object:
             self.fail('noting to do - no schemas or objects given')
-        self.add_schemas()
+        self.resume()
+        if self.position is None:
+            self.add_schemas()
         self.add_objects()
         self.print_output()
+        if self.args.stats:
+            self.print_stats()
+        if self.args.checkpoint is not None and \
+                os.path.exists(self.args.checkpoint):
+            os.remove(self.args.checkpoint)
+
+    def resume(self):
+        """
+        pick up the builder and input position from an existing
+        checkpoint file
+        """
+        if self.args.checkpoint is None or \
+                not os.path.exists(self.args.checkpoint):
+            return
+        try:
+            self.builder, self.position = SchemaBuilder.load_checkpoint(
+                self.args.checkpoint)
+        except (CheckpointError, OSError) as err:
+            self.fail(str(err))
+        if self.args.stats and self.builder.stats() is None:
+            self.fail('{} was saved without --stats, so it can not be resumed '
+                      'with it'.format(self.args.checkpoint))
 
     def add_schemas(self):
+        if self.args.jobs is not None and len(self.args.schema) > 1:
+            # decode in parallel, but add in order so that the first
+            # $schema wins and conflicts are warned about as usual
+            for schemas in self._map_files(_read_schemas, self.args.schema):
+                for schema in schemas:
+                    self.builder.add_schema(schema)
+            return
+
         for fp in self.args.schema:
             self._call_with_json_from_fp(self.builder.add_schema, fp)
-            fp.close()
 
     def add_objects(self):
+        if self.args.jobs is not None and len(self.args.object) > 1:
+            # one partial builder per file, merged in order
+            self.seed = dump_seed(self.builder)
+            for partial in self._map_files(_build_partial, self.args.object):
+                self.builder.merge(partial)
+            return
+
+        if self.args.jobs is not None:
+            self.builder.add_objects_parallel(
+                self._iter_json_objects(self.args.object),
+                jobs=self.args.jobs)
+            return
+
+        if self.args.checkpoint is not None:
+            # objects that were added before the checkpoint are skipped
+            # without being decoded
+            position = self.position or 0
+            self.builder.add_objects(
+                self._iter_json_objects(self.args.object, skip=position),
+                checkpoint=self.args.checkpoint,
+                checkpoint_every=self.args.checkpoint_every,
+                position=position)
+            return
+
         for fp in self.args.object:
             self._call_with_json_from_fp(self.builder.add_object, fp)
-            fp.close()
 
     def print_output(self):
-        print(self.builder.to_json(indent=self.args.indent))
+        self.builder.dump(sys.stdout, dedupe=self.args.dedupe,
+                          indent=self.args.indent)
+        sys.stdout.write('\n')
+
+    def print_stats(self):
+        sys.stderr.write(format_stats(self.builder.stats()))
 
     def fail(self, message):
         self.parser.error(message)
 
-    def _make_parser(self, prog=None):
-        file_type = argparse.FileType('r', encoding=self._get_encoding())
+    def _make_parser(self, prog=None, argv=None,
+                     parser_class=argparse.ArgumentParser, file_type=None):
+        if file_type is None:
+            file_type = argparse.FileType(
+                'r', encoding=self._get_encoding(argv))
 
-        self.parser = argparse.ArgumentParser(
+        self.parser = parser_class(
             add_help=False,
             prog=prog,
             description="""Generate one, unified JSON Schema from one or more
@@ -51,6 +139,15 @@ class CLI:
             '--version', action='version', default=argparse.SUPPRESS,
             version='%(prog)s {}'.format(__version__),
             help='Show version number and exit.')
+        self.parser.add_argument(
+            '-c', '--checkpoint', metavar='FILE',
+            help="""Save progress to FILE every so often, and resume from it
+            if it exists. It is removed once the schema has been printed. Run
+            with the same arguments and input to resume.""")
+        self.parser.add_argument(
+            '--checkpoint-every', type=int, metavar='N', default=10000,
+            help="""Save a checkpoint every N objects (defaults to
+            10000).""")
         self.parser.add_argument(
             '-d', '--delimiter', metavar='DELIM',
             help="""Set a delimiter. Use this option if the input files
@@ -58,6 +155,11 @@ class CLI:
             few cases ('newline', 'tab', 'space') will get converted to a
             whitespace character. If this option is omitted, the parser will
             try to auto-detect boundaries.""")
+        self.parser.add_argument(
+            '--dedupe', action='store_true',
+            help="""Write each repeated subschema once, under "$defs" (or
+            "definitions" for drafts before 2019-09), and refer to it with
+            "$ref".""")
         self.parser.add_argument(
             '-e', '--encoding', type=str, metavar='ENCODING',
             help="""Use ENCODING instead of the default system encoding
@@ -66,6 +168,20 @@ class CLI:
         self.parser.add_argument(
             '-i', '--indent', type=int, metavar='SPACES',
             help="""Pretty-print the output, indenting SPACES spaces.""")
+        self.parser.add_argument(
+            '-j', '--jobs', type=int, metavar='N',
+            help="""Use N worker processes. Input files are handled one per
+            worker and their results are combined in order; a single input is
+            split into chunks of objects.""")
+        self.parser.add_argument(
+            '-p', '--parser', default='auto', metavar='PARSER',
+            choices=('auto',) + PARSER_NAMES,
+            help="""JSON parser to decode every input document with, objects
+            and schemas alike: {} or 'auto' (the default) for the fastest one
+            installed. Documents that a fast parser rejects or could get wrong
+            (like integers too big for 64 bits) are decoded again with 'json',
+            so results and errors match it.""".format(
+                ', '.join(map(repr, PARSER_NAMES))))
         self.parser.add_argument(
             '-s', '--schema', action='append', default=[], type=file_type,
             help="""File containing a JSON Schema (can be specified multiple
@@ -78,26 +194,51 @@ class CLI:
             passed, the "$schema" keyword will not be included in the
             result.""".format(default=SchemaBuilder.DEFAULT_URI,
                               null=SchemaBuilder.NULL_URI))
+        self.parser.add_argument(
+            '--serve', metavar='ADDRESS',
+            help="""Keep running and serve requests on ADDRESS, a Unix
+            domain socket path or a loopback HOST:PORT, instead of processing
+            input. Use genson-client ADDRESS in place of genson to run on the
+            server. Over TCP, clients send the token written to
+            $GENSON_TOKEN_FILE or ~/.genson-token-PORT.""")
+        self.parser.add_argument(
+            '--stats', action='store_true',
+            help="""Print the number of values added to each part of the
+            schema, their types, and the time spent on them to stderr.""")
         self.parser.add_argument(
             'object', nargs=argparse.REMAINDER, type=file_type,
             help="""Files containing JSON objects (defaults to stdin if no
             arguments are passed).""")
 
-    def _get_encoding(self):
+    def _get_encoding(self, argv=None):
         """
         use separate arg parser to grab encoding argument before
         defining FileType args
         """
         parser = argparse.ArgumentParser(add_help=False)
         parser.add_argument('-e', '--encoding', type=str)
-        args, _ = parser.parse_known_args()
+        args, _ = parser.parse_known_args(argv)
         return args.encoding
 
-    def _prepare_args(self):
-        self.args = self.parser.parse_args()
+    def _prepare_args(self, argv=None):
+        self.args = self.parser.parse_args(argv)
         self._prepare_delimiter()
 
-        # default to stdin if no objects or schemas
+        if self.args.jobs is not None and self.args.jobs < 1:
+            self.fail('--jobs must be at least 1')
+        if self.args.checkpoint_every < 1:
+            self.fail('--checkpoint-every must be at least 1')
+        if self.args.checkpoint is not None and self.args.jobs is not None:
+            self.fail('--checkpoint can not be used with --jobs')
+
+        try:
+            self._json_parser = get_parser(self.args.parser)
+        except ImportError:
+            self.fail('JSON parser {!r} is not installed'.format(
+                self.args.parser))
+
+        # default to stdin if no objects or schemas (see also
+        # ``reads_stdin``)
         if not self.args.object and not sys.stdin.isatty():
             self.args.object.append(sys.stdin)
 
@@ -112,39 +253,263 @@ class CLI:
         elif self.args.delimiter == 'space':
             self.args.delimiter = ' '
 
+    def _map_files(self, function, fps):
+        """
+        Yield ``function(reader, fp)`` for each file, in order, running
+        it in a pool of worker processes that reopen the files by name.
+        Files that can't be reopened, like stdin, are read here in
+        their turn. Only a bounded number of files is in flight.
+        """
+        jobs = self.args.jobs
+        worker_args = argparse.Namespace(
+            delimiter=self.args.delimiter, parser=self.args.parser)
+        with ProcessPoolExecutor(
+                jobs, initializer=_init_worker,
+                initargs=(worker_args, self.seed)) as pool:
+            pending = deque()
+            for fp in fps:
+                if self._is_regular_file(fp):
+                    pending.append(pool.submit(
+                        _call_in_worker, function, fp.name, fp.encoding))
+                    fp.close()
+                else:
+                    pending.append(fp)
+                while pending and (len(pending) >= 2 * jobs
+                                   or not isinstance(pending[0], Future)):
+                    yield self._file_result(function, pending.popleft())
+            while pending:
+                yield self._file_result(function, pending.popleft())
+
+    def _file_result(self, function, task):
+        if not isinstance(task, Future):
+            return function(self, task)
+        try:
+            return task.result()
+        except InputError as err:
+            self.fail(str(err))
+
     def _call_with_json_from_fp(self, method, fp):
-        for json_string in self._get_json_strings(fp.read().strip()):
-            try:
-                json_obj = json.loads(json_string)
-            except json.JSONDecodeError as err:
-                self.fail('invalid JSON in {}: {}'.format(fp.name, err))
+        for json_obj in self._iter_json_objects([fp]):
             method(json_obj)
 
-    def _get_json_strings(self, raw_text):
-        if self.args.delimiter is None or self.args.delimiter == '':
-            json_strings = self._detect_json_strings(raw_text)
-        else:
-            json_strings = raw_text.split(self.args.delimiter)
+    def _iter_json_objects(self, fps, skip=0):
+        for fp in fps:
+            mapped = self._map_file(fp)
+            if self.args.delimiter is None or self.args.delimiter == '':
+                json_strings = self._detect_json_strings(fp, mapped)
+            elif mapped is not None:
+                json_strings = self._split_json_bytes(mapped)
+            else:
+                json_strings = self._split_json_strings(fp)
+            for offset, json_string in json_strings:
+                if skip:
+                    skip -= 1
+                    continue
+                yield self._load_json(json_string, fp, offset)
+            if mapped is not None:
+                mapped.close()
+            fp.close()
+
+    def _load_json(self, json_string, fp, offset):
+        try:
+            return self._json_parser.loads(json_string)
+        except json.JSONDecodeError as err:
+            # report where the error is in the whole input
+            if isinstance(json_string, str):
+                position = 'character {}'.format(offset + err.pos)
+            else:
+                position = 'byte {}'.format(
+                    offset + len(err.doc[:err.pos].encode('utf-8')))
+            self.fail('invalid JSON in {} at {}: {}'.format(
+                fp.name, position, err))
+
+    def _read_chunk(self, fp, buffered=0):
+        """
+        Read the next chunk of input. The chunk grows with the amount of
+        text already buffered so that a document spanning many chunks is
+        only re-scanned a logarithmic number of times.
+        """
+        return fp.read(max(self.CHUNK_SIZE, buffered))
+
+    def _binary_source(self, fp):
+        """
+        Read UTF-8 input as bytes, which every parser accepts, to save
+        decoding it. Other encodings are read as text.
+        """
+        try:
+            if codecs.lookup(fp.encoding).name == 'utf-8':
+                return fp.buffer
+        except (AttributeError, LookupError):
+            pass
+        return fp
+
+    def _split_json_strings(self, fp):
+        """
+        Lazily split the input on the delimiter, holding no more than
+        one document (plus one chunk) in memory at a time.
+        """
+        source = self._binary_source(fp)
+        delimiter = self.args.delimiter
+        buffer = ''
+        if source is not fp:
+            delimiter = delimiter.encode('utf-8')
+            buffer = b''
+
+        offset = 0
+        while True:
+            chunk = self._read_chunk(source, len(buffer))
+            if not chunk:
+                break
+            *json_strings, buffer = (buffer + chunk).split(delimiter)
+            for json_string in json_strings:
+                yield from self._strip(offset, json_string)
+                offset += len(json_string) + len(delimiter)
+
+        yield from self._strip(offset, buffer)
+
+    def _strip(self, offset, json_string):
+        stripped = json_string.lstrip()
+        if stripped:
+            yield offset + len(json_string) - len(stripped), stripped.rstrip()
+
+    def _map_file(self, fp):
+        """
+        Memory-map a regular UTF-8 file so that documents can be sliced
+        out of its raw bytes and handed straight to the parser without
+        decoding the whole file. Return ``None`` for stdin, other kinds
+        of file and other encodings.
+        """
+        if not self._is_regular_file(fp):
+            return None
+        try:
+            if codecs.lookup(fp.encoding).name != 'utf-8':
+                return None
+            return mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, LookupError, OSError, ValueError):
+            # an empty file
+            return None
+
+    def _is_regular_file(self, fp):
+        if fp is sys.stdin:
+            return False
+        try:
+            return stat.S_ISREG(os.fstat(fp.fileno()).st_mode)
+        except (AttributeError, OSError, ValueError):
+            # no real file descriptor
+            return False
 
-        # sanitize data before returning
-        return [string.strip() for string in json_strings if string.strip()]
+    def _split_json_bytes(self, mapped):
+        """
+        split a memory-mapped file on the delimiter, copying out one
+        document at a time
+        """
+        delimiter = self.args.delimiter.encode('utf-8')
+        pos = 0
+        while pos <= len(mapped):
+            end = mapped.find(delimiter, pos)
+            if end == -1:
+                end = len(mapped)
+            yield from self._strip(pos, mapped[pos:end])
+            pos = end + len(delimiter)
 
-    @staticmethod
-    def _detect_json_strings(raw_text):
+    def _detect_json_strings(self, fp, mapped=None):
         """
-        Use regex with lookaround to spot the boundaries between JSON
-        objects. Unfortunately, it has to match *something*, so at least
-        one character must be removed and replaced.
+        Lazily find the boundaries between consecutive JSON documents,
+        which can be separated by any amount of whitespace (or none at
+        all). A memory-mapped file is scanned in place.
         """
-        strings = re.split(r'}\s*(?={)', raw_text)
+        scanner = BoundaryScanner()
+        if mapped is not None:
+            yield from scanner.feed(mapped)
+        else:
+            source = self._binary_source(fp)
+            while True:
+                chunk = self._read_chunk(source, len(scanner))
+                if not chunk:
+                    break
+                yield from scanner.feed(chunk)
+        yield from scanner.close()
+
+
+class InputError(Exception):
+    pass
+
+
+class _ParserExit(Exception):
+    pass
+
+
+class _QuietParser(argparse.ArgumentParser):
+    """
+    an argument parser that raises ``_ParserExit`` instead of printing
+    and exiting
+    """
+
+    def _print_message(self, message, file=None):
+        pass
+
+    def exit(self, status=0, message=None):
+        raise _ParserExit(status)
+
+
+def parse_argv(argv):
+    """
+    Parse CLI arguments without opening files, printing or exiting, to
+    see what a run would do before starting it. File arguments are left
+    as names. Return ``None`` if the run would only print a usage error,
+    help or the version.
+    """
+    cli = CLI.__new__(CLI)
+    cli._make_parser(argv=argv, parser_class=_QuietParser, file_type=str)
+    try:
+        return cli.parser.parse_args(argv)
+    except _ParserExit:
+        return None
+
+
+def reads_stdin(args, stdin_isatty):
+    """
+    whether a run with the arguments from ``parse_argv`` reads stdin
+    """
+    return '-' in args.schema + args.object or \
+        (not args.object and not stdin_isatty)
+
+
+class _WorkerReader(CLI):
+    """
+    the input-reading half of the CLI, run in a worker process
+    """
+
+    def __init__(self, args, seed):
+        self.args = args
+        self.seed = seed
+        self._json_parser = get_parser(args.parser)
+
+    def fail(self, message):
+        raise InputError(message)
+
+
+# the reader each worker process uses
+_reader = None
+
+
+def _init_worker(args, seed):
+    global _reader
+    _reader = _WorkerReader(args, seed)
+
+
+def _call_in_worker(function, name, encoding):
+    return function(_reader, open(name, encoding=encoding))
+
 
-        # put back the stripped character
-        json_strings = [string + '}' for string in strings[:-1]]
+def _read_schemas(reader, fp):
+    return list(reader._iter_json_objects([fp]))
 
-        # the last one doesn't need to be modified
-        json_strings.append(strings[-1])
 
-        return json_strings
+def _build_partial(reader, fp):
+    builder = pickle.loads(reader.seed)
+    builder.add_objects(reader._iter_json_objects([fp]))
+    return builder
 
 
 def main():
@@ -0,0 +1,154 @@
+"""
+A client for ``genson --serve``. It only uses the standard library's
+lightest modules, so that running it costs little more than starting
+Python. Run it as ``genson-client ADDRESS [genson options and files]``
+for the same output and exit status as ``genson``.
+
+Over TCP, the client sends the token that the server wrote to its token
+file: ``$GENSON_TOKEN_FILE`` if that is set, or ``~/.genson-token-PORT``.
+"""
+import json
+import os
+import socket
+import sys
+
+
+class ServerError(Exception):
+    pass
+
+
+def default_token_file(port):
+    """
+    the file that the token for a TCP server on ``port`` is kept in
+    """
+    path = os.environ.get('GENSON_TOKEN_FILE')
+    if path:
+        return path
+    return os.path.join(os.path.expanduser('~'), '.genson-token-%d' % port)
+
+
+class Client:
+    """
+    A connection to a ``genson --serve`` process at ``address``: a Unix
+    domain socket path or ``HOST:PORT``. For TCP, the token is read from
+    ``token_file`` (by default, ``default_token_file(PORT)``).
+    """
+
+    def __init__(self, address, token_file=None):
+        self.address = address
+        self.token_file = token_file
+        self._socket = None
+        self._rfile = None
+
+    def add(self, builder, objects=(), schemas=()):
+        """
+        Add schemas and then objects to the named builder, creating it
+        if it doesn't exist yet.
+        """
+        self.request({'op': 'add', 'builder': builder,
+                      'objects': list(objects), 'schemas': list(schemas)})
+
+    def to_schema(self, builder, dedupe=False):
+        """ Return the named builder's current schema. """
+        return self.request({'op': 'snapshot', 'builder': builder,
+                             'dedupe': dedupe})['schema']
+
+    def drop(self, builder):
+        """ Forget the named builder. """
+        self.request({'op': 'drop', 'builder': builder})
+
+    def run(self, argv, stdin=None, cwd=None):
+        """
+        Run the ``genson`` CLI tool on the server and return ``(status,
+        stdout, stderr)``.
+
+        :param argv: the tool's arguments, without the program name
+        :param stdin: a binary file to send as stdin, if the tool reads
+          it, or ``None`` to act as if stdin were a terminal
+        :param cwd: the directory that file names are relative to
+          (defaults to the current one)
+        """
+        response = self.request(
+            {'op': 'run', 'argv': list(argv), 'cwd': cwd or os.getcwd(),
+             'stdin_isatty': stdin is None or stdin.isatty()},
+            stdin=stdin)
+        return response['status'], response['stdout'], response['stderr']
+
+    def request(self, message, stdin=None):
+        """
+        Send a request and return the response, answering the server if
+        it asks for stdin along the way.
+        """
+        self._send(message)
+        while True:
+            response = self._receive()
+            if response.get('stdin'):
+                data = stdin.read() if stdin is not None else b''
+                self._send({'data': data.decode('utf-8', 'surrogateescape')})
+                continue
+            if not response.get('ok'):
+                raise ServerError(response.get('error'))
+            return response
+
+    def close(self):
+        if self._socket is not None:
+            self._rfile.close()
+            self._socket.close()
+            self._socket = self._rfile = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _connect(self):
+        host, _, port = self.address.rpartition(':')
+        if host and port.isdigit() and os.sep not in self.address:
+            if host.startswith('[') and host.endswith(']'):
+                host = host[1:-1]
+            with open(self.token_file or default_token_file(int(port))) \
+                    as fp:
+                token = fp.read().strip()
+            self._socket = socket.create_connection((host, int(port)))
+            self._socket.sendall(
+                json.dumps({'token': token}).encode('utf-8') + b'\n')
+        else:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(self.address)
+        self._rfile = self._socket.makefile('rb')
+
+    def _send(self, message):
+        if self._socket is None:
+            self._connect()
+        self._socket.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+    def _receive(self):
+        line = self._rfile.readline()
+        if not line:
+            raise ServerError('connection closed by server')
+        return json.loads(line)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        sys.stderr.write(
+            'usage: genson-client ADDRESS [genson arguments ...]\n\n'
+            'Run genson on a server started with "genson --serve ADDRESS".\n')
+        sys.exit(0 if argv else 2)
+
+    stdin = getattr(sys.stdin, 'buffer', None)
+    try:
+        with Client(argv[0]) as client:
+            status, stdout, stderr = client.run(argv[1:], stdin)
+    except (OSError, ServerError) as err:
+        sys.stderr.write('genson-client: {}\n'.format(err))
+        sys.exit(1)
+    sys.stdout.write(stdout)
+    sys.stderr.write(stderr)
+    sys.exit(status)
+
+
+if __name__ == '__main__':
+    main()
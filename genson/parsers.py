@@ -0,0 +1,94 @@
+"""
+JSON parser backends. GenSON can use orjson, pysimdjson or ujson to
+decode input when one of them is installed, and falls back to the
+standard library's ``json`` otherwise.
+
+Fast parsers don't all accept the same documents as ``json`` (e.g.
+``NaN``), and their error messages differ, so any document a fast parser
+rejects is decoded again by ``json``. Some of them also turn integers
+too big for 64 bits into floats, so documents that might contain one
+go straight to ``json``. That way the results and errors are always the
+ones ``json`` would give.
+"""
+import json
+from functools import lru_cache
+from importlib import import_module
+
+# tried in this order by ``get_parser('auto')``
+PARSER_NAMES = ('orjson', 'simdjson', 'ujson', 'json')
+
+# an integer needs 19 digits to overflow 64 bits (2 ** 63 has 19), so
+# look for 19 zeros after turning every digit into a zero
+_DIGITS_TO_ZEROS = str.maketrans('123456789', '0' * 9)
+_DIGITS_TO_ZEROS_BYTES = bytes.maketrans(b'123456789', b'0' * 9)
+
+
+class JSONParser:
+    """
+    decodes a single JSON document from ``str`` or ``bytes`` using one
+    backend
+    """
+    __slots__ = ('name', '_loads')
+
+    def __init__(self, name, loads):
+        self.name = name
+        self._loads = loads
+
+    def loads(self, data):
+        """
+        Decode a JSON document.
+
+        :raises json.JSONDecodeError: if the document is invalid
+        """
+        if self._loads is not json.loads and not _might_overflow(data):
+            try:
+                return self._loads(data)
+            except ValueError:
+                pass
+        return json.loads(data)
+
+    def __repr__(self):
+        return '<{} {!r}>'.format(type(self).__name__, self.name)
+
+
+def _might_overflow(data):
+    """
+    check for a run of 19 or more digits that isn't a fraction (digits
+    in strings count too, which is harmless)
+    """
+    if isinstance(data, str):
+        digits = data.translate(_DIGITS_TO_ZEROS)
+        zeros, after_dot = '0' * 19, '.0'
+    else:
+        digits = bytes(data).translate(_DIGITS_TO_ZEROS_BYTES)
+        zeros, after_dot = b'0' * 19, b'.0'
+
+    # each match starts a run, unless it continues the previous match
+    pos = digits.find(zeros)
+    while pos != -1:
+        if digits[pos - 1:pos] not in after_dot or pos == 0:
+            return True
+        pos = digits.find(zeros, pos + 19)
+    return False
+
+
+@lru_cache(maxsize=None)
+def get_parser(name='auto'):
+    """
+    Return the parser for a backend name, or the fastest installed one
+    for ``'auto'``.
+
+    :raises ValueError: if the name isn't one of ``PARSER_NAMES``
+    :raises ImportError: if the backend isn't installed
+    """
+    if name == 'auto':
+        for name in PARSER_NAMES:
+            try:
+                return get_parser(name)
+            except ImportError:
+                continue
+
+    if name not in PARSER_NAMES:
+        raise ValueError('unknown JSON parser {!r} (choose from {})'.format(
+            name, ', '.join(map(repr, ('auto',) + PARSER_NAMES))))
+    return JSONParser(name, import_module(name).loads)
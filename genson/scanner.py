@@ -0,0 +1,128 @@
+"""
+Incremental detection of JSON document boundaries in a stream of text
+or bytes.
+"""
+import re
+
+_PATTERNS = {
+    # whitespace between documents
+    'space': r'[ \t\n\r]*',
+    # a complete string
+    'string': r'"[^"\\]*(?:\\.[^"\\]*)*"',
+    # a number or literal, which ends at whitespace or punctuation
+    'scalar': r'[^ \t\n\r{}\[\]"]+',
+    # everything up to the next bracket, skipping over strings
+    'skip': r'[^"{}\[\]]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"{}\[\]]*)*',
+}
+_REGEXES = {
+    str: {name: re.compile(pattern, re.DOTALL)
+          for name, pattern in _PATTERNS.items()},
+    bytes: {name: re.compile(pattern.encode('ascii'), re.DOTALL)
+            for name, pattern in _PATTERNS.items()},
+}
+
+
+class BoundaryScanner:
+    """
+    Split a stream of concatenated JSON documents into one string (or
+    bytes) per document, without parsing them. Documents can be objects,
+    arrays, strings, numbers or literals, separated by any amount of
+    whitespace, or by none where that's unambiguous.
+
+    Feed it chunks with ``feed`` and then call ``close``. Both yield
+    ``(offset, document)`` pairs, where ``offset`` is the position of
+    the document in the whole stream. Each chunk is only scanned once,
+    except for a string that is cut off at the end of a chunk.
+
+    The scanner only tracks brackets and strings, so malformed input
+    comes out as a malformed document for the parser to report on.
+    """
+
+    def __init__(self):
+        self._buffer = None
+        self._offset = 0     # position of the buffer in the stream
+        self._start = 0      # start of the current document
+        self._pos = 0        # how far the current document was scanned
+        self._depth = 0      # open brackets in the current document
+
+    def __len__(self):
+        """ amount of text held back for the current document """
+        return 0 if self._buffer is None else len(self._buffer) - self._start
+
+    def feed(self, chunk):
+        """
+        Add a chunk of text (or bytes) and yield the documents it
+        completes. The result has to be used up before the next call.
+        """
+        if self._buffer is not None:
+            # drop the documents that are done
+            self._offset += self._start
+            self._pos -= self._start
+            remainder = self._buffer[self._start:]
+            if remainder:
+                chunk = remainder + chunk
+        self._buffer = chunk
+        self._start = 0
+        return self._scan(eof=False)
+
+    def close(self):
+        """
+        yield whatever is left at the end of the stream
+        """
+        if self._buffer is None:
+            return iter(())
+        return self._scan(eof=True)
+
+    def _scan(self, eof):
+        buffer = self._buffer
+        if isinstance(buffer, str):
+            regexes, quote, opening = _REGEXES[str], '"', '{['
+        else:
+            regexes, quote, opening = _REGEXES[bytes], b'"', b'{['
+        space, string, scalar, skip = (
+            regexes['space'].match, regexes['string'].match,
+            regexes['scalar'].match, regexes['skip'].match)
+        end = len(buffer)
+        start, pos, depth = self._start, self._pos, self._depth
+
+        while True:
+            if depth == 0:
+                # between documents
+                start = pos = space(buffer, pos).end()
+                if pos == end:
+                    break
+                char = buffer[pos:pos + 1]
+                if char in opening:
+                    depth = 1
+                    pos += 1
+                else:
+                    is_string = char == quote
+                    match = (string if is_string else scalar)(buffer, pos)
+                    if not eof and (match is None if is_string
+                                    else match and match.end() == end):
+                        # it might continue in the next chunk
+                        pos = start
+                        break
+                    if match:
+                        pos = match.end()
+                    else:
+                        # a cut-off string, or a lone closing bracket
+                        pos = end if is_string else pos + 1
+                    yield self._offset + start, buffer[start:pos]
+                    continue
+
+            # inside an object or array
+            pos = skip(buffer, pos).end()
+            if pos == end or buffer[pos:pos + 1] == quote:
+                # need more text to finish the document (or the string)
+                if eof:
+                    yield self._offset + start, buffer[start:]
+                    start = pos = end
+                    depth = 0
+                break
+            depth += 1 if buffer[pos:pos + 1] in opening else -1
+            pos += 1
+            if depth == 0:
+                yield self._offset + start, buffer[start:pos]
+
+        self._start, self._pos, self._depth = start, pos, depth
@@ -0,0 +1,141 @@
+"""
+An ``asyncio`` front end for ``SchemaBuilder``.
+"""
+import asyncio
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from .builder import SchemaBuilder
+from .parallel import dump_seed
+
+
+class AsyncSchemaBuilder:
+    """
+    Wrap a ``SchemaBuilder`` so that objects can be added from
+    coroutines without blocking the event loop for long. Objects are
+    added in slices, and the loop gets a turn between slices. If an
+    executor is given, each slice is added there instead, so the loop
+    is free even while a single large document is being walked.
+
+    Calls are run one at a time in the order they were made, so the
+    result is exactly what the wrapped builder would give if the same
+    objects were added to it directly.
+    """
+    # number of objects added between turns of the event loop
+    SLICE_SIZE = 100
+
+    def __init__(self, builder=None, executor=None, slice_size=None):
+        """
+        :param builder: the ``SchemaBuilder`` to add to (defaults to a
+          new one)
+        :param executor: a ``concurrent.futures.Executor`` to add
+          slices in. With a ``ThreadPoolExecutor`` the wrapped builder
+          is updated in a worker thread. With a ``ProcessPoolExecutor``
+          each slice is added to a copy of the builder in a worker
+          process, and the copy is merged back in, so the builder class
+          has to be importable by the workers. The copy is made when
+          the executor is first used and again after each
+          ``add_schema_async``, so change the builder only through this
+          wrapper. Copying and merging run in the loop's default
+          executor.
+        :param slice_size: number of objects to add at a time (defaults
+          to ``SLICE_SIZE``)
+        """
+        self.builder = SchemaBuilder() if builder is None else builder
+        self.executor = executor
+        self.slice_size = slice_size or self.SLICE_SIZE
+        # created on first use so that it belongs to the running loop
+        self._lock = None
+        # the pickled builder that process pool slices start from
+        self._seed = None
+
+    async def add_schema_async(self, schema):
+        """
+        Merge in a JSON schema, as ``SchemaBuilder.add_schema`` does.
+
+        :param schema: a JSON Schema
+        """
+        async with self._get_lock():
+            self.builder.add_schema(schema)
+            # later slices have to start from the new schema
+            self._seed = None
+
+    async def add_object_async(self, obj):
+        """
+        Modify the schema to accommodate an object.
+
+        :param obj: any object or scalar that can be serialized in JSON
+        """
+        async with self._get_lock():
+            await self._add_slice([obj])
+
+    async def add_objects_async(self, objs):
+        """
+        Modify the schema to accommodate many objects, yielding to the
+        event loop after every slice.
+
+        :param objs: an asynchronous or ordinary iterable of objects or
+          scalars that can be serialized in JSON. It is consumed
+          lazily, one slice at a time.
+        """
+        async with self._get_lock():
+            objs_slice = []
+            if hasattr(objs, '__aiter__'):
+                async for obj in objs:
+                    objs_slice.append(obj)
+                    if len(objs_slice) >= self.slice_size:
+                        await self._add_slice(objs_slice)
+                        objs_slice = []
+            else:
+                for obj in objs:
+                    objs_slice.append(obj)
+                    if len(objs_slice) >= self.slice_size:
+                        await self._add_slice(objs_slice)
+                        objs_slice = []
+            if objs_slice:
+                await self._add_slice(objs_slice)
+
+    async def to_schema_async(self):
+        """
+        Generate a schema based on previous inputs. This runs in the
+        executor if it is a thread pool.
+
+        :rtype: ``dict``
+        """
+        async with self._get_lock():
+            if self.executor is None or \
+                    isinstance(self.executor, ProcessPoolExecutor):
+                return self.builder.to_schema()
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.builder.to_schema)
+
+    async def _add_slice(self, objs):
+        if self.executor is None:
+            self.builder.add_objects(objs, batch_size=len(objs))
+            # let everything else waiting on the loop run
+            await asyncio.sleep(0)
+            return
+
+        loop = asyncio.get_running_loop()
+        if isinstance(self.executor, ProcessPoolExecutor):
+            # pickling and merging a big builder would block the loop,
+            # so they run in the default executor
+            if self._seed is None:
+                self._seed = await loop.run_in_executor(
+                    None, dump_seed, self.builder)
+            partial = await loop.run_in_executor(
+                self.executor, _build_partial, self._seed, objs)
+            await loop.run_in_executor(None, self.builder.merge, partial)
+        else:
+            await loop.run_in_executor(
+                self.executor, self.builder.add_objects, objs, len(objs))
+
+    def _get_lock(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+
+def _build_partial(seed, objects):
+    builder = pickle.loads(seed)
+    builder.add_objects(objects, batch_size=len(objects))
+    return builder
@@ -1,6 +1,13 @@
 import json
+from itertools import islice
 from warnings import warn
+from ..parsers import get_parser
+from .checkpoint import load_checkpoint, save_checkpoint
+from .encoder import iterencode
 from .node import SchemaNode
+from .refs import defs_keyword, share_subschemas
+from .shapes import ShapeCache, fingerprint
+from .stats import collect_stats, profiled_node_class
 from .strategies import BASIC_SCHEMA_STRATEGIES
 
 
@@ -21,9 +28,24 @@ class _MetaSchemaBuilder(type):
 
             cls.STRATEGIES = tuple(unique_schema_strategies)
 
+        # sampling would hide values from strategies that track them
+        array_sample_size = cls.ARRAY_SAMPLE_SIZE
+        if any(strategy.INSPECTS_VALUES for strategy in cls.STRATEGIES):
+            array_sample_size = None
+
         # create a version of SchemaNode loaded with the custom strategies
-        cls.NODE_CLASS = type('%sSchemaNode' % name, (SchemaNode,),
-                              {'STRATEGIES': cls.STRATEGIES})
+        # (this also builds its object dispatch table) and make it
+        # findable as an attribute of the builder for pickle
+        cls.NODE_CLASS = type('%sSchemaNode' % name, (SchemaNode,), {
+            'STRATEGIES': cls.STRATEGIES,
+            'MAP_THRESHOLD': cls.MAP_THRESHOLD,
+            'ARRAY_SAMPLE_SIZE': array_sample_size,
+            '_BUILDER': cls,
+            '__slots__': (),
+            '__module__': cls.__module__,
+            '__qualname__': '%s.NODE_CLASS' % cls.__qualname__})
+        cls.PROFILED_NODE_CLASS = profiled_node_class(
+            cls.NODE_CLASS, '%s.PROFILED_NODE_CLASS' % cls.__qualname__)
 
 
 class SchemaBuilder(metaclass=_MetaSchemaBuilder):
@@ -36,8 +58,15 @@ class SchemaBuilder(metaclass=_MetaSchemaBuilder):
     NULL_URI = 'NULL'
     NODE_CLASS = SchemaNode
     STRATEGIES = BASIC_SCHEMA_STRATEGIES
+    # collapse an object's properties once it has more than this many
+    MAP_THRESHOLD = None
+    # sample the items of arrays longer than this
+    ARRAY_SAMPLE_SIZE = None
+    # characters to buffer between writes in ``dump``
+    DUMP_CHUNK_SIZE = 1 << 16
 
-    def __init__(self, schema_uri='DEFAULT'):
+    def __init__(self, schema_uri='DEFAULT', shape_cache_size=None,
+                 profile=False):
         """
         :param schema_uri: value of the ``$schema`` keyword. If not
           given, it will use the value of the first available
@@ -45,6 +74,11 @@ class SchemaBuilder(metaclass=_MetaSchemaBuilder):
           ``'http://json-schema.org/schema#'``. A value of ``False`` or
           ``None`` will direct GenSON to leave out the ``"$schema"``
           keyword.
+        :param shape_cache_size: remember the structure (keys and value
+          types at every level) of up to this many recently added
+          objects, and skip any object whose structure is remembered,
+          since adding it again can't change the schema. This is
+          ignored if any strategy sets ``INSPECTS_VALUES``.
         """
         if schema_uri is None or schema_uri is False:
             self.schema_uri = self.NULL_URI
@@ -56,7 +90,16 @@ class SchemaBuilder(metaclass=_MetaSchemaBuilder):
         if not issubclass(self.NODE_CLASS, SchemaNode):
             raise TypeError("NODE_CLASS %r is not a subclass of SchemaNode"
                             % self.NODE_CLASS)
-        self._root_node = self.NODE_CLASS()
+        if profile:
+            self._root_node = self.PROFILED_NODE_CLASS()
+        else:
+            self._root_node = self.NODE_CLASS()
+
+        if shape_cache_size and not any(
+                strategy.INSPECTS_VALUES for strategy in self.STRATEGIES):
+            self._shape_cache = ShapeCache(shape_cache_size)
+        else:
+            self._shape_cache = None
 
     def add_schema(self, schema):
         """
@@ -68,6 +111,10 @@ class SchemaBuilder(metaclass=_MetaSchemaBuilder):
         .. note::
             There is no schema validation. If you pass in a bad schema,
             you might get back a bad schema.
+
+        .. note::
+            Another ``SchemaBuilder`` is serialized before it is merged.
+            Use ``merge`` (or ``|=``) to combine builders directly.
         """
         if isinstance(schema, SchemaBuilder):
             schema_uri = schema.schema_uri
@@ -82,6 +129,7 @@ class SchemaBuilder(metaclass=_MetaSchemaBuilder):
             schema = dict(schema)
             del schema['$schema']
         self._root_node.add_schema(schema)
+        self._clear_shape_cache()
 
     def add_object(self, obj):
         """
@@ -89,25 +137,239 @@ class SchemaBuilder(metaclass=_MetaSchemaBuilder):
 
         :param obj: any object or scalar that can be serialized in JSON
         """
-        self._root_node.add_object(obj)
+        if self._shape_cache is None:
+            self._root_node.add_object(obj)
+            return
+
+        shape = fingerprint(obj)
+        if shape not in self._shape_cache:
+            self._root_node.add_object(obj)
+            self._shape_cache.add(shape)
+
+    def add_json_bytes(self, data, parser='auto'):
+        """
+        Decode a JSON document and modify the schema to accommodate it.
+
+        :param data: a JSON document as ``bytes`` or ``str``
+        :param parser: name of the JSON parser to use: ``'orjson'``,
+          ``'simdjson'``, ``'ujson'``, ``'json'``, or ``'auto'`` for the
+          fastest one installed
+        """
+        self.add_object(get_parser(parser).loads(data))
+
+    def add_objects(self, objs, batch_size=1000, checkpoint=None,
+                    checkpoint_every=None, position=0):
+        """
+        Modify the schema to accommodate many objects. They are added
+        in batches, and each batch is split up by property and array
+        item so that every schema node handles its values in one call.
+        This gives the same result as calling ``add_object`` on each
+        object.
+
+        :param objs: an iterable of objects or scalars that can be
+          serialized in JSON. It is consumed lazily.
+        :param batch_size: number of objects to hold in memory at a time
+        :param checkpoint: path to save a checkpoint to (see
+          ``save_checkpoint``) every ``checkpoint_every`` objects
+        :param checkpoint_every: number of objects between checkpoints
+        :param position: number of objects already added from the same
+          input, when resuming from a checkpoint. Checkpoints record the
+          position of the next object to add.
+        """
+        if checkpoint is not None:
+            if not checkpoint_every or checkpoint_every < 1:
+                raise ValueError('checkpoint_every must be at least 1')
+            batch_size = min(batch_size, checkpoint_every)
+
+        iterator = iter(objs)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                return
+            batch_position = position
+            position += len(batch)
+            if self._shape_cache is not None:
+                batch = self._filter_seen_shapes(batch)
+            self._root_node.add_objects(batch)
+            if checkpoint is not None and \
+                    position // checkpoint_every > \
+                    batch_position // checkpoint_every:
+                self.save_checkpoint(checkpoint, position)
+
+    def add_objects_parallel(self, objects, jobs=None, chunk_size=1000):
+        """
+        Modify the schema to accommodate many objects, spreading the
+        work over a pool of worker processes. Each worker builds a
+        partial schema from a chunk of objects, starting from a copy of
+        this builder, and the partials are merged back in input order.
+
+        :param objects: an iterable of objects or scalars that can be
+          serialized in JSON. It is consumed lazily.
+        :param jobs: number of worker processes (defaults to the number
+          of CPUs)
+        :param chunk_size: number of objects sent to a worker at a time
+
+        .. note::
+            The builder class must be importable by the workers, so it
+            has to be defined at the top level of a module.
+
+        .. note::
+            Objects are pickled to send them to the workers, so
+            documents nested deeper than Python's recursion limit have
+            to be added with ``add_objects`` instead.
+        """
+        from .parallel import add_objects
+        add_objects(self, objects, jobs=jobs, chunk_size=chunk_size)
 
-    def to_schema(self):
+    def merge(self, other):
+        """
+        Merge in another ``SchemaBuilder`` of the same class by walking
+        its schema nodes directly. Unlike ``add_schema``, this keeps all
+        of the other builder's state, and it is associative as long as
+        ``MAP_THRESHOLD`` doesn't collapse any objects.
+
+        :param other: a ``SchemaBuilder`` of the same class
+        """
+        if not isinstance(other, SchemaBuilder):
+            raise TypeError('cannot merge {0!r} into a SchemaBuilder'
+                            .format(type(other).__name__))
+        self.schema_uri = self.schema_uri or other.schema_uri
+        self._root_node.merge(other._root_node)
+        self._clear_shape_cache()
+
+        # return self for easy method chaining
+        return self
+
+    def save_checkpoint(self, path, position=None):
+        """
+        Save the complete state of the builder to a file, so that it can
+        be restored with ``load_checkpoint`` and keep going with exactly
+        the same results. The file is replaced atomically.
+
+        :param path: the file to write
+        :param position: anything picklable that says how far through
+          its input the builder is, to be returned by ``load_checkpoint``
+        """
+        save_checkpoint(path, self, position)
+
+    @classmethod
+    def load_checkpoint(cls, path):
+        """
+        Restore a builder saved by ``save_checkpoint``.
+
+        .. warning::
+            A checkpoint is a pickle, and loading a pickle can run any
+            code in it. Only load checkpoints from a trusted source,
+            like ones you wrote yourself in a directory nobody else can
+            write to.
+
+        :param path: the file to read
+        :rtype: ``(builder, position)``
+        :raises CheckpointError: if the file isn't a checkpoint of a
+          builder of this class
+        """
+        return load_checkpoint(path, cls)
+
+    def shape_cache_info(self):
+        """
+        Report how well the shape cache is working, in the same format
+        as ``functools.lru_cache``.
+
+        :rtype: ``ShapeCacheInfo(hits, misses, maxsize, currsize)`` or
+          ``None`` if there is no shape cache
+        """
+        if self._shape_cache is not None:
+            return self._shape_cache.info()
+
+    def stats(self):
+        """
+        Report what was added to each part of the schema, if the builder
+        was created with ``profile=True``. Values that reach a
+        ``patternProperties`` node are the keys its pattern matched.
+
+        :rtype: ``dict`` mapping the JSON pointer of each schema node to
+          a ``dict`` of ``values`` (number of objects added), ``types``
+          (that number by JSON type), ``fallbacks`` (objects that
+          couldn't be dispatched by type) and ``seconds`` (time spent
+          adding, including child nodes), or ``None`` if the builder
+          isn't profiled
+        """
+        if isinstance(self._root_node, self.PROFILED_NODE_CLASS):
+            return collect_stats(self._root_node)
+
+    def is_sampled(self):
+        """
+        Check whether any array items were skipped because of
+        ``ARRAY_SAMPLE_SIZE``, in which case the schema might not
+        describe every item.
+
+        :rtype: ``bool``
+        """
+        nodes = [self._root_node]
+        while nodes:
+            node = nodes.pop()
+            for strategy in node._active_strategies:
+                if strategy.is_sampled():
+                    return True
+                nodes.extend(strategy.child_nodes())
+        return False
+
+    def to_schema(self, dedupe=False):
         """
         Generate a schema based on previous inputs.
 
+        :param dedupe: write each subschema that is repeated (and has
+          subschemas of its own) once, under ``$defs`` (``definitions``
+          before draft 2019-09), and point to it with ``$ref``
         :rtype: ``dict``
         """
         schema = self._base_schema()
-        schema.update(self._root_node.to_schema())
+        root_schema = self._root_node.to_schema()
+        if dedupe:
+            root_schema = share_subschemas(
+                root_schema, defs_keyword(schema.get('$schema')))
+        schema.update(root_schema)
         return schema
 
-    def to_json(self, *args, **kwargs):
+    def to_json(self, *args, dedupe=False, **kwargs):
         """
         Generate a schema and convert it directly to serialized JSON.
 
+        :param dedupe: see ``to_schema``
         :rtype: ``str``
         """
-        return json.dumps(self.to_schema(), *args, **kwargs)
+        if args or 'cls' in kwargs:
+            return json.dumps(self.to_schema(dedupe), *args, **kwargs)
+        return ''.join(iterencode(self.to_schema(dedupe), **kwargs))
+
+    def dump(self, fp, dedupe=False, **kwargs):
+        """
+        Generate a schema and write it to a file-like object as JSON, in
+        chunks, without building the whole string in memory.
+
+        :param fp: a file-like object open for writing text
+        :param dedupe: see ``to_schema``
+        :param kwargs: options for ``json.dump``, like ``indent`` and
+          ``sort_keys``
+        """
+        chunk = []
+        size = 0
+        for piece in iterencode(self.to_schema(dedupe), **kwargs):
+            chunk.append(piece)
+            size += len(piece)
+            if size >= self.DUMP_CHUNK_SIZE:
+                fp.write(''.join(chunk))
+                chunk = []
+                size = 0
+        fp.write(''.join(chunk))
+
+    def __ior__(self, other):
+        """
+        ``builder |= other`` is the same as ``builder.merge(other)``.
+        """
+        if not isinstance(other, SchemaBuilder):
+            return NotImplemented
+        return self.merge(other)
 
     def __len__(self):
         """
@@ -132,6 +394,35 @@ class SchemaBuilder(metaclass=_MetaSchemaBuilder):
         return (self._base_schema() == other._base_schema()
                 and self._root_node == other._root_node)
 
+    def __getstate__(self):
+        # list the nodes so that each one comes after all of the nodes
+        # under it: pickle has then already saved a node's children when
+        # it gets to the node, and refers back to them instead of
+        # recursing, so trees of any depth can be pickled
+        state = {'_nodes': _nodes_bottom_up(self._root_node)}
+        state.update(self.__dict__)
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        state.pop('_nodes', None)
+        self.__dict__.update(state)
+
+    def _filter_seen_shapes(self, batch):
+        unseen = []
+        for obj in batch:
+            shape = fingerprint(obj)
+            if shape not in self._shape_cache:
+                unseen.append(obj)
+                self._shape_cache.add(shape)
+        return unseen
+
+    def _clear_shape_cache(self):
+        # shapes are only known to be redundant with respect to added
+        # objects, so be conservative whenever anything else comes in
+        if self._shape_cache is not None:
+            self._shape_cache.clear()
+
     def _base_schema(self):
         if self.schema_uri == self.NULL_URI:
             return {}
@@ -139,6 +430,19 @@ class SchemaBuilder(metaclass=_MetaSchemaBuilder):
             return {'$schema': self.schema_uri or self.DEFAULT_URI}
 
 
+def _nodes_bottom_up(root_node):
+    """ every node in the tree under ``root_node``, children first """
+    nodes = []
+    stack = [root_node]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        for strategy in node._active_strategies:
+            stack.extend(strategy.child_nodes())
+    nodes.reverse()
+    return nodes
+
+
 class Schema(SchemaBuilder):
 
     def __init__(self):
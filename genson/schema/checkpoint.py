@@ -0,0 +1,73 @@
+"""
+Saving and restoring the complete state of a ``SchemaBuilder``, so that
+a long job can pick up where it stopped.
+
+A generated schema can't be used for this, since it leaves out state
+that affects later results (e.g. whether ``required`` was seeded empty,
+or a typeless schema waiting for a type). Checkpoints are pickles of
+the builder itself, so only load ones you wrote.
+"""
+import os
+import pickle
+import tempfile
+
+# bumped whenever the layout of a checkpoint changes
+CHECKPOINT_VERSION = 1
+
+
+class CheckpointError(ValueError):
+    pass
+
+
+def save_checkpoint(path, builder, position=None):
+    """
+    Write ``builder`` and the input ``position`` it has reached to
+    ``path``. The file is replaced atomically, so an interrupted save
+    leaves the previous checkpoint in place.
+    """
+    state = {
+        'version': CHECKPOINT_VERSION,
+        'builder': builder,
+        'position': position,
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix='.%s.' % os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            pickle.dump(state, fp, pickle.HIGHEST_PROTOCOL)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_checkpoint(path, builder_class):
+    """
+    Read a checkpoint written by ``save_checkpoint`` and return
+    ``(builder, position)``.
+
+    A checkpoint is a pickle, and loading a pickle can run any code in
+    it. Only load checkpoints from a trusted source, such as ones this
+    user wrote, and never one that someone else could have replaced.
+    """
+    with open(path, 'rb') as fp:
+        try:
+            state = pickle.load(fp)
+        except Exception as err:
+            raise CheckpointError(
+                '{0} is not a valid checkpoint: {1}'.format(path, err))
+
+    if not isinstance(state, dict) or \
+            state.get('version') != CHECKPOINT_VERSION:
+        raise CheckpointError(
+            '{0} is not a version {1} checkpoint'.format(
+                path, CHECKPOINT_VERSION))
+    if not isinstance(state['builder'], builder_class):
+        raise CheckpointError(
+            '{0} holds a {1}, not a {2}'.format(
+                path, type(state['builder']).__name__,
+                builder_class.__name__))
+    return state['builder'], state['position']
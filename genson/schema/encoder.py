@@ -0,0 +1,193 @@
+"""
+Incremental JSON encoding for large schemas. ``iterencode`` produces the
+same text as ``json.dumps`` with the same options, but in pieces, so a
+schema can be written out without building one giant string.
+"""
+import json
+
+# roughly how many values to encode in each piece
+PIECE_SIZE = 4096
+# how deeply nested a piece can be, to stay clear of the C encoder's
+# recursion limit
+PIECE_DEPTH = 64
+# returned by ``_size`` for values nested deeper than that
+_TOO_DEEP = object()
+
+
+def iterencode(schema, **kwargs):
+    """
+    Yield the JSON encoding of ``schema`` in pieces. Keyword arguments
+    are the same as for ``json.dumps``.
+    """
+    encoder = json.JSONEncoder(**kwargs)
+    return _iterencode(encoder, schema)
+
+
+def _iterencode(encoder, obj):
+    """
+    Walk big containers in Python, handing runs of small values to the
+    (much faster) one-shot C encoder. A run is encoded as a container of
+    its own, with the brackets stripped off. The walk keeps its own
+    stack, so it works at any depth. With ``indent``, runs are encoded
+    at the top level and then indented to where they go: JSON strings
+    can't contain raw newlines, so every newline is a line break.
+    """
+    size = _size(obj, PIECE_SIZE)
+    if size is not None and size is not _TOO_DEEP:
+        yield encoder.encode(obj)
+        return
+
+    # probing each value is cheap unless the schema is deep, in which
+    # case everything is measured once up front
+    sizes = _measure(obj) if size is _TOO_DEEP else None
+
+    def fit(value, budget):
+        nonlocal sizes
+        if sizes is None:
+            size = _size(value, budget)
+            if size is not _TOO_DEEP:
+                return size
+            sizes = _measure(obj)
+        return _fit(sizes, value, budget)
+
+    walk = _Walk(encoder, obj, 0)
+    stack = [walk]
+    yield walk.opener
+    while stack:
+        walk = stack[-1]
+        for item in walk.items:
+            value = item[1] if walk.is_dict else item
+            size = fit(value, PIECE_SIZE - walk.run_size)
+            if size is None and walk.run:
+                # flush the run, then see if the item fits in a new one
+                yield walk.flush()
+                size = fit(value, PIECE_SIZE)
+
+            if size is not None or \
+                    walk.is_dict and not isinstance(item[0], str):
+                # let json convert (or reject) keys that aren't strings
+                walk.run.append(item)
+                walk.run_size += PIECE_SIZE if size is None else size + 1
+                continue
+
+            piece = walk.separator + walk.newline(walk.depth + 1)
+            walk.separator = encoder.item_separator
+            if walk.is_dict:
+                piece += encoder.encode(item[0]) + encoder.key_separator
+            walk = _Walk(encoder, value, walk.depth + 1)
+            stack.append(walk)
+            yield piece + walk.opener
+            break
+        else:
+            stack.pop()
+            # containers are only walked if they aren't empty
+            yield walk.flush() + walk.newline(walk.depth) + walk.closer
+
+
+class _Walk:
+    """
+    a container that ``_iterencode`` is partway through
+    """
+    __slots__ = ('encoder', 'depth', 'is_dict', 'items', 'opener',
+                 'closer', 'separator', 'run', 'run_size')
+
+    def __init__(self, encoder, obj, depth):
+        self.encoder = encoder
+        self.depth = depth
+        self.is_dict = isinstance(obj, dict)
+        if self.is_dict:
+            self.opener, self.closer = '{', '}'
+            self.items = iter(sorted(obj.items()) if encoder.sort_keys
+                              else obj.items())
+        else:
+            self.opener, self.closer = '[', ']'
+            self.items = iter(obj)
+        self.separator = ''
+        self.run = []
+        self.run_size = 0
+
+    def newline(self, depth):
+        """ the line break before a value ``depth`` levels deep """
+        indent = self.encoder.indent
+        if indent is None:
+            return ''
+        if isinstance(indent, int):
+            indent = ' ' * indent
+        return '\n' + indent * depth
+
+    def flush(self):
+        """ encode and clear the current run of small values """
+        if not self.run:
+            return ''
+        run_type = dict if self.is_dict else list
+        piece = self.encoder.encode(run_type(self.run))
+        if self.encoder.indent is None:
+            piece = piece[1:-1]
+        else:
+            # drop the brackets and the line break before the closing one
+            piece = piece[1:-2].replace('\n', self.newline(self.depth))
+        piece = self.separator + piece
+        self.separator = self.encoder.item_separator
+        self.run = []
+        self.run_size = 0
+        return piece
+
+
+def _measure(obj):
+    """
+    map the id of every container in ``obj`` to the number of values in
+    it and how deeply they are nested
+    """
+    # list the containers breadth-first, then total them up backwards
+    containers = [obj]
+    parents = [None]
+    for index, obj in enumerate(containers):
+        for value in obj.values() if isinstance(obj, dict) else obj:
+            if isinstance(value, (dict, list)):
+                containers.append(value)
+                parents.append(index)
+
+    sizes = list(map(len, containers))
+    heights = [1] * len(containers)
+    for index in range(len(containers) - 1, 0, -1):
+        parent = parents[index]
+        sizes[parent] += sizes[index]
+        if heights[parent] <= heights[index]:
+            heights[parent] = heights[index] + 1
+    return dict(zip(map(id, containers), zip(sizes, heights)))
+
+
+def _fit(sizes, value, budget):
+    """
+    like ``_size``, but looking up containers measured by ``_measure``,
+    and with ``None`` for values that are too deep as well as too big
+    """
+    if not isinstance(value, (dict, list)):
+        return 0
+    size, height = sizes[id(value)]
+    if size > budget or height > PIECE_DEPTH:
+        return None
+    return size
+
+
+def _size(obj, budget):
+    """
+    count the values in ``obj``, or return ``None`` as soon as there are
+    more than ``budget``, or ``_TOO_DEEP`` as soon as they are nested
+    more than ``PIECE_DEPTH`` deep
+    """
+    if not isinstance(obj, (dict, list)):
+        return 0
+    size = 0
+    stack = [(obj, 1)]
+    while stack:
+        obj, depth = stack.pop()
+        size += len(obj)
+        if size > budget:
+            return None
+        if depth > PIECE_DEPTH:
+            return _TOO_DEEP
+        for value in obj.values() if isinstance(obj, dict) else obj:
+            if isinstance(value, (dict, list)):
+                stack.append((value, depth + 1))
+    return size
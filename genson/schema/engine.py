@@ -0,0 +1,79 @@
+"""
+An explicit stack for walking nested schemas and objects without
+recursion, so documents of any depth can be added.
+"""
+import threading
+
+# how many calls can be nested before they are queued up instead
+MAX_DEPTH = 64
+
+
+class _State:
+    __slots__ = ('depth', 'pending')
+
+    def __init__(self):
+        self.depth = 0
+        # calls queued up past MAX_DEPTH, in the order they were made
+        self.pending = None
+
+
+class _Local(threading.local):
+    # one attribute lookup on a thread-local is much cheaper than one
+    # for every counter
+    def __init__(self):
+        self.state = _State()
+
+
+local = _Local()
+
+# how many threads are running queued calls, so that a call that
+# doesn't nest can tell it is safe to skip the queue without looking up
+# its thread's state
+queueing = 0
+_queueing_lock = threading.Lock()
+
+
+def call(function, *args):
+    """
+    Call ``function(*args)``. Calls nested up to ``MAX_DEPTH`` deep are
+    made right away. Deeper ones are queued up and made after the call
+    that made them returns, in the order they were queued and before
+    anything queued earlier. That's the same order as plain recursion,
+    so a ``SchemaNode`` method can go through ``call`` and have its
+    strategies call into child nodes as usual, without growing the
+    Python stack. The catch is that the children might not have been
+    updated yet when a strategy method returns.
+    """
+    state = local.state
+    if state.pending is not None:
+        state.pending.append((function, args))
+        return
+
+    if state.depth < MAX_DEPTH:
+        state.depth += 1
+        try:
+            function(*args)
+        finally:
+            state.depth -= 1
+        return
+
+    # too deep: run this call and everything under it from a queue
+    global queueing
+    with _queueing_lock:
+        queueing += 1
+    state.pending = pending = []
+    stack = []
+    try:
+        function(*args)
+        while True:
+            if pending:
+                stack.extend(reversed(pending))
+                pending.clear()
+            if not stack:
+                break
+            function, args = stack.pop()
+            function(*args)
+    finally:
+        state.pending = None
+        with _queueing_lock:
+            queueing -= 1
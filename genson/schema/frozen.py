@@ -0,0 +1,63 @@
+"""
+Read-only ``dict`` and ``list`` types for schema fragments that are
+cached and shared between calls to ``to_schema``. They serialize like
+their base types, and ``copy.deepcopy`` turns them back into plain,
+mutable containers.
+"""
+from copy import deepcopy
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError('{0} is read-only; use copy.deepcopy() to get a '
+                    'mutable copy'.format(type(self).__name__))
+
+
+class FrozenDict(dict):
+    """
+    a ``dict`` that can't be modified
+    """
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return {key: deepcopy(value, memo) for key, value in self.items()}
+
+
+class FrozenList(list):
+    """
+    a ``list`` that can't be modified
+    """
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = _read_only
+    clear = reverse = sort = _read_only
+
+    def __reduce__(self):
+        return (type(self), (list(self),))
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [deepcopy(value, memo) for value in self]
+
+
+def freeze(value):
+    """
+    return a read-only version of a schema fragment, reusing any parts
+    of it that are already frozen
+    """
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(map(freeze, value))
+    return value
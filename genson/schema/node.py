@@ -1,19 +1,100 @@
-from .strategies import BASIC_SCHEMA_STRATEGIES, Typeless
+import threading
+from functools import lru_cache
+from . import engine
+from .engine import call, local
+from .frozen import freeze
+from .strategies import (
+    BASIC_SCHEMA_STRATEGIES, SchemaStrategy, TypedSchemaStrategy, Typeless)
+from .strategies.base import _slot_names
+
+
+# types pre-loaded into each node class's dispatch table
+JSON_TYPES = (type(None), bool, int, float, str, list, dict)
+# types that can't nest, so adding them can skip the engine
+LEAF_TYPES = frozenset([type(None), bool, int, float, str])
+# strategy classes whose ``add_object`` and ``add_objects`` only look at
+# the types of scalars
+TYPE_ONLY_STRATEGIES = frozenset(BASIC_SCHEMA_STRATEGIES + (
+    SchemaStrategy, TypedSchemaStrategy, Typeless))
 
 
 class SchemaGenerationError(RuntimeError):
     pass
 
 
+class _Comparison(threading.local):
+    # pairs of nodes still to be compared, while ``__eq__`` is running
+    pending = None
+
+
+_comparison = _Comparison()
+
+
 class SchemaNode:
     """
     Basic schema generator class. SchemaNode objects can be loaded
     up with existing schemas and objects before being serialized.
     """
+    __slots__ = ('_active_strategies', '_schema_cache')
     STRATEGIES = BASIC_SCHEMA_STRATEGIES
+    # see ``SchemaBuilder.MAP_THRESHOLD``
+    MAP_THRESHOLD = None
+    # see ``SchemaBuilder.ARRAY_SAMPLE_SIZE``
+    ARRAY_SAMPLE_SIZE = None
+    # the builder class that made this node class, which is how its
+    # nodes find it again when they are unpickled
+    _BUILDER = None
+    _PROFILED = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._build_object_dispatch()
+
+    @classmethod
+    def _build_object_dispatch(cls):
+        """
+        Map object types to the strategies whose ``match_object`` accepts
+        them, so objects can be dispatched without scanning. If any
+        strategy matches on more than the type, the table is left out
+        and every object goes through the scan.
+
+        Also decide whether scalars can be summarized by their types
+        (see ``List``), which needs the table, no strategy that inspects
+        values, and no strategy for scalars with its own ``add_object``
+        or ``add_objects``, since those could look at values without
+        setting ``INSPECTS_VALUES``.
+        """
+        cls._OBJECT_DISPATCH = None
+        cls._SUMMARIZE_SCALARS = False
+        for strategy in cls.STRATEGIES:
+            if _defining_class(strategy, 'match_object') is not \
+                    _defining_class(strategy, '_match_object_type') or \
+                    strategy._match_object_type(object) is None:
+                return
+
+        cls._OBJECT_DISPATCH = {}
+        for object_type in JSON_TYPES:
+            cls._dispatch_object_type(object_type)
+        cls._SUMMARIZE_SCALARS = not any(
+            strategy.INSPECTS_VALUES for strategy in cls.STRATEGIES) and all(
+                _defining_class(strategy, name) in TYPE_ONLY_STRATEGIES
+                for object_type in LEAF_TYPES
+                for strategy in cls._OBJECT_DISPATCH[object_type]
+                for name in ('add_object', 'add_objects'))
+
+    @classmethod
+    def _dispatch_object_type(cls, object_type):
+        strategies = tuple(
+            strategy for strategy in cls.STRATEGIES
+            if strategy._match_object_type(object_type))
+        cls._OBJECT_DISPATCH[object_type] = strategies
+        return strategies
 
     def __init__(self):
         self._active_strategies = []
+        # the last result of to_schema, cleared by anything that passes
+        # through this node on its way to change the schema
+        self._schema_cache = None
 
     def add_schema(self, schema):
         """
@@ -24,18 +105,23 @@ class SchemaNode:
           an existing JSON Schema to merge.
         """
 
+        self._schema_cache = None
+
         # serialize instances of SchemaNode before parsing
         if isinstance(schema, SchemaNode):
             schema = schema.to_schema()
 
+        call(self._add_schema, schema)
+
+        # return self for easy method chaining
+        return self
+
+    def _add_schema(self, schema):
         for subschema in self._get_subschemas(schema):
             # delegate to SchemaType object
             active_strategy = self._get_strategy_for_schema(subschema)
             active_strategy.add_schema(subschema)
 
-        # return self for easy method chaining
-        return self
-
     def add_object(self, obj):
         """
         Modify the schema to accommodate an object.
@@ -45,17 +131,130 @@ class SchemaNode:
           a JSON object to use in generating the schema.
         """
 
+        self._schema_cache = None
+
+        # this is the hottest path, so it does what ``call`` would
+        # inline when it can
+        if type(obj) in LEAF_TYPES and not engine.queueing:
+            self._get_strategy_for_object(obj).add_object(obj)
+            return self
+
+        state = local.state
+        if state.pending is not None or state.depth >= engine.MAX_DEPTH:
+            call(self._add_object, obj)
+        else:
+            state.depth += 1
+            try:
+                self._get_strategy_for_object(obj).add_object(obj)
+            finally:
+                state.depth -= 1
+
+        # return self for easy method chaining
+        return self
+
+    def _add_object(self, obj):
         # delegate to SchemaType object
         active_strategy = self._get_strategy_for_object(obj)
         active_strategy.add_object(obj)
 
+    def add_objects(self, objs):
+        """
+        Modify the schema to accommodate a batch of objects. Objects are
+        grouped by strategy so that each strategy (and, in turn, each
+        child node) handles its share of the batch in a single call.
+
+        arguments:
+        * `objs` (required - iterable):
+          JSON objects to use in generating the schema.
+        """
+        objs = list(objs)
+        if objs:
+            self._schema_cache = None
+            call(self._add_objects, objs)
+
         # return self for easy method chaining
         return self
 
+    def _add_objects(self, objs):
+        # the common case: every object is handled by the same strategy
+        if self._OBJECT_DISPATCH is not None and \
+                len(set(map(type, objs))) == 1:
+            self._get_strategy_for_object(objs[0]).add_objects(objs)
+            return
+
+        batches = {}
+        for obj in objs:
+            active_strategy = self._get_strategy_for_object(obj)
+            batch = batches.get(id(active_strategy))
+            if batch is None:
+                batch = batches[id(active_strategy)] = (active_strategy, [])
+            batch[1].append(obj)
+
+        for active_strategy, batch in batches.values():
+            active_strategy.add_objects(batch)
+
+    def merge(self, other):
+        """
+        Merge in another `SchemaNode` by walking its strategies directly
+        instead of serializing it. Merging is associative, so partial
+        nodes can be combined in any grouping as long as their order is
+        kept. (Objects that ``MAP_THRESHOLD`` collapses are the
+        exception, since when they collapse depends on the grouping.)
+
+        arguments:
+        * `other` (required - `SchemaNode`):
+          a node using the same strategies as this one.
+        """
+        if other.STRATEGIES != self.STRATEGIES:
+            raise TypeError('cannot merge {0} into {1}: strategies differ'
+                            .format(type(other).__name__,
+                                    type(self).__name__))
+
+        self._schema_cache = None
+        call(self._merge, other)
+
+        # return self for easy method chaining
+        return self
+
+    def _merge(self, other):
+        for strategy in other._active_strategies:
+            if isinstance(strategy, Typeless):
+                # same handling as adding a typeless schema
+                active_strategy = self._get_strategy_for_schema({})
+                if isinstance(active_strategy, Typeless):
+                    active_strategy.merge(strategy)
+                else:
+                    active_strategy.add_schema(strategy.to_schema())
+                continue
+
+            for active_strategy in self._active_strategies:
+                if type(active_strategy) is type(strategy):
+                    break
+            else:
+                active_strategy = self._add_strategy(type(strategy))
+            active_strategy.merge(strategy)
+
     def to_schema(self):
         """
-        Convert the current schema to a `dict`.
+        Convert the current schema to a `dict`. The result is read-only
+        and is reused until something changes this part of the schema.
         """
+        if self._schema_cache is None:
+            # fill in the caches from the bottom up, so that strategies
+            # find their children's schemas ready instead of recursing
+            stale = []
+            nodes = [self]
+            while nodes:
+                node = nodes.pop()
+                if node._schema_cache is None:
+                    stale.append(node)
+                    for strategy in node._active_strategies:
+                        nodes.extend(strategy.child_nodes())
+            for node in reversed(stale):
+                node._schema_cache = freeze(node._generate_schema())
+        return self._schema_cache
+
+    def _generate_schema(self):
         types = set()
         generated_schemas = []
         for active_strategy in self._active_strategies:
@@ -80,13 +279,72 @@ class SchemaNode:
 
         return result_schema
 
+    def __ior__(self, other):
+        if not isinstance(other, SchemaNode):
+            return NotImplemented
+        return self.merge(other)
+
     def __len__(self):
         return len(self._active_strategies)
 
     def __eq__(self, other):
-        """ Required for SchemaBuilder.__eq__ to work properly """
-        return (isinstance(other, self.__class__)
-                and self.__dict__ == other.__dict__)
+        """
+        Required for SchemaBuilder.__eq__ to work properly. Child nodes
+        are compared from a list rather than by recursing, so trees of
+        any depth can be compared.
+        """
+        if not isinstance(other, self.__class__):
+            return False
+
+        # inside a comparison, strategies comparing their states come
+        # here for their child nodes, which are queued up for later
+        pending = _comparison.pending
+        if pending is not None:
+            pending.append((self, other))
+            return True
+
+        pending = _comparison.pending = [(self, other)]
+        try:
+            while pending:
+                node, other = pending.pop()
+                if node._active_strategies != other._active_strategies or \
+                        getattr(node, '__dict__', None) != \
+                        getattr(other, '__dict__', None):
+                    return False
+            return True
+        finally:
+            _comparison.pending = None
+
+    def __reduce__(self):
+        # a node pickled on its own takes pickle down its tree
+        # recursively, so deep trees need to be pickled as part of a
+        # builder, which lists its nodes bottom-up
+        node_class = type(self)
+        if node_class._BUILDER is not None:
+            return (_new_builder_node,
+                    (node_class._BUILDER, node_class._PROFILED),
+                    self.__getstate__())
+        return (_new_node, (node_class,), self.__getstate__())
+
+    def __getstate__(self):
+        # the schema cache is left out, and the strategies get their
+        # node class back from this node's
+        names = _extra_slot_names(type(self))
+        attrs = getattr(self, '__dict__', None)
+        if names:
+            attrs = dict(attrs or (), **{
+                name: getattr(self, name) for name in names})
+        return (tuple(self._active_strategies), attrs or None)
+
+    def __setstate__(self, state):
+        strategies, attrs = state
+        self._active_strategies = list(strategies)
+        self._schema_cache = None
+        for strategy in strategies:
+            strategy._set_node_class(type(self))
+        if attrs:
+            for name, value in attrs.items():
+                setattr(self, name, value)
 
     # private methods
 
@@ -105,27 +363,37 @@ class SchemaNode:
         return self._get_strategy_for_('schema', schema)
 
     def _get_strategy_for_object(self, obj):
+        dispatch = self._OBJECT_DISPATCH
+        if dispatch is None:
+            return self._get_strategy_for_('object', obj)
+
+        object_type = type(obj)
+        strategies = dispatch.get(object_type)
+        if strategies is None:
+            strategies = self._dispatch_object_type(object_type)
+
+        # same precedence as the scan: active strategies come first
+        for active_strategy in self._active_strategies:
+            if type(active_strategy) in strategies:
+                return active_strategy
+        if strategies:
+            return self._add_strategy(strategies[0])
+
+        # let the scan raise the error
         return self._get_strategy_for_('object', obj)
 
     def _get_strategy_for_(self, kind, schema_or_obj):
+        match = 'match_' + kind
+
         # check existing types
         for active_strategy in self._active_strategies:
-            if getattr(active_strategy, 'match_' + kind)(schema_or_obj):
+            if getattr(active_strategy, match)(schema_or_obj):
                 return active_strategy
 
         # check all potential types
         for strategy in self.STRATEGIES:
-            if getattr(strategy, 'match_' + kind)(schema_or_obj):
-                active_strategy = strategy(self.__class__)
-
-                # incorporate typeless strategy if it exists
-                if self._active_strategies and \
-                        isinstance(self._active_strategies[-1], Typeless):
-                    typeless = self._active_strategies.pop()
-                    active_strategy.add_schema(typeless.to_schema())
-
-                self._active_strategies.append(active_strategy)
-                return active_strategy
+            if getattr(strategy, match)(schema_or_obj):
+                return self._add_strategy(strategy)
 
         # no match found, if typeless add to first strategy
         if kind == 'schema' and Typeless.match_schema(schema_or_obj):
@@ -138,3 +406,42 @@ class SchemaNode:
         raise SchemaGenerationError(
             'Could not find matching schema type for {0}: {1!r}'.format(
                 kind, schema_or_obj))
+
+    def _add_strategy(self, strategy):
+        active_strategy = strategy(self.__class__)
+
+        # incorporate typeless strategy if it exists
+        if self._active_strategies and \
+                isinstance(self._active_strategies[-1], Typeless):
+            typeless = self._active_strategies.pop()
+            active_strategy.add_schema(typeless.to_schema())
+
+        self._active_strategies.append(active_strategy)
+        return active_strategy
+
+
+def _new_node(node_class):
+    return node_class.__new__(node_class)
+
+
+def _new_builder_node(builder_class, profiled):
+    if profiled:
+        node_class = builder_class.PROFILED_NODE_CLASS
+    else:
+        node_class = builder_class.NODE_CLASS
+    return node_class.__new__(node_class)
+
+
+@lru_cache(maxsize=None)
+def _extra_slot_names(node_class):
+    return tuple(name for name in _slot_names(node_class)
+                 if name not in SchemaNode.__slots__)
+
+
+def _defining_class(cls, name):
+    for klass in cls.__mro__:
+        if name in vars(klass):
+            return klass
+
+
+SchemaNode._build_object_dispatch()
@@ -0,0 +1,98 @@
+"""
+Process pool support for ``SchemaBuilder.add_objects_parallel``.
+"""
+import os
+import pickle
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from .stats import NodeStats, ProfiledNode
+from .strategies import Typeless
+
+# the pickled builder every worker starts from
+_seed = None
+
+
+def add_objects(builder, objects, jobs=None, chunk_size=1000):
+    """
+    Add ``objects`` to ``builder`` by building one partial builder per
+    chunk in a worker process and merging the partials back in order.
+    Only a bounded number of chunks is in flight at a time, so
+    ``objects`` can be an arbitrarily long iterator.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    chunks = _chunked(objects, chunk_size)
+
+    with ProcessPoolExecutor(jobs, initializer=_init_worker,
+                             initargs=(dump_seed(builder),)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_build_partial, chunk))
+            if len(pending) >= 2 * jobs:
+                builder.merge(pending.popleft().result())
+        while pending:
+            builder.merge(pending.popleft().result())
+
+
+def dump_seed(builder):
+    """
+    Pickle a copy of ``builder`` for partial builders to start from.
+    The partials are merged back into ``builder``, so the copy leaves
+    out anything that merging would apply again: typeless schemas that
+    are waiting for a type, which every partial would otherwise give to
+    its own first type, and profiling counters. The rest of the copy's
+    state is merged back too, so strategies have to give the same
+    result when a node is merged with a copy of itself.
+    """
+    seed = pickle.loads(pickle.dumps(builder))
+    nodes = [seed._root_node]
+    while nodes:
+        node = nodes.pop()
+        node._active_strategies = [
+            strategy for strategy in node._active_strategies
+            if not isinstance(strategy, Typeless)]
+        if isinstance(node, ProfiledNode):
+            node._stats = NodeStats()
+        for strategy in node._active_strategies:
+            nodes.extend(strategy.child_nodes())
+    return pickle.dumps(seed)
+
+
+def merge_all(builders):
+    """
+    Merge a sequence of builders pairwise, as a balanced tree, and
+    return the result. Builders are merged in place, so the result is
+    the first builder.
+    """
+    builders = list(builders)
+    if not builders:
+        raise ValueError('merge_all() needs at least one builder')
+    while len(builders) > 1:
+        merged = []
+        for i in range(0, len(builders) - 1, 2):
+            builders[i].merge(builders[i + 1])
+            merged.append(builders[i])
+        if len(builders) % 2:
+            merged.append(builders[-1])
+        builders = merged
+    return builders[0]
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _init_worker(seed):
+    global _seed
+    _seed = seed
+
+
+def _build_partial(objects):
+    builder = pickle.loads(_seed)
+    builder.add_objects(objects, batch_size=len(objects))
+    return builder
@@ -0,0 +1,200 @@
+"""
+Sharing repeated subschemas through ``$ref``, for ``to_schema(dedupe=True)``.
+
+Every subschema is interned bottom-up: its key is made from its own
+keywords and the ids of its child subschemas, so equal subschemas get
+equal ids and each one is looked at only once. Subschemas with children
+of their own that are used more than once are then moved into the
+definitions and referred to from everywhere they were used.
+"""
+import json
+import re
+
+# keywords whose values are subschemas, or containers of subschemas
+SCHEMA_KEYWORDS = ('properties', 'patternProperties', 'additionalProperties',
+                   'items', 'anyOf')
+
+_INVALID_NAME_CHARS = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+def defs_keyword(schema_uri):
+    """
+    Return ``'definitions'`` for drafts before 2019-09, which don't know
+    ``$defs``, and ``'$defs'`` for everything else.
+    """
+    if schema_uri and re.search(r'draft-0[0-7]\b', schema_uri):
+        return 'definitions'
+    return '$defs'
+
+
+def share_subschemas(schema, keyword='$defs'):
+    """
+    Return a copy of ``schema`` with every repeated subschema that has
+    subschemas of its own replaced by a ``$ref`` to a single copy under
+    ``keyword``. Definitions that are already there are kept.
+    """
+    interner = _Interner()
+    root = interner.intern(schema)
+
+    # count the places each subschema will be written out, top-down:
+    # a parent always has a higher id than its children
+    uses = [0] * len(interner.schemas)
+    uses[root] = 1
+    shared = set()
+    for schema_id in range(root, -1, -1):
+        if not uses[schema_id]:
+            continue
+        children = interner.children[schema_id]
+        if uses[schema_id] > 1 and children and schema_id != root:
+            shared.add(schema_id)
+            weight = 1
+        else:
+            weight = uses[schema_id]
+        for child in children:
+            uses[child] += weight
+
+    existing = schema.get(keyword)
+    if shared and existing is not None and not isinstance(existing, dict):
+        # no room to add definitions
+        return dict(schema)
+    names = _name_definitions(interner, sorted(shared), existing or {})
+
+    # build the output bottom-up
+    outputs = [None] * len(interner.schemas)
+    for schema_id in range(root + 1):
+        if uses[schema_id]:
+            outputs[schema_id] = _rebuild(
+                interner, schema_id, outputs, names, keyword)
+
+    result = outputs[root]
+    if names:
+        definitions = dict(existing or ())
+        for schema_id, name in names.items():
+            definitions[name] = outputs[schema_id]
+        result[keyword] = definitions
+    return result
+
+
+class _Interner:
+
+    def __init__(self):
+        self.ids = {}
+        # by id: the first subschema seen, its child ids and its name
+        self.schemas = []
+        self.children = []
+        self.names = []
+        # ids of subschemas by object id, since cached fragments are
+        # shared; the objects are kept alive by ``schemas`` and the root
+        self._object_ids = {}
+
+    def intern(self, schema):
+        """
+        intern ``schema`` and everything under it, without recursing,
+        and return its id
+        """
+        stack = [(schema, None, False)]
+        while stack:
+            subschema, name, ready = stack.pop()
+            if id(subschema) in self._object_ids:
+                continue
+            if not ready:
+                stack.append((subschema, name, True))
+                stack.extend(
+                    (child, child_name, False) for child_name, child
+                    in reversed(list(_child_schemas(subschema))))
+                continue
+
+            child_ids = tuple(self._object_ids[id(child)]
+                              for _, child in _child_schemas(subschema))
+            key = self._key(subschema, child_ids)
+            schema_id = self.ids.get(key)
+            if schema_id is None:
+                schema_id = self.ids[key] = len(self.schemas)
+                self.schemas.append(subschema)
+                self.children.append(child_ids)
+                self.names.append(name)
+            self._object_ids[id(subschema)] = schema_id
+        return self._object_ids[id(schema)]
+
+    @staticmethod
+    def _key(schema, child_ids):
+        parts = []
+        for keyword, value in sorted(schema.items()):
+            if _is_schema_keyword(keyword, value):
+                if isinstance(value, dict) and \
+                        keyword != 'additionalProperties':
+                    value = tuple(value)
+                elif isinstance(value, list):
+                    value = len(value)
+                else:
+                    value = None
+                parts.append((keyword, value))
+            else:
+                parts.append((keyword, json.dumps(value, sort_keys=True)))
+        return (tuple(parts), child_ids)
+
+
+def _is_schema_keyword(keyword, value):
+    if keyword in ('properties', 'patternProperties'):
+        return isinstance(value, dict) and all(
+            isinstance(subschema, dict) for subschema in value.values())
+    if keyword in ('items', 'anyOf') and isinstance(value, list):
+        return all(isinstance(subschema, dict) for subschema in value)
+    return keyword in ('additionalProperties', 'items') and \
+        isinstance(value, dict)
+
+
+def _child_schemas(schema):
+    """ ``(name, subschema)`` for every subschema, in a fixed order """
+    for keyword, value in sorted(schema.items()):
+        if not _is_schema_keyword(keyword, value):
+            continue
+        if isinstance(value, list):
+            for subschema in value:
+                yield keyword, subschema
+        elif keyword == 'additionalProperties' or keyword == 'items':
+            yield keyword, value
+        else:
+            yield from value.items()
+
+
+def _name_definitions(interner, schema_ids, existing):
+    taken = set(existing)
+    names = {}
+    for schema_id in schema_ids:
+        base = _INVALID_NAME_CHARS.sub(
+            '_', interner.names[schema_id] or '').strip('_') or 'schema'
+        name = base
+        suffix = 1
+        while name in taken:
+            suffix += 1
+            name = '%s%d' % (base, suffix)
+        taken.add(name)
+        names[schema_id] = name
+    return names
+
+
+def _rebuild(interner, schema_id, outputs, names, keyword):
+    schema = interner.schemas[schema_id]
+    children = iter(interner.children[schema_id])
+
+    def output(child_id):
+        if child_id in names:
+            return {'$ref': '#/%s/%s' % (keyword, names[child_id])}
+        return outputs[child_id]
+
+    result = {}
+    for key, value in schema.items():
+        if not _is_schema_keyword(key, value):
+            result[key] = value
+    # children come out in the same order ``_child_schemas`` gives them
+    for key, value in sorted(schema.items()):
+        if not _is_schema_keyword(key, value):
+            continue
+        if isinstance(value, list):
+            result[key] = [output(next(children)) for _ in value]
+        elif key == 'additionalProperties' or key == 'items':
+            result[key] = output(next(children))
+        else:
+            result[key] = {name: output(next(children)) for name in value}
+    return {key: result[key] for key in schema}
@@ -0,0 +1,72 @@
+"""
+Structural fingerprints for objects, used by ``SchemaBuilder`` to skip
+objects whose shape it has already accommodated.
+"""
+from collections import OrderedDict, namedtuple
+
+# types that fingerprint to themselves
+SCALAR_TYPES = frozenset([type(None), bool, int, float, str])
+
+ShapeCacheInfo = namedtuple(
+    'ShapeCacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+def fingerprint(obj):
+    """
+    Return a hashable description of an object's structure: the keys
+    and the type of every value at every level, with array items kept
+    in their positions. It is a flat tuple listing the object's values
+    in pre-order, each container followed by its keys or length, so
+    that it can be built, hashed and compared at any depth.
+    """
+    shape = []
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        shape.append(type(obj))
+        if isinstance(obj, dict):
+            shape.append(tuple(obj))
+            values = list(obj.values())
+        elif isinstance(obj, list):
+            shape.append(len(obj))
+            values = obj
+        else:
+            continue
+        types = tuple(map(type, values))
+        if SCALAR_TYPES.issuperset(types):
+            shape.extend(types)
+        else:
+            stack.extend(reversed(values))
+    return tuple(shape)
+
+
+class ShapeCache:
+    """
+    bounded LRU set of fingerprints, with hit and miss counters
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._shapes = OrderedDict()
+
+    def __contains__(self, shape):
+        if shape in self._shapes:
+            self._shapes.move_to_end(shape)
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def add(self, shape):
+        self._shapes[shape] = None
+        if len(self._shapes) > self.maxsize:
+            self._shapes.popitem(last=False)
+
+    def clear(self):
+        self._shapes.clear()
+
+    def info(self):
+        return ShapeCacheInfo(
+            self.hits, self.misses, self.maxsize, len(self._shapes))
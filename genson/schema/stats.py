@@ -0,0 +1,170 @@
+"""
+Opt-in counters for finding where schema inference spends its time.
+A profiled builder uses a subclass of its node class that records what
+passes through each node, so an unprofiled builder pays nothing.
+"""
+from time import perf_counter
+
+# names for the types of JSON values
+JSON_TYPE_NAMES = {
+    type(None): 'null',
+    bool: 'boolean',
+    int: 'integer',
+    float: 'number',
+    str: 'string',
+    list: 'array',
+    dict: 'object',
+}
+
+
+class NodeStats:
+    """
+    Counters for one schema node:
+
+    * ``values``: objects added to the node. Objects skipped by the
+      shape cache or by array sampling never reach it. Arrays of plain
+      scalars are added item by item, rather than one item of each
+      type as they would be without profiling, so that every item is
+      counted.
+    * ``types``: ``values`` broken down by type
+    * ``fallbacks``: objects whose strategy couldn't be found in the
+      node class's dispatch table, so the strategies were scanned
+    * ``seconds``: time spent adding objects to the node, including
+      the nested calls that add their parts to child nodes
+    """
+    __slots__ = ('values', 'types', 'fallbacks', 'seconds')
+
+    def __init__(self):
+        self.values = 0
+        self.types = {}
+        self.fallbacks = 0
+        self.seconds = 0.0
+
+    def update(self, other):
+        self.values += other.values
+        for object_type, count in other.types.items():
+            self.types[object_type] = self.types.get(object_type, 0) + count
+        self.fallbacks += other.fallbacks
+        self.seconds += other.seconds
+
+    def to_dict(self):
+        types = {}
+        for object_type, count in self.types.items():
+            name = JSON_TYPE_NAMES.get(object_type, object_type.__name__)
+            types[name] = types.get(name, 0) + count
+        return {
+            'values': self.values,
+            'types': types,
+            'fallbacks': self.fallbacks,
+            'seconds': self.seconds,
+        }
+
+
+class ProfiledNode:
+    """
+    Mixin that records ``NodeStats`` for a ``SchemaNode`` class. Use
+    ``profiled_node_class`` to combine them.
+    """
+    __slots__ = ()
+    _PROFILED = True
+
+    @classmethod
+    def _build_object_dispatch(cls):
+        super()._build_object_dispatch()
+        # count every item of an array, not one of each type
+        cls._SUMMARIZE_SCALARS = False
+
+    def __init__(self):
+        super().__init__()
+        self._stats = NodeStats()
+
+    def add_object(self, obj):
+        stats = self._stats
+        stats.values += 1
+        object_type = type(obj)
+        stats.types[object_type] = stats.types.get(object_type, 0) + 1
+        start = perf_counter()
+        try:
+            return super().add_object(obj)
+        finally:
+            stats.seconds += perf_counter() - start
+
+    def add_objects(self, objs):
+        objs = list(objs)
+        stats = self._stats
+        stats.values += len(objs)
+        types = stats.types
+        for obj in objs:
+            types[type(obj)] = types.get(type(obj), 0) + 1
+        start = perf_counter()
+        try:
+            return super().add_objects(objs)
+        finally:
+            stats.seconds += perf_counter() - start
+
+    def merge(self, other):
+        if isinstance(other, ProfiledNode):
+            self._stats.update(other._stats)
+        return super().merge(other)
+
+    def _get_strategy_for_object(self, obj):
+        dispatch = self._OBJECT_DISPATCH
+        if dispatch is None or type(obj) not in dispatch:
+            self._stats.fallbacks += 1
+        return super()._get_strategy_for_object(obj)
+
+
+def profiled_node_class(node_class, qualname):
+    """
+    Make a subclass of ``node_class`` that records ``NodeStats``.
+
+    :param qualname: where the class can be found for pickle
+    """
+    return type('Profiled%s' % node_class.__name__,
+                (ProfiledNode, node_class), {
+                    '__slots__': ('_stats',),
+                    '__module__': node_class.__module__,
+                    '__qualname__': qualname})
+
+
+def collect_stats(root_node):
+    """
+    Return a ``dict`` mapping the JSON pointer of every profiled node
+    (relative to the root schema) to its ``NodeStats.to_dict()``.
+    """
+    stats = {}
+    nodes = [('#', root_node)]
+    while nodes:
+        pointer, node = nodes.pop()
+        if isinstance(node, ProfiledNode):
+            stats[pointer] = node._stats.to_dict()
+        for strategy in node._active_strategies:
+            for path, child in reversed(strategy.named_child_nodes()):
+                nodes.append(('/'.join([pointer] + [
+                    key.replace('~', '~0').replace('/', '~1')
+                    for key in path]), child))
+    return stats
+
+
+def format_stats(stats):
+    """
+    Lay out the result of ``collect_stats`` as a table, busiest nodes
+    first.
+    """
+    rows = [('seconds', 'values', 'fallbacks', 'types', 'path')]
+    for pointer, node_stats in sorted(
+            stats.items(), key=lambda item: (-item[1]['values'], item[0])):
+        rows.append((
+            '%.6f' % node_stats['seconds'],
+            str(node_stats['values']),
+            str(node_stats['fallbacks']),
+            ','.join('%s:%d' % item
+                     for item in sorted(node_stats['types'].items())) or '-',
+            pointer))
+
+    widths = [max(len(row[i]) for row in rows) for i in range(4)]
+    return ''.join(
+        '  '.join([cell.rjust(width)
+                   for cell, width in zip(row[:3], widths)]
+                  + [row[3].ljust(widths[3]), row[4]]) + '\n'
+        for row in rows)
@@ -1,3 +1,4 @@
+from ..shapes import SCALAR_TYPES
 from .base import SchemaStrategy
 
 
@@ -5,12 +6,17 @@ class BaseArray(SchemaStrategy):
     """
     abstract array schema strategy
     """
+    __slots__ = ()
     KEYWORDS = ('type', 'items')
 
     @staticmethod
     def match_object(obj):
         return isinstance(obj, list)
 
+    @staticmethod
+    def _match_object_type(object_type):
+        return issubclass(object_type, list)
+
     def to_schema(self):
         schema = super().to_schema()
         schema['type'] = 'array'
@@ -23,7 +29,20 @@ class List(BaseArray):
     """
     strategy for list-style array schemas. This is the default
     strategy for arrays.
+
+    An array of nothing but plain scalars is added as one item of each
+    type, in order of first appearance, since the built-in strategies
+    only look at their types. This is skipped if the node class can't
+    dispatch on type alone, a strategy sets ``INSPECTS_VALUES``, or a
+    strategy for scalars has its own ``add_object`` or ``add_objects``.
+
+    Arrays longer than the node class's ``ARRAY_SAMPLE_SIZE`` are
+    sampled: that many items from the start are added, then about as
+    many again at an even stride through the rest, plus the first item
+    of every type that the sample missed.
     """
+    __slots__ = ('_items', '_sampled')
+
     @staticmethod
     def match_schema(schema):
         return schema.get('type') == 'array' \
@@ -32,6 +51,7 @@ class List(BaseArray):
     def __init__(self, node_class):
         super().__init__(node_class)
         self._items = node_class()
+        self._sampled = False
 
     def add_schema(self, schema):
         super().add_schema(schema)
@@ -39,9 +59,61 @@ class List(BaseArray):
             self._items.add_schema(schema['items'])
 
     def add_object(self, obj):
-        for item in obj:
+        for item in self._items_to_add(obj):
             self._items.add_object(item)
 
+    def add_objects(self, objs):
+        if self._overrides('add_object', List):
+            super().add_objects(objs)
+        else:
+            self._items.add_objects(
+                [item for obj in objs for item in self._items_to_add(obj)])
+
+    def merge(self, other):
+        super().merge(other)
+        self._items.merge(other._items)
+        self._sampled = self._sampled or other._sampled
+
+    def child_nodes(self):
+        return (self._items,)
+
+    def named_child_nodes(self):
+        return [(('items',), self._items)]
+
+    def is_sampled(self):
+        return self._sampled
+
+    def _items_to_add(self, obj):
+        if self.node_class._SUMMARIZE_SCALARS and obj:
+            types = set(map(type, obj))
+            if SCALAR_TYPES.issuperset(types):
+                if len(types) == 1:
+                    return obj[:1]
+                # the last item of each type, keyed in order of first
+                # appearance, without leaving C
+                return list(dict(zip(map(type, obj), obj)).values())
+        return self._sample(obj)
+
+    def _sample(self, obj):
+        size = self.node_class.ARRAY_SAMPLE_SIZE
+        if size is None or len(obj) <= 2 * size:
+            return obj
+
+        rest = obj[size:]
+        stride = -(-len(rest) // size)
+        sample = obj[:size] + rest[::stride]
+        self._sampled = True
+
+        # checking the types of the rest is much cheaper than adding them
+        missing = set(map(type, rest)) - set(map(type, sample))
+        for item in rest:
+            if not missing:
+                break
+            if type(item) in missing:
+                missing.discard(type(item))
+                sample.append(item)
+        return sample
+
     def items_to_schema(self):
         return self._items.to_schema()
 
@@ -51,6 +123,8 @@ class Tuple(BaseArray):
     strategy for tuple-style array schemas. These will always have
     an items key to preserve the fact that it's a tuple.
     """
+    __slots__ = ('_items',)
+
     @staticmethod
     def match_schema(schema):
         return schema.get('type') == 'array' \
@@ -68,6 +142,31 @@ class Tuple(BaseArray):
     def add_object(self, obj):
         self._add(obj, 'add_object')
 
+    def add_objects(self, objs):
+        if self._overrides('add_object', Tuple):
+            super().add_objects(objs)
+            return
+
+        # transpose the batch into one column per position
+        columns = []
+        for obj in objs:
+            while len(columns) < len(obj):
+                columns.append([])
+            for column, item in zip(columns, obj):
+                column.append(item)
+        self._add(columns, 'add_objects')
+
+    def merge(self, other):
+        super().merge(other)
+        self._add(other._items, 'merge')
+
+    def child_nodes(self):
+        return self._items
+
+    def named_child_nodes(self):
+        return [(('items', str(i)), node)
+                for i, node in enumerate(self._items)]
+
     def _add(self, items, func):
         while len(self._items) < len(items):
             self._items.append(self.node_class())
@@ -1,4 +1,5 @@
-from copy import copy
+from functools import lru_cache
+from operator import attrgetter
 from warnings import warn
 
 
@@ -12,10 +13,27 @@ class SchemaStrategy:
     * __init__
     * add_schema
     * add_object
+    * add_objects
+    * merge
+    * child_nodes
+    * named_child_nodes
+    * is_sampled
     * to_schema
     * __eq__
+
+    Set ``INSPECTS_VALUES`` if the generated schema depends on more
+    than the types of scalars and the keys and lengths of objects and
+    arrays (e.g. tracking a minimum). This turns off shortcuts that
+    skip objects with an already-seen structure.
     """
+    __slots__ = ('node_class', '_extra_keywords')
     KEYWORDS = ('type',)
+    INSPECTS_VALUES = False
+
+    # containers that are only created once something goes in them
+    _LAZY_SLOTS = ('_extra_keywords',)
+    # derived values that don't count toward equality
+    _CACHE_SLOTS = ()
 
     @classmethod
     def match_schema(cls, schema):
@@ -25,9 +43,19 @@ class SchemaStrategy:
     def match_object(cls, obj):
         raise NotImplementedError("'match_object' not implemented")
 
+    @classmethod
+    def _match_object_type(cls, object_type):
+        """
+        Answer ``match_object`` for every object of exactly this type,
+        or return ``None`` if matching depends on more than the type.
+        This is only trusted when it is defined by the same class as
+        ``match_object``.
+        """
+        return None
+
     def __init__(self, node_class):
         self.node_class = node_class
-        self._extra_keywords = {}
+        self._extra_keywords = None
 
     def add_schema(self, schema):
         self._add_extra_keywords(schema)
@@ -36,6 +64,8 @@ class SchemaStrategy:
         for keyword, value in schema.items():
             if keyword in self.KEYWORDS:
                 continue
+            elif self._extra_keywords is None:
+                self._extra_keywords = {keyword: value}
             elif keyword not in self._extra_keywords:
                 self._extra_keywords[keyword] = value
             elif self._extra_keywords[keyword] != value:
@@ -46,13 +76,101 @@ class SchemaStrategy:
     def add_object(self, obj):
         pass
 
+    def add_objects(self, objs):
+        """
+        Add a batch of objects that were all matched to this strategy.
+        Subclasses can override this to handle the batch as a whole,
+        but they should fall back to this when ``add_object`` has been
+        overridden further down (see ``_overrides``).
+        """
+        if self._overrides('add_object', SchemaStrategy):
+            for obj in objs:
+                self.add_object(obj)
+
+    def _overrides(self, name, cls):
+        """
+        check whether this instance's class overrides a method defined
+        by ``cls``
+        """
+        return getattr(type(self), name) is not getattr(cls, name)
+
+    def merge(self, other):
+        """
+        Merge in the state of another instance of the same strategy
+        class. Subclasses that keep extra state must override this to
+        combine it.
+        """
+        if other._extra_keywords:
+            self._add_extra_keywords(other._extra_keywords)
+
+    def child_nodes(self):
+        """
+        the ``SchemaNode``s nested under this strategy, for walking the
+        schema tree
+        """
+        return ()
+
+    def named_child_nodes(self):
+        """
+        ``(path, node)`` pairs for ``child_nodes``, where ``path`` is a
+        tuple of the keys that lead to the node's schema within this
+        strategy's schema
+        """
+        return [((str(i),), node)
+                for i, node in enumerate(self.child_nodes())]
+
+    def is_sampled(self):
+        """
+        whether this strategy skipped some of the objects it was given
+        (not counting its child nodes)
+        """
+        return False
+
     def to_schema(self):
-        return copy(self._extra_keywords)
+        return dict(self._extra_keywords) if self._extra_keywords else {}
 
     def __eq__(self, other):
         """ Required for SchemaBuilder.__eq__ to work properly """
         return (isinstance(other, self.__class__)
-                and self.__dict__ == other.__dict__)
+                and self._state() == other._state())
+
+    def __getstate__(self):
+        # ``node_class`` is left for the owning node to restore (see
+        # ``_set_node_class``), and caches are rebuilt as needed
+        return (_pickled_slot_getter(type(self))(self),
+                getattr(self, '__dict__', None) or None)
+
+    def __setstate__(self, state):
+        values, attrs = state
+        for name, value in zip(_pickled_slot_names(type(self)), values):
+            setattr(self, name, value)
+        for name in self._CACHE_SLOTS:
+            setattr(self, name, None)
+        if attrs:
+            self.__dict__.update(attrs)
+
+    def _set_node_class(self, node_class):
+        """
+        called by the ``SchemaNode`` that owns this strategy once it has
+        been unpickled
+        """
+        self.node_class = node_class
+
+    def _state(self):
+        """
+        all instance variables (from slots and any ``__dict__``), with
+        caches left out, and lazy containers left out until they have
+        something in them
+        """
+        state = {}
+        for name in _slot_names(type(self)):
+            if name in self._CACHE_SLOTS:
+                continue
+            value = getattr(self, name, None)
+            if value or name not in self._LAZY_SLOTS:
+                state[name] = value
+        state.update(getattr(self, '__dict__', ()))
+        return state
 
 
 class TypedSchemaStrategy(SchemaStrategy):
@@ -63,6 +181,7 @@ class TypedSchemaStrategy(SchemaStrategy):
     * `JS_TYPE`: a valid value of the `type` keyword
     * `PYTHON_TYPE`: Python type objects - can be a tuple of types
     """
+    __slots__ = ()
 
     @classmethod
     def match_schema(cls, schema):
@@ -72,7 +191,39 @@ class TypedSchemaStrategy(SchemaStrategy):
     def match_object(cls, obj):
         return isinstance(obj, cls.PYTHON_TYPE)
 
+    @classmethod
+    def _match_object_type(cls, object_type):
+        return issubclass(object_type, cls.PYTHON_TYPE)
+
     def to_schema(self):
         schema = super().to_schema()
         schema['type'] = self.JS_TYPE
         return schema
+
+
+@lru_cache(maxsize=None)
+def _slot_names(cls):
+    names = []
+    for klass in reversed(cls.__mro__):
+        slots = vars(klass).get('__slots__', ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        names.extend(name for name in slots
+                     if name not in ('__dict__', '__weakref__'))
+    return tuple(names)
+
+
+@lru_cache(maxsize=None)
+def _pickled_slot_names(cls):
+    return tuple(name for name in _slot_names(cls)
+                 if name != 'node_class' and name not in cls._CACHE_SLOTS)
+
+
+@lru_cache(maxsize=None)
+def _pickled_slot_getter(cls):
+    """ a function that returns a tuple of the pickled slot values """
+    names = _pickled_slot_names(cls)
+    if len(names) == 1:
+        getter = attrgetter(names[0])
+        return lambda strategy: (getter(strategy),)
+    return attrgetter(*names)
@@ -1,5 +1,5 @@
+import re
 from collections import defaultdict
-from re import search
 from .base import SchemaStrategy
 
 
@@ -7,7 +7,23 @@ class Object(SchemaStrategy):
     """
     object schema strategy
     """
+    __slots__ = ('_properties', '_pattern_properties', '_required',
+                 '_include_empty_required', '_additional_properties',
+                 '_pattern_matcher')
     KEYWORDS = ('type', 'properties', 'patternProperties', 'required')
+    _LAZY_SLOTS = ('_extra_keywords', '_pattern_properties',
+                   '_additional_properties')
+    _CACHE_SLOTS = ('_pattern_matcher',)
+
+    # when properties are collapsed into a map, these are tried in order
+    # for a pattern that matches every key
+    MAP_KEY_PATTERNS = (
+        r'^[0-9]+$',
+        r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-'
+        r'[0-9a-fA-F]{12}$',
+        r'^[0-9]{4}-[0-9]{2}-[0-9]{2}',
+        r'^[0-9a-fA-F]{8,}$',
+    )
 
     @staticmethod
     def match_schema(schema):
@@ -17,13 +33,19 @@ class Object(SchemaStrategy):
     def match_object(obj):
         return isinstance(obj, dict)
 
+    @staticmethod
+    def _match_object_type(object_type):
+        return issubclass(object_type, dict)
+
     def __init__(self, node_class):
         super().__init__(node_class)
 
         self._properties = defaultdict(node_class)
-        self._pattern_properties = defaultdict(node_class)
+        self._pattern_properties = None
         self._required = None
         self._include_empty_required = False
+        self._additional_properties = None
+        self._pattern_matcher = None
 
     def add_schema(self, schema):
         super().add_schema(schema)
@@ -33,8 +55,10 @@ class Object(SchemaStrategy):
                 if subschema is not None:
                     subnode.add_schema(subschema)
         if 'patternProperties' in schema:
+            if self._pattern_properties is None:
+                self._pattern_properties = defaultdict(self.node_class)
             for pattern, subschema in schema['patternProperties'].items():
-                subnode = self._pattern_properties[pattern]
+                subnode = self._get_pattern_subnode(pattern)
                 if subschema is not None:
                     subnode.add_schema(subschema)
         if 'required' in schema:
@@ -45,37 +69,234 @@ class Object(SchemaStrategy):
                 self._required = required
             else:
                 self._required &= required
+        self._absorb_additional_properties()
+        self._check_map_threshold()
 
     def add_object(self, obj):
         properties = set()
         for prop, subobj in obj.items():
-            pattern = None
+            self._get_subnode(prop, properties).add_object(subobj)
+        self._update_required(properties)
+        self._check_map_threshold()
 
-            if prop not in self._properties:
-                pattern = self._matching_pattern(prop)
+    def add_objects(self, objs):
+        if self._overrides('add_object', Object) or \
+                self.node_class.MAP_THRESHOLD is not None:
+            # the threshold has to be checked after every object, since
+            # a collapse changes where later properties go
+            super().add_objects(objs)
+            return
+
+        # transpose the batch into one column per property
+        columns = {}
+        for obj in objs:
+            for prop, subobj in obj.items():
+                column = columns.get(prop)
+                if column is None:
+                    column = columns[prop] = []
+                column.append(subobj)
 
-            if pattern is not None:
-                self._pattern_properties[pattern].add_object(subobj)
+        properties = set()
+        shared_props = {}
+        for prop, column in columns.items():
+            subnode = self._get_subnode(prop, properties)
+            if prop in properties:
+                subnode.add_objects(column)
             else:
-                properties.add(prop)
-                self._properties[prop].add_object(subobj)
+                shared_props[prop] = subnode
+
+        # pattern and additional properties share nodes, so keep their
+        # values in the order they were seen
+        if shared_props:
+            shared_columns = {}
+            for obj in objs:
+                for prop, subobj in obj.items():
+                    subnode = shared_props.get(prop)
+                    if subnode is not None:
+                        shared_columns.setdefault(
+                            id(subnode), (subnode, []))[1].append(subobj)
+            for subnode, column in shared_columns.values():
+                subnode.add_objects(column)
+
+        # a property is required if every object in the batch has it
+        self._update_required(set(
+            prop for prop in properties if len(columns[prop]) == len(objs)))
+        self._check_map_threshold()
+
+    def _get_subnode(self, prop, properties):
+        """
+        find the node for a property, recording it in ``properties`` if
+        it isn't a pattern or additional property
+        """
+        if prop not in self._properties:
+            if self._pattern_properties:
+                pattern = self._matching_pattern(prop)
+                if pattern is not None:
+                    return self._pattern_properties[pattern]
+            if self._additional_properties is not None:
+                return self._additional_properties
+
+        properties.add(prop)
+        return self._properties[prop]
 
+    def _update_required(self, properties):
         if self._required is None:
             self._required = properties
         else:
             self._required &= properties
 
+    def merge(self, other):
+        # properties are merged by key, not routed through this node's
+        # patterns like added objects are, so that merging is associative
+        super().merge(other)
+        if other._pattern_properties:
+            if self._pattern_properties is None:
+                self._pattern_properties = defaultdict(self.node_class)
+            for pattern in other._pattern_properties:
+                self._get_pattern_subnode(pattern)
+        if other._additional_properties is not None:
+            self._get_additional_subnode()
+        # if the other is a map, fold in this one's properties before its
+        # values, so they keep the order they were seen in
+        self._check_map_threshold()
+
+        if other._pattern_properties:
+            for pattern, subnode in other._pattern_properties.items():
+                self._pattern_properties[pattern].merge(subnode)
+        if other._additional_properties is not None:
+            self._additional_properties.merge(other._additional_properties)
+        for prop, subnode in other._properties.items():
+            self._properties[prop].merge(subnode)
+
+        if other._include_empty_required:
+            self._include_empty_required = True
+        if other._required is not None:
+            self._update_required(set(other._required))
+        self._absorb_additional_properties()
+        self._check_map_threshold()
+
+    def child_nodes(self):
+        nodes = list(self._properties.values())
+        if self._pattern_properties:
+            nodes.extend(self._pattern_properties.values())
+        if self._additional_properties is not None:
+            nodes.append(self._additional_properties)
+        return nodes
+
+    def named_child_nodes(self):
+        nodes = [(('properties', prop), node)
+                 for prop, node in self._properties.items()]
+        if self._pattern_properties:
+            nodes.extend((('patternProperties', pattern), node)
+                         for pattern, node in self._pattern_properties.items())
+        if self._additional_properties is not None:
+            nodes.append((('additionalProperties',),
+                          self._additional_properties))
+        return nodes
+
+    def __getstate__(self):
+        # the defaultdicts are rebuilt by ``_set_node_class``
+        values, attrs = super().__getstate__()
+        values = tuple(dict(value) if isinstance(value, defaultdict)
+                       else value for value in values)
+        return (values, attrs)
+
+    def _set_node_class(self, node_class):
+        super()._set_node_class(node_class)
+        self._properties = defaultdict(node_class, self._properties)
+        if self._pattern_properties is not None:
+            self._pattern_properties = defaultdict(
+                node_class, self._pattern_properties)
+
+    def _get_pattern_subnode(self, pattern):
+        if pattern not in self._pattern_properties:
+            # the patterns have changed, so rebuild the matcher
+            self._pattern_matcher = None
+        return self._pattern_properties[pattern]
+
     def _matching_pattern(self, prop):
-        for pattern in self._pattern_properties.keys():
-            if search(pattern, prop):
-                return pattern
+        if self._pattern_matcher is None:
+            self._pattern_matcher = PatternMatcher(self._pattern_properties)
+        return self._pattern_matcher.match(prop)
 
-    def _add(self, items, func):
-        while len(self._items) < len(items):
-            self._items.append(self._schema_node_class())
+    def _check_map_threshold(self):
+        """
+        Treat this object as a map once it has too many properties,
+        collapsing them into a ``patternProperties`` node if all of the
+        keys fit one of the ``MAP_KEY_PATTERNS``, or else into an
+        ``additionalProperties`` node. Once it's a map, properties that
+        a merge brings in are folded into the map's node.
+        """
+        threshold = self.node_class.MAP_THRESHOLD
+        if threshold is None or not self._properties:
+            return
+        if len(self._properties) <= threshold:
+            self._fold_into_map()
+            return
 
-        for subschema, item in zip(self._items, items):
-            getattr(subschema, func)(item)
+        for pattern in self.MAP_KEY_PATTERNS:
+            regex = re.compile(pattern)
+            if all(regex.search(prop) for prop in self._properties):
+                break
+        else:
+            pattern = None
+        self._collapse(pattern)
+
+    def _fold_into_map(self):
+        """
+        move properties into the node of a map that this object has
+        already been collapsed into: all of them if it has an
+        ``additionalProperties`` node, or else the ones that fit one of
+        its ``MAP_KEY_PATTERNS``
+        """
+        if self._additional_properties is not None:
+            self._collapse(None)
+            return
+        if not self._pattern_properties:
+            return
+        for pattern in self.MAP_KEY_PATTERNS:
+            if pattern not in self._pattern_properties:
+                continue
+            regex = re.compile(pattern)
+            props = [prop for prop in self._properties if regex.search(prop)]
+            if props:
+                self._collapse(pattern, props)
+
+    def _collapse(self, pattern, props=None):
+        """
+        merge ``props`` (by default, all properties) into the node for
+        ``pattern``, or the ``additionalProperties`` node if it's ``None``
+        """
+        if pattern is not None:
+            if self._pattern_properties is None:
+                self._pattern_properties = defaultdict(self.node_class)
+            target = self._get_pattern_subnode(pattern)
+        else:
+            target = self._get_additional_subnode()
+
+        if props is None:
+            props = list(self._properties)
+        for prop in props:
+            target.merge(self._properties.pop(prop))
+        if self._required:
+            self._required -= set(props)
+
+    def _get_additional_subnode(self):
+        if self._additional_properties is None:
+            self._additional_properties = self.node_class()
+            self._absorb_additional_properties()
+        return self._additional_properties
+
+    def _absorb_additional_properties(self):
+        """
+        once there's an ``additionalProperties`` node, move any seeded
+        ``additionalProperties`` schema into it
+        """
+        if self._additional_properties is not None and self._extra_keywords:
+            schema = self._extra_keywords.get('additionalProperties')
+            if isinstance(schema, dict):
+                del self._extra_keywords['additionalProperties']
+                self._additional_properties.add_schema(schema)
 
     def to_schema(self):
         schema = super().to_schema()
@@ -86,6 +307,9 @@ class Object(SchemaStrategy):
         if self._pattern_properties:
             schema['patternProperties'] = self._properties_to_schema(
                 self._pattern_properties)
+        if self._additional_properties is not None:
+            schema['additionalProperties'] = \
+                self._additional_properties.to_schema()
         if self._required or self._include_empty_required:
             schema['required'] = sorted(self._required)
         return schema
@@ -95,3 +319,84 @@ class Object(SchemaStrategy):
         for prop, schema_node in properties.items():
             schema_properties[prop] = schema_node.to_schema()
         return schema_properties
+
+
+class PatternMatcher:
+    """
+    Find the first of several regex patterns that ``re.search`` would
+    match in a string. The patterns are compiled once, and runs of
+    anchored patterns are combined into a single regex so they're all
+    tested in one pass. Results are remembered for the most recent
+    strings.
+    """
+    __slots__ = ('_patterns', '_segments', '_memo')
+    MEMO_SIZE = 4096
+
+    def __init__(self, patterns):
+        self._patterns = tuple(patterns)
+        self._segments = self._compile(self._patterns)
+        self._memo = {}
+
+    @classmethod
+    def _compile(cls, patterns):
+        """
+        Return a list of ``(regex, patterns)`` pairs to try in order. A
+        regex for several patterns matches at the start of the string
+        and captures in group ``i + 1`` when pattern ``i`` matches.
+        """
+        segments = []
+        run = []
+        for pattern in patterns:
+            compiled = re.compile(pattern)
+            if cls._combinable(compiled):
+                run.append(pattern)
+                continue
+            cls._add_run(segments, run)
+            run = []
+            segments.append((compiled, (pattern,)))
+        cls._add_run(segments, run)
+        return segments
+
+    @staticmethod
+    def _combinable(compiled):
+        # it has to be anchored, or finding it takes a scan per pattern,
+        # and it can't have groups or flags that would leak into others
+        return (compiled.pattern.startswith(('^', r'\A'))
+                and '|' not in compiled.pattern
+                and not compiled.groups
+                and compiled.flags == re.UNICODE)
+
+    @staticmethod
+    def _add_run(segments, run):
+        if len(run) > 1:
+            regex = re.compile('|'.join('(?=(%s))' % p for p in run))
+            segments.append((regex, tuple(run)))
+        elif run:
+            segments.append((re.compile(run[0]), tuple(run)))
+
+    def match(self, string):
+        try:
+            return self._memo[string]
+        except KeyError:
+            pass
+
+        pattern = None
+        for regex, patterns in self._segments:
+            if len(patterns) == 1:
+                if regex.search(string):
+                    pattern = patterns[0]
+                    break
+            else:
+                m = regex.match(string)
+                if m:
+                    pattern = patterns[m.lastindex - 1]
+                    break
+
+        if len(self._memo) >= self.MEMO_SIZE:
+            del self._memo[next(iter(self._memo))]
+        self._memo[string] = pattern
+        return pattern
+
+    def __reduce__(self):
+        # the compiled patterns and memo are rebuilt rather than pickled
+        return (type(self), (self._patterns,))
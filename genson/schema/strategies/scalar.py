@@ -7,6 +7,7 @@ class Typeless(SchemaStrategy):
     there is no other active strategy, and it will be merged into the
     first typed strategy that gets added.
     """
+    __slots__ = ()
 
     @classmethod
     def match_schema(cls, schema):
@@ -16,11 +17,16 @@ class Typeless(SchemaStrategy):
     def match_object(cls, obj):
         return False
 
+    @classmethod
+    def _match_object_type(cls, object_type):
+        return False
+
 
 class Null(TypedSchemaStrategy):
     """
     strategy for null schemas
     """
+    __slots__ = ()
     JS_TYPE = 'null'
     PYTHON_TYPE = type(None)
 
@@ -29,6 +35,7 @@ class Boolean(TypedSchemaStrategy):
     """
     strategy for boolean schemas
     """
+    __slots__ = ()
     JS_TYPE = 'boolean'
     PYTHON_TYPE = bool
 
@@ -37,6 +44,7 @@ class String(TypedSchemaStrategy):
     """
     strategy for string schemas - works for ascii and unicode strings
     """
+    __slots__ = ()
     JS_TYPE = 'string'
     PYTHON_TYPE = str
 
@@ -47,6 +55,7 @@ class Number(SchemaStrategy):
     converts from `integer` to `number` when a float object or a
     number schema is added
     """
+    __slots__ = ('_type',)
     JS_TYPES = ('integer', 'number')
     PYTHON_TYPES = (int, float)
 
@@ -59,6 +68,10 @@ class Number(SchemaStrategy):
         # cannot use isinstance() because boolean is a subtype of int
         return type(obj) in cls.PYTHON_TYPES
 
+    @classmethod
+    def _match_object_type(cls, object_type):
+        return object_type in cls.PYTHON_TYPES
+
     def __init__(self, node_class):
         super().__init__(node_class)
         self._type = 'integer'
@@ -73,6 +86,18 @@ class Number(SchemaStrategy):
         if isinstance(obj, float):
             self._type = 'number'
 
+    def add_objects(self, objs):
+        if self._overrides('add_object', Number):
+            super().add_objects(objs)
+        elif self._type != 'number' and \
+                any(isinstance(obj, float) for obj in objs):
+            self._type = 'number'
+
+    def merge(self, other):
+        super().merge(other)
+        if other._type == 'number':
+            self._type = 'number'
+
     def to_schema(self):
         schema = super().to_schema()
         schema['type'] = self._type
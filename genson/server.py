@@ -0,0 +1,410 @@
+"""
+A long-running ``genson`` process that keeps builders warm between
+requests, so callers don't pay for starting Python on every run.
+
+Requests and responses are single lines of JSON sent over a Unix domain
+socket or a TCP connection (see ``genson.client`` for the other end).
+Each request has an ``op``:
+
+* ``add``: add ``objects`` and ``schemas`` to the builder called
+  ``builder``, creating it if needed
+* ``snapshot``: return the ``schema`` of ``builder`` (``to_schema``,
+  with ``dedupe`` if given)
+* ``drop``: forget ``builder``
+* ``run``: run the CLI tool with ``argv`` in directory ``cwd`` and return
+  its ``status``, ``stdout`` and ``stderr``. If the tool will read stdin,
+  the server asks for it with a ``{"stdin": true}`` line before running
+  it, and the client answers with ``{"data": ...}``. ``--serve``,
+  ``--checkpoint`` (which unpickles a file) and ``--jobs`` (which forks
+  the threaded server) can't be used here.
+
+Every response has ``ok``, and an ``error`` message if it is false. A
+line that isn't a JSON request gets an error and the connection is
+closed.
+
+The Unix domain socket is only accessible to the server's user. Over
+TCP, the first line on each connection must be ``{"token": ...}`` with
+the token that the server wrote to its token file (see
+``genson.client.default_token_file``), which is also only readable by
+the server's user.
+Connections are served concurrently, but requests are handled one at a
+time, once the server has everything it needs from the client.
+"""
+import hmac
+import io
+import ipaddress
+import json
+import os
+import secrets
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import traceback
+import warnings
+from contextlib import redirect_stderr, redirect_stdout
+from .client import default_token_file
+from .schema.builder import SchemaBuilder
+
+
+class RequestError(Exception):
+    pass
+
+
+class SchemaServer:
+    """
+    The state of a server: its named builders.
+    """
+
+    def __init__(self, builder_class=SchemaBuilder):
+        self.builder_class = builder_class
+        self.builders = {}
+        self._lock = threading.Lock()
+
+    def handle(self, request, channel=None):
+        """
+        Answer a decoded request. ``channel`` is the ``_Channel`` it came
+        in on, for ``run`` requests that read stdin.
+        """
+        try:
+            if not isinstance(request, dict):
+                raise RequestError('request must be a JSON object')
+            op = request.get('op')
+            handler = getattr(self, '_op_%s' % op, None)
+            if handler is None:
+                raise RequestError('unknown op {0!r}'.format(op))
+            # anything that waits on the client is done before taking the
+            # lock, so that a slow client doesn't hold up the others
+            prepare = getattr(self, '_prepare_%s' % op, None)
+            args = prepare(request, channel) if prepare is not None else ()
+            with self._lock:
+                response = handler(request, *args)
+        except Exception as err:
+            return {'ok': False, 'error': '{0}: {1}'.format(
+                type(err).__name__, err)}
+        response['ok'] = True
+        return response
+
+    def _op_add(self, request):
+        name = self._name(request)
+        builder = self.builders.get(name)
+        if builder is None:
+            builder = self.builders[name] = self.builder_class()
+        for schema in request.get('schemas', ()):
+            builder.add_schema(schema)
+        builder.add_objects(request.get('objects', ()))
+        return {}
+
+    def _op_snapshot(self, request):
+        builder = self.builders.get(self._name(request))
+        if builder is None:
+            raise RequestError('no builder called {0!r}'.format(
+                request['builder']))
+        return {'schema': builder.to_schema(bool(request.get('dedupe')))}
+
+    def _op_drop(self, request):
+        self.builders.pop(self._name(request), None)
+        return {}
+
+    def _prepare_run(self, request, channel):
+        argv = request.get('argv', [])
+        if not isinstance(argv, list) or \
+                not all(isinstance(arg, str) for arg in argv):
+            raise RequestError('argv must be a list of strings')
+
+        from .__main__ import parse_argv, reads_stdin
+        args = parse_argv(argv)
+        if args is not None:
+            for option in ('serve', 'checkpoint', 'jobs'):
+                if getattr(args, option) is not None:
+                    raise RequestError(
+                        '--{} can not be used in a run request'.format(option))
+
+        isatty = bool(request.get('stdin_isatty', True))
+        data = b''
+        if args is not None and reads_stdin(args, isatty):
+            data = _fetch_stdin(channel)
+        return argv, _ClientStdin(data, isatty)
+
+    def _op_run(self, request, argv, stdin):
+        status, stdout, stderr = run_cli(
+            argv, request.get('cwd') or os.getcwd(), stdin)
+        return {'status': status, 'stdout': stdout, 'stderr': stderr}
+
+    @staticmethod
+    def _name(request):
+        name = request.get('builder')
+        if not isinstance(name, str):
+            raise RequestError('builder must be a string')
+        return name
+
+
+def run_cli(argv, cwd, stdin):
+    """
+    Run the CLI tool in this process as if it had been started with
+    ``argv`` in ``cwd``, reading ``stdin``, and return ``(status, stdout,
+    stderr)``. This swaps out process-wide state, so it mustn't be
+    called from more than one thread at a time.
+    """
+    from .__main__ import CLI
+
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    saved_stdin = sys.stdin
+    saved_cwd = os.getcwd()
+    status = 0
+    try:
+        os.chdir(cwd)
+        sys.stdin = stdin
+        with redirect_stdout(stdout), redirect_stderr(stderr), \
+                warnings.catch_warnings():
+            # show warnings as a fresh process would, once per run
+            warnings.simplefilter('default')
+            warnings.showwarning = _show_warning
+            try:
+                CLI('genson', argv).run()
+            except SystemExit as err:
+                if isinstance(err.code, int) or err.code is None:
+                    status = err.code or 0
+                else:
+                    sys.stderr.write('%s\n' % err.code)
+                    status = 1
+            except Exception:
+                traceback.print_exc()
+                status = 1
+    finally:
+        sys.stdin = saved_stdin
+        os.chdir(saved_cwd)
+    return status, stdout.getvalue(), stderr.getvalue()
+
+
+def _show_warning(message, category, filename, lineno, file=None,
+                  line=None):
+    sys.stderr.write(warnings.formatwarning(
+        message, category, filename, lineno, line))
+
+
+class _Channel:
+    """
+    one connection, with JSON lines going both ways
+    """
+
+    def __init__(self, rfile, wfile):
+        self.rfile = rfile
+        self.wfile = wfile
+
+    def receive(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        return json.loads(line)
+
+    def send(self, message):
+        self.wfile.write(json.dumps(message).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+
+class _ClientStdin(io.TextIOWrapper):
+    """
+    stdin for a ``run`` request, holding what the client sent
+    """
+
+    def __init__(self, data, isatty):
+        super().__init__(io.BytesIO(data), encoding='utf-8',
+                         errors='surrogateescape')
+        self._isatty = isatty
+
+    def isatty(self):
+        return self._isatty
+
+
+def _fetch_stdin(channel):
+    """ ask the client for all of its stdin """
+    if channel is None:
+        return b''
+    channel.send({'stdin': True})
+    reply = channel.receive() or {}
+    data = reply.get('data') or ''
+    return data.encode('utf-8', 'surrogateescape')
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        channel = _Channel(self.rfile, self.wfile)
+        try:
+            if self.server.token is not None and \
+                    not self._authenticate(channel.receive()):
+                channel.send({'ok': False, 'error': 'invalid token'})
+                return
+            while True:
+                request = channel.receive()
+                if request is None:
+                    return
+                channel.send(
+                    self.server.schema_server.handle(request, channel))
+        except ValueError as err:
+            # not a client (say, an HTTP request from a web page), so
+            # nothing more it sends is trusted
+            channel.send({'ok': False, 'error': 'invalid JSON: %s' % err})
+
+    def _authenticate(self, message):
+        token = message.get('token') if isinstance(message, dict) else None
+        return isinstance(token, str) and hmac.compare_digest(
+            token.encode('utf-8'), self.server.token.encode('utf-8'))
+
+
+class _UnixServer(socketserver.ThreadingMixIn,
+                  socketserver.UnixStreamServer):
+    daemon_threads = True
+    token = None
+
+    def server_bind(self):
+        # create the socket file without access for anyone else
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    token = None
+    token_file = None
+
+    def write_token(self, path=None):
+        """
+        write a new token to ``path`` (by default, the file for this
+        server's port), readable only by this user
+        """
+        if path is None:
+            path = default_token_file(self.server_address[1])
+        self.token = secrets.token_hex(32)
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        # O_EXCL won't follow a symlink planted in the meantime
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'w') as fp:
+            fp.write(self.token + '\n')
+        self.token_file = path
+
+    def server_close(self):
+        super().server_close()
+        if self.token_file is not None:
+            try:
+                os.unlink(self.token_file)
+            except OSError:
+                pass
+
+
+class _TCP6Server(_TCPServer):
+    address_family = socket.AF_INET6
+
+
+def parse_address(address):
+    """
+    Return ``(host, port)`` for an address like ``localhost:8765`` or
+    ``[::1]:8765``, or the address itself for a Unix domain socket path.
+    """
+    host, _, port = address.rpartition(':')
+    if host and port.isdigit() and os.sep not in address:
+        if host.startswith('[') and host.endswith(']'):
+            host = host[1:-1]
+        return (host, int(port))
+    return address
+
+
+def make_server(address, schema_server=None, token_file=None):
+    """
+    Bind a server for ``schema_server`` (a new ``SchemaServer`` by
+    default) to ``address``, a Unix domain socket path or a loopback
+    ``HOST:PORT``. Call ``serve_forever`` on the result to run it.
+
+    A TCP server writes the token that clients must send to
+    ``token_file`` (by default, ``default_token_file(PORT)``), and
+    removes it when closed.
+
+    :raises ValueError: if ``HOST`` isn't a loopback address
+    """
+    address = parse_address(address)
+    if isinstance(address, tuple):
+        family, address = _loopback_address(*address)
+        if family == socket.AF_INET6:
+            server = _TCP6Server(address, _Handler)
+        else:
+            server = _TCPServer(address, _Handler)
+        try:
+            server.write_token(token_file)
+        except OSError:
+            server.server_close()
+            raise
+    else:
+        _remove_stale_socket(address)
+        server = _UnixServer(address, _Handler)
+    server.schema_server = schema_server or SchemaServer()
+    return server
+
+
+def _loopback_address(host, port):
+    """
+    Resolve ``host`` and return the family and address to bind to.
+    ``run`` requests can read and write files as the server's user, so
+    only loopback addresses are allowed, on top of the token.
+    """
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as err:
+        raise ValueError('can not resolve {0!r}: {1}'.format(host, err))
+    for family, _, _, _, address in infos:
+        if family not in (socket.AF_INET, socket.AF_INET6) or \
+                not ipaddress.ip_address(
+                    address[0].split('%')[0]).is_loopback:
+            raise ValueError(
+                '{0!r} is not a loopback address'.format(host))
+    family, _, _, _, address = infos[0]
+    return family, address
+
+
+def _remove_stale_socket(path):
+    """
+    remove a socket file left behind by a server that didn't shut down
+    cleanly, but not one that a server is still listening on
+    """
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+    except OSError:
+        pass
+    finally:
+        probe.close()
+
+
+def serve(server):
+    """
+    run a server from ``make_server`` until interrupted or terminated
+    """
+    if threading.current_thread() is threading.main_thread():
+        # clean up the socket file on SIGTERM as well
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,118 @@
+import asyncio
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest import mock
+from genson import AsyncSchemaBuilder, SchemaBuilder
+from genson.schema import aio
+from .test_custom import MaxTenSchemaBuilder
+from .test_merge import OBJECTS, build
+
+
+async def agen(objects):
+    for obj in objects:
+        yield obj
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestAsyncSchemaBuilder(unittest.TestCase):
+
+    def test_async_iterator(self):
+        builder = AsyncSchemaBuilder(slice_size=2)
+        run(builder.add_objects_async(agen(OBJECTS * 3)))
+        self.assertEqual(builder.builder, build(OBJECTS * 3))
+        self.assertEqual(run(builder.to_schema_async()),
+                         build(OBJECTS).to_schema())
+
+    def test_iterable(self):
+        builder = AsyncSchemaBuilder()
+        run(builder.add_objects_async(OBJECTS))
+        self.assertEqual(builder.builder, build(OBJECTS))
+
+    def test_seed_schema(self):
+        seed = {'type': 'array', 'items': []}
+        objects = [[1, 'a'], [None], [2.5, 'b', True]]
+        builder = AsyncSchemaBuilder(MaxTenSchemaBuilder())
+
+        async def add():
+            await builder.add_schema_async(seed)
+            for obj in objects:
+                await builder.add_object_async(obj)
+
+        run(add())
+        self.assertEqual(builder.builder,
+                         build(objects, [seed], cls=MaxTenSchemaBuilder))
+
+    def test_yields_to_loop(self):
+        builder = AsyncSchemaBuilder(slice_size=1)
+        ticks = []
+
+        async def tick():
+            while True:
+                ticks.append(len(builder.builder))
+                await asyncio.sleep(0)
+
+        async def add():
+            ticker = asyncio.ensure_future(tick())
+            await builder.add_objects_async(agen([1, 'a', None]))
+            ticker.cancel()
+
+        run(add())
+        self.assertIn(1, ticks)
+        self.assertIn(2, ticks)
+
+    def test_concurrent_calls_keep_order(self):
+        builder = AsyncSchemaBuilder(slice_size=1)
+
+        async def add():
+            await asyncio.gather(
+                builder.add_objects_async(agen(OBJECTS[:3])),
+                builder.add_objects_async(agen(OBJECTS[3:])))
+
+        run(add())
+        self.assertEqual(builder.builder, build(OBJECTS))
+
+    def test_thread_executor(self):
+        with ThreadPoolExecutor(1) as executor:
+            builder = AsyncSchemaBuilder(executor=executor, slice_size=2)
+            run(builder.add_objects_async(agen(OBJECTS)))
+            schema = run(builder.to_schema_async())
+        self.assertEqual(schema, build(OBJECTS).to_schema())
+
+    def test_process_executor(self):
+        with ProcessPoolExecutor(1) as executor:
+            builder = AsyncSchemaBuilder(executor=executor, slice_size=2)
+            run(builder.add_objects_async(agen(OBJECTS)))
+        self.assertEqual(builder.builder, build(OBJECTS))
+        self.assertIsInstance(builder.builder, SchemaBuilder)
+
+    def test_process_executor_seeded_once(self):
+        seed = {'type': 'array', 'items': []}
+        objects = [[1, 'a'], [None], [2.5, 'b', True]]
+        dump_seed = mock.Mock(wraps=aio.dump_seed)
+        with ProcessPoolExecutor(1) as executor, \
+                mock.patch.object(aio, 'dump_seed', dump_seed):
+            builder = AsyncSchemaBuilder(executor=executor, slice_size=1)
+
+            async def add():
+                await builder.add_objects_async(objects[:2])
+                await builder.add_schema_async(seed)
+                await builder.add_objects_async(objects)
+
+            run(add())
+        self.assertEqual(dump_seed.call_count, 2)
+        expected = build(objects[:2])
+        expected.add_schema(seed)
+        expected.add_objects(objects)
+        self.assertEqual(builder.builder, expected)
+
+    def test_process_executor_profiled(self):
+        # the builder's own counts aren't merged back into it
+        with ProcessPoolExecutor(1) as executor:
+            builder = AsyncSchemaBuilder(
+                SchemaBuilder(profile=True), executor=executor,
+                slice_size=2)
+            run(builder.add_objects_async([1] * 6))
+        self.assertEqual(builder.builder.stats()['#']['values'], 6)
@@ -0,0 +1,68 @@
+import unittest
+from genson import SchemaBuilder, SchemaNode
+from .test_merge import OBJECTS
+from .test_shape_cache import MinNumberSchemaBuilder
+
+BATCHES = [
+    OBJECTS,
+    [1, 2.5, True, None, 'a'],
+    [{'a': 1}, {'a': 'x', 'b': [1, 2]}, {}, {'b': [None, {'c': 1.5}]}],
+    [[1, 'a'], [], [{'x': [1]}, [2.5]]],
+    [{'a': [1]}, {'a': {'b': 1}}, {'a': [{'c': 1}]}],
+]
+
+SEEDS = [
+    {'type': 'array', 'items': []},
+    {'type': 'object', 'patternProperties': {r'^\d+$': None}},
+    {'title': 'typeless'},
+]
+
+
+class TestAddObjects(unittest.TestCase):
+
+    def assertSameAsSequential(self, objs, schemas=(), cls=SchemaBuilder):
+        expected = cls()
+        builder = cls()
+        for schema in schemas:
+            expected.add_schema(schema)
+            builder.add_schema(schema)
+        for obj in objs:
+            expected.add_object(obj)
+        builder.add_objects(objs)
+        self.assertEqual(builder, expected)
+        self.assertEqual(builder.to_schema(), expected.to_schema())
+
+    def test_batches(self):
+        for objs in BATCHES:
+            self.assertSameAsSequential(objs)
+
+    def test_seeds(self):
+        for seed in SEEDS:
+            self.assertSameAsSequential(
+                [[1, {'1': 'a', 'b': 2}], [2.5], {'2': [], '3': {}}],
+                [seed])
+
+    def test_pattern_property_order(self):
+        self.assertSameAsSequential(
+            [{'1': {}, '2': []}, {'1': [], '2': {}}],
+            [SEEDS[1]])
+
+    def test_generator(self):
+        builder = SchemaBuilder()
+        builder.add_objects((i for i in [1, 'a', 2.5]), batch_size=2)
+        self.assertEqual(builder.to_schema()['type'], ['number', 'string'])
+
+    def test_shape_cache(self):
+        builder = SchemaBuilder(shape_cache_size=10)
+        builder.add_objects([{'a': 1}, {'a': 2}, {'a': 'x'}])
+        self.assertEqual(tuple(builder.shape_cache_info()), (1, 2, 10, 2))
+        self.assertEqual(builder.to_schema()['properties'],
+                         {'a': {'type': ['integer', 'string']}})
+
+    def test_custom_add_object(self):
+        self.assertSameAsSequential([{'a': 5}, {'a': 2}, {'a': 3.5}],
+                                    cls=MinNumberSchemaBuilder)
+
+    def test_node(self):
+        node = SchemaNode().add_objects(iter([None, 1]))
+        self.assertEqual(node.to_schema(), {'type': ['integer', 'null']})
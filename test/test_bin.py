@@ -2,14 +2,19 @@ import unittest
 import json
 import os
 import sys
+import tempfile
+from importlib.util import find_spec
 from subprocess import Popen, PIPE
 from genson import SchemaBuilder
+from genson.parsers import PARSER_NAMES
 
 BASE_SCHEMA = {"$schema": SchemaBuilder.DEFAULT_URI}
+MISSING_PARSERS = [name for name in PARSER_NAMES if find_spec(name) is None]
 FIXTURE_PATH = os.path.join(os.path.dirname(__file__), 'fixtures')
 SHORT_USAGE = """\
-usage: genson [-h] [--version] [-d DELIM] [-e ENCODING] [-i SPACES]
-              [-s SCHEMA] [-$ SCHEMA_URI]
+usage: genson [-h] [--version] [-c FILE] [--checkpoint-every N] [-d DELIM]
+              [--dedupe] [-e ENCODING] [-i SPACES] [-j N] [-p PARSER]
+              [-s SCHEMA] [-$ SCHEMA_URI] [--serve ADDRESS] [--stats]
               ..."""
 
 
@@ -79,8 +84,8 @@ class TestError(unittest.TestCase):
     maxDiff = 1000
     BAD_JSON_FILE = fixture('not_json.txt')
     BAD_JSON_MESSAGE = stderr_message(
-        'invalid JSON in %s: Expecting value: line 1 column 1 (char 0)'
-        % BAD_JSON_FILE)
+        'invalid JSON in %s at byte 0: Expecting value: line 1 column 1 '
+        '(char 0)' % BAD_JSON_FILE)
 
     def assertEqualIgnoreWhitespace(
         self,
@@ -140,6 +145,296 @@ class TestDelimiter(unittest.TestCase):
                 "hi": {"type": ["integer", "string"]}}}, **BASE_SCHEMA))
 
 
+class TestStreaming(unittest.TestCase):
+    """
+    Input is read in chunks, so make sure documents that straddle chunk
+    boundaries are reassembled correctly.
+    """
+
+    def test_many_objects(self):
+        stdin_data = '{"hi":"there"}\n' * 20000 + '{"hi":5}'
+        (stdout, stderr) = run(stdin_data=stdin_data)
+        self.assertEqual(stderr, '')
+        self.assertEqual(
+            json.loads(stdout),
+            dict({"required": ["hi"], "type": "object", "properties": {
+                "hi": {"type": ["integer", "string"]}}}, **BASE_SCHEMA))
+
+    def test_large_object(self):
+        stdin_data = '{"hi":"%s"} {"hi":5}' % ('x' * 200000)
+        (stdout, stderr) = run(stdin_data=stdin_data)
+        self.assertEqual(stderr, '')
+        self.assertEqual(
+            json.loads(stdout),
+            dict({"required": ["hi"], "type": "object", "properties": {
+                "hi": {"type": ["integer", "string"]}}}, **BASE_SCHEMA))
+
+    def test_number_across_boundary(self):
+        stdin_data = ' ' * (2 ** 16 - 2) + '1234.5'
+        (stdout, stderr) = run(stdin_data=stdin_data)
+        self.assertEqual(stderr, '')
+        self.assertEqual(
+            json.loads(stdout), dict({"type": "number"}, **BASE_SCHEMA))
+
+    def test_scalars_and_arrays(self):
+        (stdout, stderr) = run(stdin_data='[1] ["a"] null')
+        self.assertEqual(stderr, '')
+        self.assertEqual(json.loads(stdout), dict({"anyOf": [
+            {"type": "null"},
+            {"type": "array", "items": {"type": ["integer", "string"]}}
+        ]}, **BASE_SCHEMA))
+
+    def test_brackets_in_strings(self):
+        (stdout, stderr) = run(stdin_data='{"a":"}{"}{"a":"[\\"]"}')
+        self.assertEqual(stderr, '')
+        self.assertEqual(
+            json.loads(stdout),
+            dict({"required": ["a"], "type": "object", "properties": {
+                "a": {"type": "string"}}}, **BASE_SCHEMA))
+
+    def test_error_byte_offset(self):
+        (stdout, stderr) = run(stdin_data='{"\u00e9":1} {"a": }')
+        self.assertEqual(" ".join(stderr.split()), " ".join(stderr_message(
+            'invalid JSON in <stdin> at byte 15: Expecting value: line 1 '
+            'column 7 (char 6)').split()))
+        self.assertEqual(stdout, '')
+
+    def test_truncated(self):
+        (stdout, stderr) = run(stdin_data='{"a": 1} {"a": [1')
+        self.assertIn('invalid JSON in <stdin> at byte 17', stderr)
+        self.assertEqual(stdout, '')
+
+    def test_delim_large_object(self):
+        stdin_data = '{"hi":"%s"}\n{"hi":5}' % ('x' * 200000)
+        (stdout, stderr) = run(['-d', 'newline'], stdin_data=stdin_data)
+        self.assertEqual(stderr, '')
+        self.assertEqual(
+            json.loads(stdout),
+            dict({"required": ["hi"], "type": "object", "properties": {
+                "hi": {"type": ["integer", "string"]}}}, **BASE_SCHEMA))
+
+
+class TestMappedFile(unittest.TestCase):
+    """ delimited regular files are memory-mapped """
+
+    def run_file(self, data, args=('-d', 'newline')):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'objects.json')
+            with open(path, 'wb') as fp:
+                fp.write(data)
+            return run(list(args) + [path]) + (path,)
+
+    def test_crlf_and_utf8(self):
+        (stdout, stderr, _) = self.run_file(
+            '{"hi":"th\u00e9re"}\r\n\r\n{"hi":5}\r\n'.encode('utf-8'))
+        self.assertEqual(stderr, '')
+        self.assertEqual(
+            json.loads(stdout),
+            dict({"required": ["hi"], "type": "object", "properties": {
+                "hi": {"type": ["integer", "string"]}}}, **BASE_SCHEMA))
+
+    def test_multibyte_delimiter(self):
+        (stdout, stderr, _) = self.run_file(
+            '1\u00a72\u00a7"x"'.encode('utf-8'), ['-d', '\u00a7'])
+        self.assertEqual(stderr, '')
+        self.assertEqual(
+            json.loads(stdout),
+            dict({"type": ["integer", "string"]}, **BASE_SCHEMA))
+
+    def test_invalid_json(self):
+        (stdout, stderr, path) = self.run_file(b'{"hi":5}\n{"hi": }\n')
+        self.assertEqual(" ".join(stderr.split()), " ".join(stderr_message(
+            'invalid JSON in %s at byte 16: Expecting value: line 1 column 8 '
+            '(char 7)' % path).split()))
+        self.assertEqual(stdout, '')
+
+
+class TestJobs(unittest.TestCase):
+
+    def test_jobs(self):
+        stdin_data = '{"hi":"there"}\n' * 5000 + '{"hi":5.5, "ho":[1]}'
+        (stdout, stderr) = run(['-j', '2'], stdin_data=stdin_data)
+        self.assertEqual(stderr, '')
+        self.assertEqual(stdout, run(stdin_data=stdin_data)[0])
+
+    def test_jobs_with_seed(self):
+        (stdout, stderr) = run(
+            ['-j', '2', '-s', fixture('base_schema.json')],
+            stdin_data='[1, "a"]')
+        self.assertEqual(stderr, '')
+        self.assertEqual(
+            json.loads(stdout),
+            dict({"type": "array", "items": {"type": ["integer", "string"]}},
+                 **BASE_SCHEMA))
+
+    def write_files(self, tmp, prefix, *contents):
+        paths = []
+        for i, content in enumerate(contents):
+            paths.append(os.path.join(tmp, '%s%d.json' % (prefix, i)))
+            with open(paths[-1], 'w') as fp:
+                fp.write(content)
+        return paths
+
+    def test_files_same_as_serial(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            schemas = self.write_files(
+                tmp, 'schema',
+                '{"$schema": "http://first#", "title": "a", "type": "object"}',
+                '{"$schema": "http://second#", "title": "b"}',
+                '{"title": "c", "description": "d"}')
+            objects = self.write_files(
+                tmp, 'object', '{"a": 1} {"b": [1]}', '[1]\n"x"', '{"a": "y"}',
+                '', '{"c": null}')
+            args = [arg for path in schemas for arg in ('-s', path)]
+            args += objects[:2] + ['-'] + objects[2:]
+
+            serial = run(args, stdin_data='{"a": true}')
+            parallel = run(['-j', '3'] + args, stdin_data='{"a": true}')
+        self.assertIn('conflicting', serial[1])
+        self.assertEqual(parallel, serial)
+
+    def test_files_typeless_seed_same_as_serial(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            (schema,) = self.write_files(tmp, 'schema', '{"title": "x"}')
+            objects = self.write_files(tmp, 'object', '2.5', '"s"')
+            args = ['-s', schema] + objects
+
+            serial = run(args)
+            parallel = run(['-j', '2'] + args)
+        self.assertEqual(json.loads(serial[0])['anyOf'],
+                         [{'type': 'string'},
+                          {'title': 'x', 'type': 'number'}])
+        self.assertEqual(parallel, serial)
+
+    def test_files_invalid_json(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = self.write_files(
+                tmp, 'object', '{"a": 1}', '{"a": }', '{')
+            (stdout, stderr) = run(['-j', '2'] + paths)
+        self.assertEqual(" ".join(stderr.split()), " ".join(stderr_message(
+            'invalid JSON in %s at byte 6: Expecting value: line 1 column 7 '
+            '(char 6)' % paths[1]).split()))
+        self.assertEqual(stdout, '')
+
+
+class TestStats(unittest.TestCase):
+
+    def test_stats(self):
+        (stdout, stderr) = run(['--stats'], stdin_data='{"hi": 1} {"hi": "x"}')
+        self.assertEqual(json.loads(stdout), dict(
+            {"type": "object", "properties": {
+                "hi": {"type": ["integer", "string"]}},
+             "required": ["hi"]}, **BASE_SCHEMA))
+        lines = stderr.splitlines()
+        self.assertEqual(lines[1].split()[1:], ['2', '0', 'object:2', '#'])
+        self.assertEqual(lines[2].split()[1:],
+                         ['2', '0', 'integer:1,string:1', '#/properties/hi'])
+
+
+class TestDedupe(unittest.TestCase):
+
+    def test_dedupe(self):
+        (stdout, stderr) = run(['--dedupe'],
+                               stdin_data='{"a": {"b": [1]}, "c": {"b": [2]}}')
+        self.assertEqual(stderr, '')
+        self.assertEqual(json.loads(stdout), dict({
+            "type": "object",
+            "properties": {"a": {"$ref": "#/$defs/a"},
+                           "c": {"$ref": "#/$defs/a"}},
+            "required": ["a", "c"],
+            "$defs": {"a": {
+                "type": "object",
+                "properties": {"b": {"type": "array",
+                                     "items": {"type": "integer"}}},
+                "required": ["b"]}}}, **BASE_SCHEMA))
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def test_resume(self):
+        objects = ['{"a": %d}' % i for i in range(10)] + ['{"a": "x"}']
+        stdin_data = '\n'.join(objects)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'checkpoint')
+            # a checkpoint from a run that stopped after 8 objects
+            partial = SchemaBuilder(schema_uri='NULL')
+            partial.add_object({'b': True})
+            partial.save_checkpoint(path, 8)
+
+            (stdout, stderr) = run(['-c', path, '--checkpoint-every', '3'],
+                                   stdin_data=stdin_data)
+            self.assertEqual(stderr, '')
+            self.assertFalse(os.path.exists(path))
+        self.assertEqual(json.loads(stdout), {
+            "type": "object", "properties": {
+                "b": {"type": "boolean"},
+                "a": {"type": ["integer", "string"]}}})
+
+    def test_resume_stats_without_stats(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'checkpoint')
+            SchemaBuilder().save_checkpoint(path, 1)
+            (stdout, stderr) = run(['-c', path, '--stats'],
+                                   stdin_data='{"a": 1}\n{"a": 2}')
+            self.assertTrue(os.path.exists(path))
+        self.assertEqual(stdout, '')
+        self.assertEqual(stderr, stderr_message(
+            '%s was saved without --stats, so it can not be resumed with it'
+            % path))
+
+    def test_same_as_without(self):
+        stdin_data = '{"a": 1}\n[1, "b"]\n{"a": null, "c": 1.5}\n2'
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'checkpoint')
+            result = run(['-c', path, '--checkpoint-every', '1',
+                          '-s', fixture('base_schema.json')],
+                         stdin_data=stdin_data)
+        self.assertEqual(result, run(['-s', fixture('base_schema.json')],
+                                     stdin_data=stdin_data))
+
+    def test_with_jobs(self):
+        (stdout, stderr) = run(['-c', 'checkpoint', '-j', '2'],
+                               stdin_data='{}')
+        self.assertEqual(" ".join(stderr.split()), " ".join(stderr_message(
+            '--checkpoint can not be used with --jobs').split()))
+
+
+class TestParser(unittest.TestCase):
+    STDIN_DATA = '{"a": 1}\n{"a": NaN}\n{"a": 12345678901234567890123}'
+    RESULT = dict({"required": ["a"], "type": "object", "properties": {
+        "a": {"type": "number"}}}, **BASE_SCHEMA)
+
+    def test_parsers_agree(self):
+        for parser in ('auto',) + PARSER_NAMES:
+            if parser in MISSING_PARSERS:
+                continue
+            (stdout, stderr) = run(['-d', 'newline', '-p', parser],
+                                   stdin_data=self.STDIN_DATA)
+            self.assertEqual(stderr, '')
+            self.assertEqual(json.loads(stdout), self.RESULT)
+
+    def test_errors_agree(self):
+        message = stderr_message(
+            'invalid JSON in <stdin> at byte 15: Expecting value: line 1 '
+            'column 7 (char 6)')
+        for parser in ('auto',) + PARSER_NAMES:
+            if parser in MISSING_PARSERS:
+                continue
+            (stdout, stderr) = run(['-d', 'newline', '-p', parser],
+                                   stdin_data='{"a": 1}\n{"a": }')
+            self.assertEqual(" ".join(stderr.split()),
+                             " ".join(message.split()))
+            self.assertEqual(stdout, '')
+
+    @unittest.skipUnless(MISSING_PARSERS, 'all JSON parsers are installed')
+    def test_missing_parser(self):
+        parser = MISSING_PARSERS[0]
+        (stdout, stderr) = run(['-p', parser], stdin_data='{}')
+        self.assertEqual(" ".join(stderr.split()), " ".join(stderr_message(
+            'JSON parser %r is not installed' % parser).split()))
+        self.assertEqual(stdout, '')
+
+
 class TestEncoding(unittest.TestCase):
 
     def test_encoding_unicode(self):
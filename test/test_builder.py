@@ -1,5 +1,10 @@
+import copy
+import io
+import json
+import pickle
 from . import base
 from genson import SchemaBuilder
+from genson.schema import encoder
 
 SCHEMA_URI = 'https://json-schema.org/draft/2020-12/schema'
 
@@ -104,3 +109,104 @@ class TestInteraction(base.SchemaBuilderTestCase):
         b2 = SchemaBuilder()
         b2.add_schema(b1)
         self.assertEqual(b1, b2)
+
+
+class TestIncremental(base.SchemaBuilderTestCase):
+
+    def test_unchanged_subtrees_are_reused(self):
+        self.add_object({'a': {'x': 1}, 'b': {'y': 'one'}})
+        first = self.builder.to_schema()
+        self.add_object({'b': {'y': 'two'}})
+        second = self.builder.to_schema()
+        self.assertIs(first['properties']['a'], second['properties']['a'])
+        self.assertIsNot(first['properties']['b'],
+                         second['properties']['b'])
+
+    def test_changes_are_picked_up(self):
+        self.add_object({'a': {'x': 1}})
+        self.builder.to_schema()
+        self.add_object({'a': {'x': 1.5}})
+        self.assertResult({
+            '$schema': SchemaBuilder.DEFAULT_URI,
+            'type': 'object',
+            'properties': {'a': {
+                'type': 'object',
+                'properties': {'x': {'type': 'number'}},
+                'required': ['x']}},
+            'required': ['a']})
+
+    def test_merge_is_picked_up(self):
+        self.add_object({'a': 1})
+        self.builder.to_schema()
+        other = SchemaBuilder()
+        other.add_object({'a': 'one'})
+        self.builder.merge(other)
+        self.assertEqual(self.builder.to_schema()['properties']['a'],
+                         {'type': ['integer', 'string']})
+
+    def test_nested_fragments_are_read_only(self):
+        self.add_object({'a': [1]})
+        schema = self.builder.to_schema()
+        schema['title'] = 'top level is a fresh dict'
+        with self.assertRaises(TypeError):
+            schema['properties']['b'] = {}
+        with self.assertRaises(TypeError):
+            schema['required'].append('b')
+
+        mutable = copy.deepcopy(schema)
+        mutable['properties']['b'] = {}
+        mutable['required'].append('b')
+        self.assertNotIn('b', self.builder.to_schema()['properties'])
+
+    def test_pickle_keeps_fragments_read_only(self):
+        self.add_object({'a': 1})
+        self.builder.to_schema()
+        builder = pickle.loads(pickle.dumps(self.builder))
+        with self.assertRaises(TypeError):
+            builder.to_schema()['properties']['b'] = {}
+        self.assertEqual(builder.to_json(), self.builder.to_json())
+
+
+class TestDump(base.SchemaBuilderTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_object({
+            'small': {'a': 1, 'b': [None]},
+            'big': {str(i): {'n': [i, 'x'], 'é': {}}
+                    for i in range(encoder.PIECE_SIZE // 8)}})
+
+    def assertDumpMatches(self, **kwargs):
+        fp = io.StringIO()
+        self.builder.dump(fp, **kwargs)
+        self.assertEqual(fp.getvalue(), self.builder.to_json(**kwargs))
+
+    def test_default(self):
+        self.assertDumpMatches()
+
+    def test_options(self):
+        self.assertDumpMatches(indent=2, sort_keys=True)
+        self.assertDumpMatches(sort_keys=True, ensure_ascii=False)
+        self.assertDumpMatches(separators=(',', ':'))
+
+    def test_writes_in_chunks(self):
+        writes = []
+
+        class Writer:
+            write = writes.append
+
+        self.builder.DUMP_CHUNK_SIZE = 1000
+        self.builder.dump(Writer())
+        self.assertGreater(len(writes), 1)
+        self.assertEqual(json.loads(''.join(writes)),
+                         self.builder.to_schema())
+
+    def test_iterencode_matches_dumps(self):
+        for obj in [{}, [], None, 'x', {'a': []}, {1: [2]},
+                    [[i] for i in range(encoder.PIECE_SIZE)],
+                    {1: list(range(encoder.PIECE_SIZE)),
+                     'a': list(range(encoder.PIECE_SIZE))}]:
+            for kwargs in [{}, {'indent': 2}, {'indent': '\t'},
+                           {'indent': 0}]:
+                self.assertEqual(''.join(encoder.iterencode(obj, **kwargs)),
+                                 json.dumps(obj, **kwargs))
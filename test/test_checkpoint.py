@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from itertools import islice
+from genson import CheckpointError, SchemaBuilder
+from .test_custom import MaxTenSchemaBuilder
+from .test_merge import OBJECTS, build
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'checkpoint')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        builder = build([{'a': 1}], [{'type': 'object', 'required': []}])
+        builder.save_checkpoint(self.path, {'file': 2, 'offset': 30})
+        restored, position = SchemaBuilder.load_checkpoint(self.path)
+        self.assertEqual(restored, builder)
+        self.assertEqual(position, {'file': 2, 'offset': 30})
+
+    def test_keeps_state_schema_loses(self):
+        # a typeless schema is held until a type comes along, which the
+        # generated schema can't express
+        builder = SchemaBuilder()
+        builder.add_schema({'title': 'x'})
+        builder.save_checkpoint(self.path)
+        restored, _ = SchemaBuilder.load_checkpoint(self.path)
+        restored.add_object(1)
+        builder.add_object(1)
+        self.assertEqual(restored.to_schema(), builder.to_schema())
+
+    def test_resume_add_objects(self):
+        objects = OBJECTS * 5
+        builder = SchemaBuilder()
+        # stop partway through, as if the job had been killed
+        builder.add_objects(islice(objects, 17), checkpoint=self.path,
+                            checkpoint_every=4)
+
+        resumed, position = SchemaBuilder.load_checkpoint(self.path)
+        self.assertEqual(position, 16)
+        resumed.add_objects(objects[position:], checkpoint=self.path,
+                            checkpoint_every=4, position=position)
+        self.assertEqual(resumed, build(objects))
+        self.assertEqual(SchemaBuilder.load_checkpoint(self.path)[1], 24)
+
+    def test_custom_builder(self):
+        builder = build([1, 2], cls=MaxTenSchemaBuilder)
+        builder.save_checkpoint(self.path)
+        restored, _ = MaxTenSchemaBuilder.load_checkpoint(self.path)
+        self.assertEqual(restored, builder)
+
+    def test_wrong_class(self):
+        SchemaBuilder().save_checkpoint(self.path)
+        with self.assertRaises(CheckpointError):
+            MaxTenSchemaBuilder.load_checkpoint(self.path)
+
+    def test_not_a_checkpoint(self):
+        with open(self.path, 'w') as fp:
+            fp.write('{}')
+        with self.assertRaises(CheckpointError):
+            SchemaBuilder.load_checkpoint(self.path)
+
+    def test_bad_interval(self):
+        with self.assertRaises(ValueError):
+            SchemaBuilder().add_objects([1], checkpoint=self.path)
@@ -1,4 +1,5 @@
-from genson import SchemaBuilder
+import unittest
+from genson import SchemaBuilder, SchemaNode
 from genson.schema.strategies import SchemaStrategy, Number
 from . import base
 
@@ -72,3 +73,51 @@ class TestClobberStrategies(base.SchemaNodeTestCase):
             '$schema': 'http://json-schema.org/schema#',
             'type': 'boolean',
             'const': False}, enforceUserContract=False)
+
+
+class CountingStrategy(Number):
+    """ a custom strategy without __slots__ that keeps extra state """
+
+    def __init__(self, node_class):
+        super().__init__(node_class)
+        self.count = 0
+
+    def add_object(self, obj):
+        super().add_object(obj)
+        self.count += 1
+
+
+class CountingSchemaBuilder(SchemaBuilder):
+    EXTRA_STRATEGIES = (CountingStrategy,)
+
+
+class TestCompactState(unittest.TestCase):
+
+    def test_no_instance_dict(self):
+        node = SchemaNode().add_object({'a': [1, 'x', None, True]})
+        node.add_schema({'type': 'array', 'items': []})
+        strategies = list(node._active_strategies)
+        strategies += node._active_strategies[0]._properties['a'] \
+            ._active_strategies[0]._items._active_strategies
+        self.assertFalse(hasattr(node, '__dict__'))
+        for strategy in strategies:
+            self.assertFalse(hasattr(strategy, '__dict__'), strategy)
+
+    def test_lazy_containers(self):
+        node = SchemaNode().add_object({'a': 1})
+        (strategy,) = node._active_strategies
+        self.assertIsNone(strategy._extra_keywords)
+        self.assertIsNone(strategy._pattern_properties)
+        other = SchemaNode().add_object({'a': 1})
+        other.add_schema({'type': 'object', 'patternProperties': {}})
+        self.assertEqual(node, other)
+
+    def test_custom_state(self):
+        builder = CountingSchemaBuilder()
+        builder.add_object(1)
+        other = CountingSchemaBuilder()
+        other.add_object(1)
+        self.assertEqual(builder, other)
+        other.add_object(2)
+        self.assertNotEqual(builder, other)
+        self.assertEqual(other.to_schema()['type'], 'integer')
@@ -0,0 +1,140 @@
+import unittest
+from collections import OrderedDict
+from enum import IntEnum
+from genson import SchemaBuilder, SchemaNode
+from genson.schema.node import SchemaGenerationError
+from genson.schema.strategies import Number
+from .test_custom import FalseSchemaBuilder, MaxTenSchemaBuilder, \
+    MaxTenStrategy
+
+
+class MinimumStrategy(Number):
+    """ tracks values without setting INSPECTS_VALUES """
+    KEYWORDS = tuple(list(Number.KEYWORDS) + ['minimum'])
+
+    def __init__(self, node_class):
+        super().__init__(node_class)
+        self.minimum = None
+
+    def add_object(self, obj):
+        super().add_object(obj)
+        if self.minimum is None or obj < self.minimum:
+            self.minimum = obj
+
+    def to_schema(self):
+        schema = super().to_schema()
+        schema['minimum'] = self.minimum
+        return schema
+
+
+class MinimumSchemaBuilder(SchemaBuilder):
+    EXTRA_STRATEGIES = (MinimumStrategy,)
+
+
+class Color(IntEnum):
+    RED = 1
+
+
+class Text(str):
+    pass
+
+
+class ScanningNode(SchemaNode):
+    """ a node that always uses the linear strategy scan """
+    _OBJECT_DISPATCH = None
+
+    @classmethod
+    def _build_object_dispatch(cls):
+        pass
+
+
+class TestObjectDispatch(unittest.TestCase):
+    OBJECTS = [None, True, 0, 1.5, 'a', Text('b'), [], {},
+               OrderedDict(a=1), [True, 1, 1.5], {'a': [None, 'b']}]
+
+    def assertSameAsScan(self, node_class, objects):
+        node = node_class()
+        scanning_node = type('Scanning', (ScanningNode,), {
+            'STRATEGIES': node_class.STRATEGIES})()
+        for obj in objects:
+            node.add_object(obj)
+            scanning_node.add_object(obj)
+            self.assertEqual(node.to_schema(), scanning_node.to_schema())
+
+    def test_basic_types(self):
+        self.assertSameAsScan(SchemaNode, self.OBJECTS)
+
+    def test_bool_is_not_number(self):
+        self.assertSameAsScan(SchemaNode, [1, True, False, 2])
+
+    def test_seeded_tuple(self):
+        node = SchemaNode().add_schema({'type': 'array', 'items': []})
+        node.add_object([1, 'a'])
+        self.assertEqual(node.to_schema(), {'type': 'array', 'items': [
+            {'type': 'integer'}, {'type': 'string'}]})
+
+    def test_unmatched_subclass(self):
+        with self.assertRaises(SchemaGenerationError):
+            SchemaNode().add_object(Color.RED)
+
+    def test_extra_strategies(self):
+        self.assertIsNotNone(MaxTenSchemaBuilder.NODE_CLASS._OBJECT_DISPATCH)
+        self.assertEqual(
+            MaxTenSchemaBuilder.NODE_CLASS._OBJECT_DISPATCH[int][0],
+            MaxTenStrategy)
+        self.assertSameAsScan(MaxTenSchemaBuilder.NODE_CLASS, self.OBJECTS)
+
+    def test_custom_match_object_falls_back(self):
+        self.assertIsNone(FalseSchemaBuilder.NODE_CLASS._OBJECT_DISPATCH)
+        self.assertSameAsScan(FalseSchemaBuilder.NODE_CLASS, self.OBJECTS)
+
+
+class TestScalarSummary(unittest.TestCase):
+    """ arrays of scalars are added as one item per type """
+
+    def assertSameAsEachItem(self, items, node_class=SchemaNode):
+        node = node_class().add_object(items)
+        items_node = node_class()
+        for item in items:
+            items_node.add_object(item)
+        (strategy,) = node._active_strategies
+        self.assertEqual(strategy._items, items_node)
+        self.assertEqual(node.to_schema(), {
+            'type': 'array', 'items': items_node.to_schema()})
+
+    def test_homogeneous(self):
+        self.assertSameAsEachItem(list(range(1000)))
+        self.assertSameAsEachItem(['a'] * 1000)
+
+    def test_number_promotion(self):
+        self.assertSameAsEachItem([1, 2, 1.5, 3])
+        self.assertSameAsEachItem([1.5, 2])
+
+    def test_bool_is_not_number(self):
+        self.assertSameAsEachItem([1, True, 2, False])
+        self.assertSameAsEachItem([True, 1])
+
+    def test_order_of_types(self):
+        self.assertSameAsEachItem(['a', None, 1, True, None, 'b', 1.5])
+        self.assertSameAsEachItem([{}, 'a'] + [1] * 10 + [[True]])
+
+    def test_subclass(self):
+        self.assertSameAsEachItem(['a', Text('b'), 'c'])
+
+    def test_batch(self):
+        node = SchemaNode().add_objects([[1, 2], [True], [1.5, 'a']])
+        self.assertEqual(node, SchemaNode().add_object([1, 2, True, 1.5, 'a']))
+
+    def test_custom_strategies(self):
+        self.assertFalse(FalseSchemaBuilder.NODE_CLASS._SUMMARIZE_SCALARS)
+        self.assertTrue(MaxTenSchemaBuilder.NODE_CLASS._SUMMARIZE_SCALARS)
+        self.assertSameAsEachItem(
+            [1, True, 1.5], MaxTenSchemaBuilder.NODE_CLASS)
+
+    def test_value_tracking_strategy(self):
+        self.assertFalse(MinimumSchemaBuilder.NODE_CLASS._SUMMARIZE_SCALARS)
+        self.assertSameAsEachItem(
+            [5, 1, 20], MinimumSchemaBuilder.NODE_CLASS)
+        builder = MinimumSchemaBuilder()
+        builder.add_object([5, 1, 20])
+        self.assertEqual(builder.to_schema()['items']['minimum'], 1)
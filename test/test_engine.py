@@ -0,0 +1,159 @@
+import io
+import os
+import pickle
+import tempfile
+import unittest
+from genson import SchemaBuilder
+from genson.schema import engine
+from .test_map import MapSchemaBuilder
+from .test_merge import OBJECTS, build
+
+DEPTH = 5000
+SEED = {'type': 'object', 'properties': {'b': {'type': 'array', 'items': [
+    {'type': 'null'}]}}, 'additionalProperties': {'title': 'x'}}
+
+
+def nest(depth, leaf=1):
+    obj = leaf
+    for _ in range(depth):
+        obj = {'a': [obj]}
+    return obj
+
+
+def nested_schema(depth, leaf):
+    schema = leaf
+    for _ in range(depth):
+        schema = {'type': 'object',
+                  'properties': {'a': {'type': 'array', 'items': schema}},
+                  'required': ['a']}
+    return schema
+
+
+def schema_depth(schema):
+    """ count the levels of a schema made by ``nest`` """
+    depth = 0
+    while 'properties' in schema:
+        schema = schema['properties']['a']['items']
+        depth += 1
+    return depth, schema
+
+
+class TestDeepDocuments(unittest.TestCase):
+
+    def assertDeep(self, builder, leaf={'type': 'integer'}):
+        self.assertEqual(
+            schema_depth(builder.to_schema()), (DEPTH, leaf))
+
+    def test_add_object(self):
+        builder = SchemaBuilder()
+        builder.add_object(nest(DEPTH))
+        builder.add_object(nest(DEPTH, 1.5))
+        self.assertDeep(builder, {'type': 'number'})
+
+    def test_add_objects(self):
+        builder = SchemaBuilder()
+        builder.add_objects([nest(DEPTH), nest(DEPTH, 'x')])
+        self.assertDeep(builder, {'type': ['integer', 'string']})
+
+    def test_add_schema(self):
+        builder = SchemaBuilder()
+        builder.add_schema(nested_schema(DEPTH, {'type': 'string'}))
+        builder.add_object(nest(DEPTH))
+        self.assertDeep(builder, {'type': ['integer', 'string']})
+
+    def test_merge(self):
+        builder = SchemaBuilder()
+        builder.add_object(nest(DEPTH))
+        other = SchemaBuilder()
+        other.add_object(nest(DEPTH, None))
+        builder.merge(other)
+        self.assertDeep(builder, {'type': ['integer', 'null']})
+
+    def test_dump(self):
+        builder = SchemaBuilder()
+        builder.add_object(nest(DEPTH))
+        fp = io.StringIO()
+        builder.dump(fp)
+        self.assertEqual(
+            fp.getvalue().count('"required": ["a"]'), DEPTH)
+
+    def test_dump_indented(self):
+        builder = SchemaBuilder()
+        builder.add_object(nest(DEPTH))
+        fp = io.StringIO()
+        # an empty indent breaks lines without making the output huge
+        builder.dump(fp, indent='')
+        self.assertEqual(fp.getvalue().count('"required": [\n"a"\n]'),
+                         DEPTH)
+        self.assertEqual(builder.to_json(indent=''), fp.getvalue())
+
+    def test_eq(self):
+        builder = SchemaBuilder()
+        builder.add_object(nest(DEPTH))
+        other = SchemaBuilder()
+        other.add_object(nest(DEPTH))
+        self.assertEqual(builder, other)
+        other.add_object(nest(DEPTH, 'x'))
+        self.assertNotEqual(builder, other)
+
+    def test_pickle(self):
+        builder = SchemaBuilder()
+        builder.add_object(nest(DEPTH))
+        copy = pickle.loads(pickle.dumps(builder))
+        self.assertEqual(copy, builder)
+        copy.add_object(nest(DEPTH, None))
+        self.assertDeep(copy, {'type': ['integer', 'null']})
+
+    def test_checkpoint(self):
+        builder = SchemaBuilder()
+        builder.add_object(nest(DEPTH))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'checkpoint')
+            builder.save_checkpoint(path, 1)
+            self.assertEqual(SchemaBuilder.load_checkpoint(path),
+                             (builder, 1))
+
+
+class TestQueueOrder(unittest.TestCase):
+    """ queued calls give the same result as plain recursion """
+
+    def setUp(self):
+        self.max_depth = engine.MAX_DEPTH
+
+    def tearDown(self):
+        engine.MAX_DEPTH = self.max_depth
+
+    def assertSameWhenQueued(self, function):
+        expected = function()
+        engine.MAX_DEPTH = 0
+        actual = function()
+        self.assertEqual(actual.to_schema(), expected.to_schema())
+        self.assertEqual(actual, expected)
+
+    def test_add_object(self):
+        self.assertSameWhenQueued(lambda: build(OBJECTS, [SEED]))
+
+    def test_add_objects(self):
+        def function():
+            builder = SchemaBuilder()
+            builder.add_schema(SEED)
+            builder.add_objects(OBJECTS * 3)
+            return builder
+        self.assertSameWhenQueued(function)
+
+    def test_merge(self):
+        self.assertSameWhenQueued(
+            lambda: build(OBJECTS[:2]).merge(build(OBJECTS[2:], [SEED])))
+
+    def test_map_threshold(self):
+        objects = [{'a': 1, 'b': {'x': 1}}, {'c': None, 'd': {'y': 'z'}},
+                   [{str(i): [i] for i in range(5)}]]
+        self.assertSameWhenQueued(
+            lambda: build(objects, [SEED], cls=MapSchemaBuilder))
+
+    def test_not_queueing_afterwards(self):
+        engine.MAX_DEPTH = 0
+        build(OBJECTS)
+        self.assertEqual(engine.queueing, 0)
+        self.assertIsNone(engine.local.state.pending)
+        self.assertEqual(engine.local.state.depth, 0)
@@ -0,0 +1,138 @@
+import pickle
+from . import base
+from genson import SchemaBuilder
+
+UUIDS = ['0f8fad5b-d9cb-469f-a165-70867728950e',
+         '7c9e6679-7425-40de-944b-e07fc1f90ae7',
+         '16fd2706-8baf-433b-82eb-8c7fada847da',
+         'f81d4fae-7dec-11d0-a765-00a0c91e6bf6']
+
+
+class MapSchemaBuilder(SchemaBuilder):
+    MAP_THRESHOLD = 3
+
+
+class TestMapThreshold(base.BaseTestCase):
+    CLASS = MapSchemaBuilder
+
+    def assertResult(self, expected, **kwargs):
+        expected = dict(expected, **{'$schema': SchemaBuilder.DEFAULT_URI})
+        super().assertResult(expected, **kwargs)
+
+    def test_below_threshold(self):
+        self.add_object({'a': 1, 'b': 2, 'c': 3})
+        self.assertResult({
+            'type': 'object',
+            'properties': {'a': {'type': 'integer'},
+                           'b': {'type': 'integer'},
+                           'c': {'type': 'integer'}},
+            'required': ['a', 'b', 'c']})
+
+    def test_off_by_default(self):
+        self.builder = SchemaBuilder()
+        self.add_object({str(i): i for i in range(100)})
+        self.assertEqual(
+            len(self.builder.to_schema()['properties']), 100)
+
+    def test_additional_properties(self):
+        self.add_object({'a': 1, 'b': 'x'})
+        self.add_object({'c': None, 'd': 2})
+        self.add_object({'e': 3})
+        self.assertResult({
+            'type': 'object',
+            'additionalProperties': {'type': ['integer', 'null', 'string']}})
+
+    def test_inferred_pattern(self):
+        self.add_object({'1': 1, '22': 2})
+        self.add_object({'333': 3, '4444': None})
+        self.add_object({'5': 5, 'x': True})
+        self.assertResult({
+            'type': 'object',
+            'properties': {'x': {'type': 'boolean'}},
+            'patternProperties': {
+                '^[0-9]+$': {'type': ['integer', 'null']}}})
+
+    def test_uuid_pattern(self):
+        self.add_object({uuid: i for i, uuid in enumerate(UUIDS)})
+        schema = self.builder.to_schema()
+        self.assertEqual(list(schema['patternProperties']),
+                         [MapSchemaBuilder.NODE_CLASS.STRATEGIES[-1]
+                          .MAP_KEY_PATTERNS[1]])
+        self.assertUserContract()
+
+    def test_keeps_seeded_additional_properties(self):
+        self.add_schema({'type': 'object',
+                         'additionalProperties': {'type': 'boolean'}})
+        self.add_object({'a': 1, 'b': 2, 'c': 3, 'd': 4})
+        self.assertResult({
+            'type': 'object',
+            'additionalProperties': {'type': ['boolean', 'integer']}})
+
+    def test_nested(self):
+        self.add_object({'counts': {'a': 1, 'b': 2, 'c': 3, 'd': 4}})
+        self.assertResult({
+            'type': 'object',
+            'properties': {'counts': {
+                'type': 'object',
+                'additionalProperties': {'type': 'integer'}}},
+            'required': ['counts']})
+
+    def test_add_objects(self):
+        objs = [{'a': 1}, {'b': 2}, {'c': 3}, {'d': 4}, {'e': 'x'}]
+        self.builder.add_objects(objs)
+        self._objects.extend(objs)
+        self.assertResult({
+            'type': 'object',
+            'additionalProperties': {'type': ['integer', 'string']}})
+
+    def test_add_objects_same_as_add_object(self):
+        # properties after the collapse aren't part of it
+        objs = [{'1': 1, '2': 2, '3': 3, '4': 4}, {'name': 'x'}]
+        expected = MapSchemaBuilder()
+        for obj in objs:
+            expected.add_object(obj)
+        self.builder.add_objects(objs)
+        self._objects.extend(objs)
+        self.assertResult(expected.to_schema())
+        self.assertResult({
+            'type': 'object',
+            'properties': {'name': {'type': 'string'}},
+            'patternProperties': {'^[0-9]+$': {'type': 'integer'}}})
+
+    def test_merge(self):
+        other = MapSchemaBuilder()
+        other.add_object({'a': 1, 'b': 2, 'c': 3, 'd': 4})
+        self.add_object({'e': 'x', 'f': None})
+        self.builder.merge(other)
+        self._objects.append({'a': 1, 'b': 2, 'c': 3, 'd': 4})
+        self.assertResult({
+            'type': 'object',
+            'additionalProperties': {'type': ['integer', 'null', 'string']}})
+
+    def test_merge_into_pattern(self):
+        other = MapSchemaBuilder()
+        other.add_object({'1': 1, '2': 2, '3': 3, '4': 4})
+        self.add_object({'5': 'x', 'name': 'y'})
+        self.builder.merge(other)
+        self._objects.append({'1': 1, '2': 2, '3': 3, '4': 4})
+        self.assertResult({
+            'type': 'object',
+            'properties': {'name': {'type': 'string'}},
+            'patternProperties': {
+                '^[0-9]+$': {'type': ['integer', 'string']}}})
+
+    def test_merge_keeps_order(self):
+        objs = [{'b': [1], '14': {'k': 1}, 'd': 1},
+                {'12': {'k': 1}, 'a': True}, {'7': None, 'f': 1}]
+        self.builder.add_object(objs[0])
+        other = MapSchemaBuilder()
+        other.add_objects(objs[1:])
+        self.builder.merge(other)
+        expected = MapSchemaBuilder()
+        expected.add_objects(objs)
+        self.assertEqual(self.builder.to_schema(), expected.to_schema())
+
+    def test_pickle(self):
+        self.add_object({'a': 1, 'b': 2, 'c': 3, 'd': 4})
+        self.assertEqual(pickle.loads(pickle.dumps(self.builder)),
+                         self.builder)
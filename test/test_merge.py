@@ -0,0 +1,163 @@
+import unittest
+from genson import SchemaBuilder, SchemaNode
+from genson.schema.parallel import merge_all
+from . import base
+from .test_custom import MaxTenSchemaBuilder
+
+OBJECTS = [
+    {'a': 1, 'b': 'two', 'c': [1, 2.5]},
+    {'a': 2, 'c': [], 'd': {'e': None}},
+    {'a': 3.5, 'b': True, 'd': {'e': 'f', 'g': 1}},
+    [1, 'x', {'y': 1}],
+    None,
+]
+
+
+def build(objects, schemas=(), cls=SchemaBuilder):
+    builder = cls()
+    for schema in schemas:
+        builder.add_schema(schema)
+    for obj in objects:
+        builder.add_object(obj)
+    return builder
+
+
+class TestNodeMerge(base.SchemaNodeTestCase):
+
+    def test_merge_objects(self):
+        other = SchemaNode()
+        other.add_object({'a': 1.5, 'c': 'x'})
+        self.add_object({'a': 1, 'b': 'x'})
+        self.builder.merge(other)
+        self.assertResult({
+            'type': 'object',
+            'properties': {
+                'a': {'type': 'number'},
+                'b': {'type': 'string'},
+                'c': {'type': 'string'}},
+            'required': ['a']}, enforceUserContract=False)
+
+    def test_merge_tuple(self):
+        other = SchemaNode()
+        other.add_schema({'type': 'array', 'items': []})
+        other.add_object([1, 'a', None])
+        self.add_schema({'type': 'array', 'items': []})
+        self.add_object([True])
+        self.builder.merge(other)
+        self.assertResult({'type': 'array', 'items': [
+            {'type': ['boolean', 'integer']},
+            {'type': 'string'},
+            {'type': 'null'}]}, enforceUserContract=False)
+
+    def test_merge_pattern_properties(self):
+        seed = {'type': 'object', 'patternProperties': {r'^\d$': None}}
+        other = SchemaNode().add_schema(seed)
+        other.add_object({'1': 'one'})
+        self.add_schema(seed)
+        self.add_object({'2': 2})
+        self.builder.merge(other)
+        self.assertResult({'type': 'object', 'patternProperties': {
+            r'^\d$': {'type': ['integer', 'string']}}},
+            enforceUserContract=False)
+
+    def test_merge_typeless(self):
+        other = SchemaNode().add_schema({'title': 'hi'})
+        self.add_object(1)
+        self.builder.merge(other)
+        self.assertResult({'type': 'integer', 'title': 'hi'},
+                          enforceUserContract=False)
+
+    def test_typeless_absorbed(self):
+        self.add_schema({'title': 'hi'})
+        self.builder.merge(SchemaNode().add_object('x'))
+        self.assertResult({'type': 'string', 'title': 'hi'},
+                          enforceUserContract=False)
+
+    def test_no_aliasing(self):
+        other = SchemaNode().add_object({'a': 1})
+        self.builder.merge(other)
+        other.add_object({'a': 'x'})
+        self.assertResult({
+            'type': 'object',
+            'properties': {'a': {'type': 'integer'}},
+            'required': ['a']}, enforceUserContract=False)
+
+    def test_ior(self):
+        node = SchemaNode().add_object(1)
+        node |= SchemaNode().add_object('a')
+        self.assertEqual(node.to_schema(), {'type': ['integer', 'string']})
+
+    def test_mismatched_strategies(self):
+        with self.assertRaises(TypeError):
+            self.builder.merge(MaxTenSchemaBuilder.NODE_CLASS())
+
+
+class TestBuilderMerge(unittest.TestCase):
+
+    def test_same_as_sequential(self):
+        expected = build(OBJECTS)
+        for i in range(len(OBJECTS) + 1):
+            merged = build(OBJECTS[:i])
+            merged.merge(build(OBJECTS[i:]))
+            self.assertEqual(merged, expected)
+            self.assertEqual(merged.to_schema(), expected.to_schema())
+
+    def test_associative(self):
+        def parts():
+            return [build([obj]) for obj in OBJECTS]
+
+        left = merge_all(parts())
+        right = parts()
+        for part in reversed(right[:-1]):
+            part.merge(right[-1])
+            right[-1] = part
+        self.assertEqual(left, right[-1])
+        self.assertEqual(left, build(OBJECTS))
+
+    def test_associative_with_patterns(self):
+        # the other builder's properties aren't routed through this
+        # builder's patterns, so the grouping doesn't matter
+        def parts():
+            return [SchemaBuilder(), build([{'x1': 1}]),
+                    build([], [{'type': 'object',
+                                'patternProperties': {'^x': {}}}])]
+
+        a, b, c = parts()
+        left = a.merge(b).merge(c)
+        a, b, c = parts()
+        right = a.merge(b.merge(c))
+        self.assertEqual(left, right)
+        self.assertEqual(left.to_schema()['properties'],
+                         {'x1': {'type': 'integer'}})
+
+    def test_keeps_required_state(self):
+        builder = build([{'a': 1}])
+        builder.merge(build([], [{'type': 'object', 'required': []}]))
+        self.assertEqual(builder.to_schema()['required'], [])
+
+    def test_schema_uri(self):
+        builder = SchemaBuilder()
+        builder.merge(SchemaBuilder(schema_uri='other'))
+        self.assertEqual(builder.schema_uri, 'other')
+
+    def test_custom_builder(self):
+        builder = build([1], cls=MaxTenSchemaBuilder)
+        builder.merge(build([2.5], cls=MaxTenSchemaBuilder))
+        self.assertEqual(builder.to_schema(), {
+            '$schema': SchemaBuilder.DEFAULT_URI,
+            'type': 'number',
+            'maximum': 10})
+
+    def test_ior(self):
+        builder = build(OBJECTS[:2])
+        original = builder
+        builder |= build(OBJECTS[2:])
+        self.assertIs(builder, original)
+        self.assertEqual(builder, build(OBJECTS))
+
+    def test_not_a_builder(self):
+        with self.assertRaises(TypeError):
+            SchemaBuilder().merge({'type': 'null'})
+        builder = SchemaBuilder()
+        with self.assertRaises(TypeError):
+            builder |= {'type': 'null'}
@@ -0,0 +1,113 @@
+import pickle
+import unittest
+from genson import SchemaBuilder, SchemaNode
+from .test_custom import MaxTenSchemaBuilder
+from .test_merge import OBJECTS, build
+
+
+class TestParallel(unittest.TestCase):
+
+    def test_same_as_sequential(self):
+        objects = OBJECTS * 50
+        builder = SchemaBuilder()
+        builder.add_objects_parallel(iter(objects), jobs=2, chunk_size=7)
+        self.assertEqual(builder, build(objects))
+
+    def test_seed_schema(self):
+        seed = {'type': 'array', 'items': []}
+        objects = [[1, 'a'], [None], [2.5, 'b', True]] * 10
+        builder = build([], [seed])
+        builder.add_objects_parallel(objects, jobs=2, chunk_size=4)
+        self.assertEqual(builder, build(objects, [seed]))
+
+    def test_typeless_seed_schema(self):
+        # only the first type gets the seed's keywords
+        seed = {'title': 'x', 'properties': {'a': {'title': 'y'}}}
+        objects = [2.5] * 3 + ['s'] * 3 + [{'a': 1}] * 3 + [{'a': 's'}] * 3
+        builder = build([], [seed])
+        builder.add_objects_parallel(objects, jobs=2, chunk_size=3)
+        self.assertEqual(builder.to_schema(),
+                         build(objects, [seed]).to_schema())
+
+    def test_profiled(self):
+        objects = [{'a': [1, 'x']}, {'a': []}] * 5
+        builder = SchemaBuilder(profile=True)
+        builder.add_object({'a': 1})
+        builder.add_objects_parallel(objects, jobs=2, chunk_size=3)
+        expected = SchemaBuilder(profile=True)
+        expected.add_object({'a': 1})
+        expected.add_objects(objects)
+        self.assertEqual(
+            {pointer: stats['values']
+             for pointer, stats in builder.stats().items()},
+            {pointer: stats['values']
+             for pointer, stats in expected.stats().items()})
+
+    def test_custom_builder(self):
+        builder = MaxTenSchemaBuilder()
+        builder.add_objects_parallel([1, 2, 3], jobs=2, chunk_size=1)
+        self.assertEqual(builder, build([1, 2, 3], cls=MaxTenSchemaBuilder))
+
+    def test_empty(self):
+        builder = SchemaBuilder()
+        builder.add_objects_parallel([], jobs=2)
+        self.assertEqual(builder, SchemaBuilder())
+
+
+class TestPickle(unittest.TestCase):
+
+    def test_builder(self):
+        builder = build(OBJECTS)
+        self.assertEqual(pickle.loads(pickle.dumps(builder)), builder)
+
+    def test_custom_builder(self):
+        builder = build([{'a': 1}], cls=MaxTenSchemaBuilder)
+        self.assertEqual(pickle.loads(pickle.dumps(builder)), builder)
+
+    def test_node(self):
+        node = MaxTenSchemaBuilder.NODE_CLASS()
+        node.add_object({'a': [1, 'x']})
+        copy = pickle.loads(pickle.dumps(node))
+        self.assertIs(type(copy), MaxTenSchemaBuilder.NODE_CLASS)
+        self.assertEqual(copy, node)
+
+    def test_plain_node(self):
+        node = SchemaNode()
+        node.add_object({'a': 1})
+        copy = pickle.loads(pickle.dumps(node))
+        self.assertIs(type(copy), SchemaNode)
+        self.assertEqual(copy.to_schema(), node.to_schema())
+
+    def test_node_class_restored(self):
+        builder = build([{'a': {'b': 1}}, [None]], cls=MaxTenSchemaBuilder)
+        copy = pickle.loads(pickle.dumps(builder))
+        nodes = [copy._root_node]
+        while nodes:
+            node = nodes.pop()
+            for strategy in node._active_strategies:
+                self.assertIs(strategy.node_class, type(node))
+                nodes.extend(strategy.child_nodes())
+
+        # new properties still get nodes of the right class
+        copy.add_object({'c': 2})
+        builder.add_object({'c': 2})
+        self.assertEqual(copy, builder)
+
+    def test_pattern_properties(self):
+        builder = SchemaBuilder()
+        builder.add_schema({'type': 'object',
+                            'patternProperties': {'^x': {'type': 'null'}}})
+        builder.add_object({'xa': 1})
+        copy = pickle.loads(pickle.dumps(builder))
+        copy.add_object({'xb': 'y', 'z': 1})
+        builder.add_object({'xb': 'y', 'z': 1})
+        self.assertEqual(copy, builder)
+        self.assertEqual(copy.to_schema(), builder.to_schema())
+
+    def test_leaves_out_caches(self):
+        builder = build(OBJECTS)
+        builder.to_schema()
+        data = pickle.dumps(builder)
+        self.assertNotIn(b'NODE_CLASS', data)
+        self.assertNotIn(b'defaultdict', data)
+        self.assertIsNone(pickle.loads(data)._root_node._schema_cache)
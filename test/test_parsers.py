@@ -0,0 +1,53 @@
+import json
+import unittest
+from genson import SchemaBuilder
+from genson.parsers import PARSER_NAMES, get_parser
+from .test_bin import MISSING_PARSERS
+
+INSTALLED_PARSERS = [name for name in PARSER_NAMES
+                     if name not in MISSING_PARSERS]
+DOCUMENTS = ['{"a": [1, 2.5, "x", null, true]}', '[]', '"\\ud800"', 'NaN',
+             '-12345678901234567890123', '[1e400]', '{"a": 1, "a": "b"}']
+
+
+class TestParsers(unittest.TestCase):
+
+    def test_same_as_json(self):
+        for name in INSTALLED_PARSERS:
+            parser = get_parser(name)
+            for doc in DOCUMENTS:
+                for data in (doc, doc.encode('utf-8')):
+                    self.assertEqual(repr(parser.loads(data)),
+                                     repr(json.loads(data)),
+                                     (name, data))
+
+    def test_errors_from_json(self):
+        for name in INSTALLED_PARSERS:
+            with self.assertRaises(json.JSONDecodeError) as context:
+                get_parser(name).loads(b'{"a": }')
+            self.assertEqual(context.exception.pos, 6)
+
+    def test_auto(self):
+        self.assertEqual(get_parser('auto').name, INSTALLED_PARSERS[0])
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            get_parser('yaml')
+
+    @unittest.skipUnless(MISSING_PARSERS, 'all JSON parsers are installed')
+    def test_missing(self):
+        with self.assertRaises(ImportError):
+            get_parser(MISSING_PARSERS[0])
+
+
+class TestAddJsonBytes(unittest.TestCase):
+
+    def test_add_json_bytes(self):
+        for name in ('auto',) + tuple(INSTALLED_PARSERS):
+            builder = SchemaBuilder()
+            builder.add_json_bytes(b'{"a": 1}', parser=name)
+            builder.add_json_bytes('{"a": "one"}', parser=name)
+            expected = SchemaBuilder()
+            expected.add_object({'a': 1})
+            expected.add_object({'a': 'one'})
+            self.assertEqual(builder, expected)
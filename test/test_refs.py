@@ -0,0 +1,113 @@
+import io
+import json
+import unittest
+import jsonschema
+from genson import SchemaBuilder
+from genson.schema.refs import defs_keyword, share_subschemas
+
+ADDRESS = {'street': '1 Main St', 'zip': 12345,
+           'geo': {'lat': 1.5, 'lng': 2.5}}
+ADDRESS_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'street': {'type': 'string'},
+        'zip': {'type': 'integer'},
+        'geo': {
+            'type': 'object',
+            'properties': {'lat': {'type': 'number'},
+                           'lng': {'type': 'number'}},
+            'required': ['lat', 'lng']}},
+    'required': ['geo', 'street', 'zip']}
+
+
+class TestDedupe(unittest.TestCase):
+
+    def setUp(self):
+        self.builder = SchemaBuilder(schema_uri=None)
+        self.obj = {'home': ADDRESS, 'work': ADDRESS,
+                    'people': [{'name': 'x', 'address': ADDRESS}]}
+        self.builder.add_object(self.obj)
+
+    def test_shared(self):
+        schema = self.builder.to_schema(dedupe=True)
+        ref = {'$ref': '#/$defs/home'}
+        self.assertEqual(schema['$defs'], {'home': ADDRESS_SCHEMA})
+        self.assertEqual(schema['properties']['home'], ref)
+        self.assertEqual(schema['properties']['work'], ref)
+        self.assertEqual(
+            schema['properties']['people']['items']['properties']['address'],
+            ref)
+
+    def test_validates(self):
+        schema = self.builder.to_schema(dedupe=True)
+        jsonschema.Draft7Validator.check_schema(schema)
+        jsonschema.Draft7Validator(schema).validate(self.obj)
+        with self.assertRaises(jsonschema.exceptions.ValidationError):
+            jsonschema.Draft7Validator(schema).validate(
+                dict(self.obj, work={'street': 1}))
+
+    def test_off_by_default(self):
+        schema = self.builder.to_schema()
+        self.assertNotIn('$defs', schema)
+        self.assertEqual(schema['properties']['work'], ADDRESS_SCHEMA)
+
+    def test_nothing_repeated(self):
+        builder = SchemaBuilder()
+        builder.add_object({'a': {'b': 1}, 'c': {'d': 1}, 'e': 1, 'f': 1})
+        self.assertEqual(builder.to_schema(dedupe=True), builder.to_schema())
+
+    def test_nested_only_inside_shared(self):
+        # geo is repeated, but only inside the shared address
+        schema = self.builder.to_schema(dedupe=True)
+        self.assertEqual(list(schema['$defs']), ['home'])
+
+    def test_name_clash(self):
+        builder = SchemaBuilder(schema_uri=None)
+        first = {'k': {'v': 1}}
+        second = {'m': [1]}
+        builder.add_object({'o1': {'home': first}, 'o2': {'home': second},
+                            'x': first, 'y': second})
+        schema = builder.to_schema(dedupe=True)
+        self.assertEqual(schema['properties']['x'], {'$ref': '#/$defs/home'})
+        self.assertEqual(schema['properties']['y'],
+                         {'$ref': '#/$defs/home2'})
+
+    def test_existing_definitions(self):
+        builder = SchemaBuilder(schema_uri=None)
+        builder.add_schema({'definitions': {'home': {'type': 'null'}},
+                            'type': 'object'})
+        builder.add_object({'home': ADDRESS, 'work': ADDRESS})
+        schema = share_subschemas(builder.to_schema(), 'definitions')
+        self.assertEqual(schema['definitions'], {
+            'home': {'type': 'null'}, 'home2': ADDRESS_SCHEMA})
+        self.assertEqual(schema['properties']['work'],
+                         {'$ref': '#/definitions/home2'})
+
+    def test_old_drafts(self):
+        builder = SchemaBuilder(
+            schema_uri='http://json-schema.org/draft-07/schema#')
+        builder.add_object({'home': ADDRESS, 'work': ADDRESS})
+        schema = builder.to_schema(dedupe=True)
+        self.assertIn('definitions', schema)
+        self.assertEqual(defs_keyword(
+            'https://json-schema.org/draft/2020-12/schema'), '$defs')
+        self.assertEqual(defs_keyword(None), '$defs')
+
+    def test_json_and_dump(self):
+        expected = self.builder.to_schema(dedupe=True)
+        self.assertEqual(json.loads(self.builder.to_json(dedupe=True)),
+                         expected)
+        fp = io.StringIO()
+        self.builder.dump(fp, dedupe=True)
+        self.assertEqual(json.loads(fp.getvalue()), expected)
+
+    def test_deep(self):
+        obj = ADDRESS
+        for _ in range(5000):
+            obj = {'a': obj, 'b': ADDRESS}
+        builder = SchemaBuilder(schema_uri=None)
+        builder.add_object(obj)
+        schema = builder.to_schema(dedupe=True)
+        # named after the innermost copy, which is found first
+        self.assertEqual(schema['$defs'], {'a': ADDRESS_SCHEMA})
+        self.assertEqual(schema['properties']['b'], {'$ref': '#/$defs/a'})
@@ -0,0 +1,108 @@
+import pickle
+from . import base
+from genson import SchemaBuilder
+from genson.schema.strategies import Number
+
+
+def records(n):
+    return [{'a': i} for i in range(n)]
+
+
+RECORD_SCHEMA = {'type': 'object', 'properties': {'a': {'type': 'integer'}},
+                 'required': ['a']}
+
+
+class SamplingSchemaBuilder(SchemaBuilder):
+    ARRAY_SAMPLE_SIZE = 10
+
+
+class CountingNumber(Number):
+    INSPECTS_VALUES = True
+
+    def __init__(self, node_class):
+        super().__init__(node_class)
+        self.count = 0
+
+    def add_object(self, obj):
+        super().add_object(obj)
+        self.count += 1
+
+
+class CountingSamplingSchemaBuilder(SamplingSchemaBuilder):
+    EXTRA_STRATEGIES = (CountingNumber,)
+
+
+class TestArraySampling(base.BaseTestCase):
+    CLASS = SamplingSchemaBuilder
+
+    def assertResult(self, expected, **kwargs):
+        expected = dict(expected, **{'$schema': SchemaBuilder.DEFAULT_URI})
+        super().assertResult(expected, **kwargs)
+
+    def test_short_array(self):
+        self.add_object(records(20))
+        self.assertResult({'type': 'array', 'items': RECORD_SCHEMA})
+        self.assertFalse(self.builder.is_sampled())
+
+    def test_homogeneous(self):
+        self.add_object(records(1000))
+        self.assertResult({'type': 'array', 'items': RECORD_SCHEMA})
+        self.assertTrue(self.builder.is_sampled())
+
+    def test_unseen_types(self):
+        items = records(1000)
+        items[501] = 'x'
+        items[777] = None
+        items[999] = 1.5
+        self.add_object(items)
+        self.assertResult({'type': 'array', 'items': {'anyOf': [
+            {'type': ['null', 'number', 'string']}, RECORD_SCHEMA]}})
+
+    def test_scalars_are_not_sampled(self):
+        self.add_object(list(range(1000)))
+        self.assertFalse(self.builder.is_sampled())
+
+    def test_nested(self):
+        self.add_object({'a': [1, 2], 'b': [{'c': records(100)}]})
+        self.assertTrue(self.builder.is_sampled())
+
+    def test_tuple(self):
+        self.add_schema({'type': 'array', 'items': [{}]})
+        self.add_object(records(100))
+        self.assertFalse(self.builder.is_sampled())
+
+    def test_add_objects(self):
+        objs = [records(100), ['a'] * 5, [[True]] * 50]
+        self.builder.add_objects(objs)
+        expected = SamplingSchemaBuilder()
+        for obj in objs:
+            expected.add_object(obj)
+        self.assertEqual(self.builder, expected)
+        self.assertTrue(self.builder.is_sampled())
+
+    def test_merge(self):
+        other = SamplingSchemaBuilder()
+        other.add_object(records(100))
+        self.add_object([1])
+        self.assertFalse(self.builder.is_sampled())
+        self.builder.merge(other)
+        self.assertTrue(self.builder.is_sampled())
+
+    def test_pickle(self):
+        self.add_object(records(100))
+        builder = pickle.loads(pickle.dumps(self.builder))
+        self.assertEqual(builder, self.builder)
+        self.assertTrue(builder.is_sampled())
+
+    def test_off_by_default(self):
+        builder = SchemaBuilder()
+        builder.add_object(records(1000))
+        self.assertFalse(builder.is_sampled())
+
+    def test_inspects_values(self):
+        builder = CountingSamplingSchemaBuilder()
+        builder.add_object(list(range(1000)))
+        self.assertFalse(builder.is_sampled())
+        (strategy,) = builder._root_node._active_strategies
+        (items_strategy,) = strategy._items._active_strategies
+        self.assertEqual(items_strategy.count, 1000)
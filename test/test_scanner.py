@@ -0,0 +1,60 @@
+import unittest
+from genson.scanner import BoundaryScanner
+
+
+def scan(text, chunk_size):
+    scanner = BoundaryScanner()
+    documents = []
+    for i in range(0, len(text), chunk_size):
+        documents.extend(scanner.feed(text[i:i + chunk_size]))
+    documents.extend(scanner.close())
+    return documents
+
+
+class TestBoundaryScanner(unittest.TestCase):
+
+    def assertScan(self, text, expected):
+        for chunk_size in (1, 2, 3, 7, len(text) or 1):
+            self.assertEqual(scan(text, chunk_size), expected)
+            self.assertEqual(
+                [(offset, document.decode('utf-8')) for offset, document
+                 in scan(text.encode('utf-8'), chunk_size)],
+                [(len(text[:offset].encode('utf-8')), document)
+                 for offset, document in expected])
+
+    def test_empty(self):
+        self.assertScan('', [])
+        self.assertScan(' \n\t', [])
+
+    def test_objects(self):
+        self.assertScan('{"a":1}{"b":[1,{}]}\n{}',
+                        [(0, '{"a":1}'), (7, '{"b":[1,{}]}'), (20, '{}')])
+
+    def test_scalars(self):
+        self.assertScan(' 1 -2.5e3 "x" true null',
+                        [(1, '1'), (3, '-2.5e3'), (10, '"x"'),
+                         (14, 'true'), (19, 'null')])
+
+    def test_adjacent(self):
+        self.assertScan('[1]"a""b"2{}',
+                        [(0, '[1]'), (3, '"a"'), (6, '"b"'), (9, '2'),
+                         (10, '{}')])
+
+    def test_strings(self):
+        self.assertScan('{"}{":"\\"]"} ["\\\\"] "é{"',
+                        [(0, '{"}{":"\\"]"}'), (13, '["\\\\"]'),
+                         (20, '"é{"')])
+
+    def test_truncated(self):
+        self.assertScan('{"a": 1} {"a": [', [(0, '{"a": 1}'), (9, '{"a": [')])
+        self.assertScan('1 "ab', [(0, '1'), (2, '"ab')])
+        self.assertScan('[1, "]', [(0, '[1, "]')])
+
+    def test_malformed(self):
+        self.assertScan('1 } ]', [(0, '1'), (2, '}'), (4, ']')])
+        self.assertScan('{"a": 1}}', [(0, '{"a": 1}'), (8, '}')])
+
+    def test_buffer_types(self):
+        # a memory-mapped file is scanned in place like this
+        self.assertEqual(list(BoundaryScanner().feed(bytearray(b'[1] 2'))),
+                         [(0, b'[1]')])
@@ -1,4 +1,6 @@
+import unittest
 from . import base
+from genson.schema.strategies.object import PatternMatcher
 
 
 class TestSeedTuple(base.SchemaNodeTestCase):
@@ -64,3 +66,50 @@ class TestPatternProperties(base.SchemaNodeTestCase):
                            'properties': {'a': {'type': 'boolean'}},
                            'patternProperties': {r'^\d$': {'type': 'integer'}},
                            'required': ['a']})
+
+    def test_patterns_with_groups_and_flags(self):
+        self.add_schema({'type': 'object', 'patternProperties': {
+            r'^(\d)\1$': None,
+            r'(?i)^x': None}})
+        self.add_object({'11': 0, '12': None, 'X1': True})
+        self.assertResult({'type': 'object',
+                           'properties': {'12': {'type': 'null'}},
+                           'patternProperties': {
+                               r'^(\d)\1$': {'type': 'integer'},
+                               r'(?i)^x': {'type': 'boolean'}},
+                           'required': ['12']})
+
+    def test_patterns_added_later(self):
+        self.add_schema({'type': 'object', 'patternProperties': {
+            r'^\d$': None}})
+        self.add_object({'0': 0})
+        self.add_schema({'type': 'object', 'patternProperties': {
+            r'^[a-z]$': None}})
+        self.add_object({'a': True, '1': 1})
+        self.assertResult({'type': 'object', 'patternProperties': {
+            r'^\d$': {'type': 'integer'},
+            r'^[a-z]$': {'type': 'boolean'}}})
+
+
+class TestPatternMatcher(unittest.TestCase):
+
+    def test_first_matching_pattern_wins(self):
+        for patterns in ([r'b', r'^a'], [r'(b)', r'^a'], [r'^ab', r'^a']):
+            matcher = PatternMatcher(patterns)
+            self.assertEqual(matcher.match('ab'), patterns[0])
+            self.assertEqual(matcher.match('ac'), patterns[-1])
+            self.assertIsNone(matcher.match('c'))
+
+    def test_mixed_runs(self):
+        matcher = PatternMatcher([r'^x', r'^y', r'b', r'^a', r'^ac', r'c'])
+        self.assertEqual(matcher.match('yb'), r'^y')
+        self.assertEqual(matcher.match('ab'), r'b')
+        self.assertEqual(matcher.match('ac'), r'^a')
+        self.assertEqual(matcher.match('dc'), r'c')
+        self.assertIsNone(matcher.match('d'))
+
+    def test_memo_is_bounded(self):
+        matcher = PatternMatcher([r'^\d+$'])
+        for i in range(PatternMatcher.MEMO_SIZE + 10):
+            self.assertEqual(matcher.match(str(i)), r'^\d+$')
+        self.assertEqual(len(matcher._memo), PatternMatcher.MEMO_SIZE)
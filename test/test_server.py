@@ -0,0 +1,273 @@
+import io
+import json
+import os
+import socket
+import stat
+import sys
+import tempfile
+import threading
+import unittest
+from subprocess import PIPE, Popen
+from genson import SchemaBuilder
+from genson.client import Client, ServerError
+from genson.server import SchemaServer, make_server, parse_address
+from .test_bin import FIXTURE_PATH, fixture
+
+BASE_SCHEMA = {"$schema": SchemaBuilder.DEFAULT_URI}
+
+
+class ServerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.address = os.path.join(self.tmp.name, 'genson.sock')
+        self.server = make_server(self.address)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.client = Client(self.address)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.tmp.cleanup()
+
+
+class TestBuilders(ServerTestCase):
+
+    def test_add_and_snapshot(self):
+        self.client.add('a', [{'x': 1}])
+        self.client.add('b', ['y'])
+        self.client.add('a', [{'x': 'z'}], [{'title': 'A'}])
+        expected = SchemaBuilder()
+        expected.add_object({'x': 1})
+        expected.add_schema({'title': 'A'})
+        expected.add_object({'x': 'z'})
+        self.assertEqual(self.client.to_schema('a'), expected.to_schema())
+        self.assertEqual(self.client.to_schema('b'),
+                         dict(BASE_SCHEMA, type='string'))
+
+    def test_dedupe(self):
+        self.client.add('a', [{'x': {'y': [1]}, 'z': {'y': [1]}}])
+        schema = self.client.to_schema('a', dedupe=True)
+        self.assertEqual(schema['properties']['z'], {'$ref': '#/$defs/x'})
+
+    def test_drop(self):
+        self.client.add('a', [1])
+        self.client.drop('a')
+        with self.assertRaises(ServerError):
+            self.client.to_schema('a')
+
+    def test_errors(self):
+        with self.assertRaises(ServerError):
+            self.client.request({'op': 'explode'})
+        with self.assertRaises(ServerError):
+            self.client.add(None, [1])
+        # the connection is still usable
+        self.client.add('a', [1])
+
+    def test_separate_connections(self):
+        with Client(self.address) as other:
+            other.add('a', [1])
+        self.assertEqual(self.client.to_schema('a'),
+                         dict(BASE_SCHEMA, type='integer'))
+
+
+class TestRun(ServerTestCase):
+
+    def test_stdin(self):
+        status, stdout, stderr = self.client.run(
+            ['-i', '2'], io.BytesIO(b'{"hi": 1} {"hi": "x"}'))
+        self.assertEqual((status, stderr), (0, ''))
+        self.assertEqual(json.loads(stdout), dict(BASE_SCHEMA, **{
+            "type": "object",
+            "properties": {"hi": {"type": ["integer", "string"]}},
+            "required": ["hi"]}))
+
+    def test_relative_files(self):
+        status, stdout, stderr = self.client.run(
+            ['-s', 'base_schema.json', 'empty.json'], cwd=FIXTURE_PATH)
+        self.assertEqual((status, stderr), (0, ''))
+        with open(fixture('base_schema.json')) as fp:
+            self.assertEqual(json.loads(stdout), json.load(fp))
+
+    def test_errors(self):
+        status, stdout, stderr = self.client.run([])
+        self.assertEqual(status, 2)
+        self.assertIn('noting to do', stderr)
+        status, stdout, stderr = self.client.run(['--version'])
+        self.assertEqual(status, 0)
+        self.assertTrue(stdout.startswith('genson '))
+
+    def test_no_nested_server(self):
+        other = os.path.join(self.tmp.name, 'other.sock')
+        with self.assertRaisesRegex(ServerError, '--serve'):
+            self.client.run(['--serve', other])
+        self.assertFalse(os.path.exists(other))
+        self.client.add('a', [1])
+
+    def test_no_checkpoint_or_jobs(self):
+        checkpoint = os.path.join(self.tmp.name, 'checkpoint')
+        with open(checkpoint, 'wb') as fp:
+            fp.write(b'not a checkpoint')
+        for argv in (['-c', checkpoint, '-'], ['--jobs', '2', '-']):
+            with self.assertRaisesRegex(ServerError, argv[0]):
+                self.client.run(argv, io.BytesIO(b'1'))
+
+    def test_waiting_for_stdin_blocks_no_one(self):
+        stalled = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stalled.settimeout(5)
+        try:
+            stalled.connect(self.address)
+            stalled.sendall(json.dumps(
+                {'op': 'run', 'argv': [], 'stdin_isatty': False}
+            ).encode('utf-8') + b'\n')
+            self.assertEqual(json.loads(stalled.makefile('rb').readline()),
+                             {'stdin': True})
+
+            # while that client is asked for stdin, others get through
+            self.client.add('a', [1])
+            status, stdout, stderr = self.client.run(
+                [], io.BytesIO(b'null'))
+            self.assertEqual(json.loads(stdout),
+                             dict(BASE_SCHEMA, type='null'))
+        finally:
+            stalled.close()
+
+    def test_invalid_line_closes_connection(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5)
+            sock.connect(self.address)
+            sock.sendall(b'POST / HTTP/1.1\r\n\r\n' + json.dumps(
+                {'op': 'add', 'builder': 'a', 'objects': [1]}
+            ).encode('utf-8') + b'\n')
+            rfile = sock.makefile('rb')
+            self.assertIn('invalid JSON',
+                          json.loads(rfile.readline())['error'])
+            self.assertEqual(rfile.readline(), b'')
+        with self.assertRaises(ServerError):
+            self.client.to_schema('a')
+
+    def test_warnings_every_run(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, title in (('a.json', 'a'), ('b.json', 'b')):
+                with open(os.path.join(tmp, name), 'w') as fp:
+                    json.dump({'title': title}, fp)
+            for _ in range(2):
+                status, stdout, stderr = self.client.run(
+                    ['-s', 'a.json', '-s', 'b.json'], cwd=tmp)
+                self.assertIn('conflicting', stderr)
+
+    def test_command_line_client(self):
+        env = dict(os.environ, COLUMNS='80')
+        process = Popen(
+            [sys.executable, '-m', 'genson.client', self.address],
+            stdin=PIPE, stdout=PIPE, stderr=PIPE, env=env)
+        stdout, stderr = process.communicate(b'[1, "a"]')
+        self.assertEqual((process.returncode, stderr), (0, b''))
+        self.assertEqual(json.loads(stdout), dict(BASE_SCHEMA, **{
+            "type": "array", "items": {"type": ["integer", "string"]}}))
+
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.token_file = os.path.join(self.tmp.name, 'token')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def serve_tcp(self, address):
+        server = make_server(address, token_file=self.token_file)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address('localhost:8765'), ('localhost', 8765))
+        self.assertEqual(parse_address('[::1]:8765'), ('::1', 8765))
+        self.assertEqual(parse_address('/tmp/genson.sock'),
+                         '/tmp/genson.sock')
+
+    def test_loopback_only(self):
+        for address in ('0.0.0.0:0', '[::]:0'):
+            with self.assertRaisesRegex(ValueError, 'not a loopback'):
+                make_server(address)
+
+    def test_tcp(self):
+        server = self.serve_tcp('127.0.0.1:0')
+        self.assertEqual(stat.S_IMODE(os.stat(self.token_file).st_mode),
+                         0o600)
+        address = '127.0.0.1:%d' % server.server_address[1]
+        with Client(address, self.token_file) as client:
+            client.add('a', [None])
+            self.assertEqual(client.to_schema('a'),
+                             dict(BASE_SCHEMA, type='null'))
+
+    @unittest.skipUnless(socket.has_ipv6, 'no IPv6')
+    def test_tcp_ipv6(self):
+        try:
+            server = self.serve_tcp('[::1]:0')
+        except OSError:
+            self.skipTest('no IPv6 loopback')
+        address = '[::1]:%d' % server.server_address[1]
+        with Client(address, self.token_file) as client:
+            client.add('a', [None])
+            self.assertEqual(client.to_schema('a'),
+                             dict(BASE_SCHEMA, type='null'))
+
+    def test_tcp_token(self):
+        server = self.serve_tcp('127.0.0.1:0')
+        address = '127.0.0.1:%d' % server.server_address[1]
+        wrong = os.path.join(self.tmp.name, 'wrong')
+        with open(wrong, 'w') as fp:
+            fp.write('0' * 64)
+        with Client(address, wrong) as client:
+            with self.assertRaisesRegex(ServerError, 'invalid token'):
+                client.add('a', [None])
+
+        # an HTTP request is turned away at its first line
+        with socket.create_connection(server.server_address[:2]) as sock:
+            sock.sendall(b'POST / HTTP/1.1\r\n\r\n' + json.dumps(
+                {'op': 'add', 'builder': 'a', 'objects': [1]}
+            ).encode('utf-8') + b'\n')
+            rfile = sock.makefile('rb')
+            self.assertFalse(json.loads(rfile.readline())['ok'])
+            self.assertEqual(rfile.readline(), b'')
+
+        with Client(address, self.token_file) as client:
+            with self.assertRaises(ServerError):
+                client.to_schema('a')
+
+    def test_token_file_removed(self):
+        server = make_server('127.0.0.1:0', token_file=self.token_file)
+        server.server_close()
+        self.assertFalse(os.path.exists(self.token_file))
+
+    def test_socket_permissions(self):
+        address = os.path.join(self.tmp.name, 'genson.sock')
+        server = make_server(address)
+        try:
+            self.assertEqual(stat.S_IMODE(os.stat(address).st_mode), 0o600)
+        finally:
+            server.server_close()
+
+    def test_stale_socket(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            address = os.path.join(tmp, 'genson.sock')
+            stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            stale.bind(address)
+            stale.close()
+            server = make_server(address)
+            server.server_close()
+            self.assertFalse(os.path.exists(address))
+
+    def test_handle(self):
+        self.assertEqual(SchemaServer().handle([]), {
+            'ok': False,
+            'error': 'RequestError: request must be a JSON object'})
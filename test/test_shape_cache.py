@@ -0,0 +1,95 @@
+import unittest
+from genson import SchemaBuilder
+from genson.schema.shapes import fingerprint
+from genson.schema.strategies import Number
+from .test_engine import DEPTH, nest
+from .test_merge import OBJECTS
+
+
+class MinNumber(Number):
+    KEYWORDS = (*Number.KEYWORDS, 'minimum')
+    INSPECTS_VALUES = True
+
+    def __init__(self, node_class):
+        super().__init__(node_class)
+        self.min = None
+
+    def add_object(self, obj):
+        super().add_object(obj)
+        self.min = obj if self.min is None else min(self.min, obj)
+
+    def to_schema(self):
+        schema = super().to_schema()
+        schema['minimum'] = self.min
+        return schema
+
+
+class MinNumberSchemaBuilder(SchemaBuilder):
+    EXTRA_STRATEGIES = (MinNumber,)
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def assertSameShape(self, first, second):
+        self.assertEqual(fingerprint(first), fingerprint(second))
+
+    def assertDifferentShape(self, first, second):
+        self.assertNotEqual(fingerprint(first), fingerprint(second))
+
+    def test_scalars(self):
+        self.assertSameShape('a', 'b')
+        self.assertDifferentShape(1, 1.0)
+        self.assertDifferentShape(1, True)
+
+    def test_objects(self):
+        self.assertSameShape({'a': 1, 'b': {'c': 'x'}},
+                             {'a': 2, 'b': {'c': 'y'}})
+        self.assertDifferentShape({'a': 1}, {'b': 1})
+        self.assertDifferentShape({'a': {'c': 1}}, {'a': {'c': 1.5}})
+
+    def test_arrays(self):
+        self.assertSameShape([1, 'a', [2]], [3, 'b', [4]])
+        self.assertDifferentShape([1, 'a'], ['a', 1])
+        self.assertDifferentShape([1], [1, 1])
+        self.assertDifferentShape([[1], 'a'], [[1, 'a']])
+        self.assertDifferentShape([{'a': [1]}, 2], [{'a': [1, 2]}])
+
+
+class TestShapeCache(unittest.TestCase):
+
+    def test_same_schema(self):
+        objects = OBJECTS * 3 + [{'a': 1.5}, [1, 'x', {'y': True}]]
+        builder = SchemaBuilder(shape_cache_size=2)
+        expected = SchemaBuilder()
+        for obj in objects:
+            builder.add_object(obj)
+            expected.add_object(obj)
+            self.assertEqual(builder, expected)
+
+    def test_info(self):
+        builder = SchemaBuilder(shape_cache_size=2)
+        for obj in [{'a': 1}, {'a': 2}, {'b': 1}, {'c': 1}, {'a': 3}]:
+            builder.add_object(obj)
+        self.assertEqual(tuple(builder.shape_cache_info()), (1, 4, 2, 2))
+
+    def test_deep(self):
+        builder = SchemaBuilder(shape_cache_size=2)
+        builder.add_object(nest(DEPTH))
+        builder.add_object(nest(DEPTH))
+        self.assertEqual(builder.shape_cache_info().hits, 1)
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(SchemaBuilder().shape_cache_info())
+
+    def test_cleared_by_schema(self):
+        builder = SchemaBuilder(shape_cache_size=2)
+        builder.add_object(1)
+        builder.add_schema({'type': 'integer'})
+        self.assertEqual(builder.shape_cache_info().currsize, 0)
+
+    def test_inspects_values(self):
+        builder = MinNumberSchemaBuilder(shape_cache_size=10)
+        self.assertIsNone(builder.shape_cache_info())
+        builder.add_object(5)
+        builder.add_object(2)
+        self.assertEqual(builder.to_schema()['minimum'], 2)
@@ -0,0 +1,105 @@
+import pickle
+import unittest
+from genson import SchemaBuilder
+from genson.schema.stats import format_stats
+from .test_merge import OBJECTS
+
+
+class MapSchemaBuilder(SchemaBuilder):
+    MAP_THRESHOLD = 2
+
+
+def counts(stats):
+    return {pointer: (node_stats['values'], node_stats['types'],
+                      node_stats['fallbacks'])
+            for pointer, node_stats in stats.items()}
+
+
+class TestStats(unittest.TestCase):
+
+    def test_off_by_default(self):
+        builder = SchemaBuilder()
+        builder.add_object({'a': 1})
+        self.assertIsNone(builder.stats())
+        self.assertIs(type(builder._root_node), SchemaBuilder.NODE_CLASS)
+
+    def test_counts(self):
+        builder = SchemaBuilder(profile=True)
+        builder.add_object({'a': 1, 'b': [1, 'x']})
+        builder.add_object({'a': None, 'c/d': {'e~': True}})
+        self.assertEqual(counts(builder.stats()), {
+            '#': (2, {'object': 2}, 0),
+            '#/properties/a': (2, {'integer': 1, 'null': 1}, 0),
+            '#/properties/b': (1, {'array': 1}, 0),
+            '#/properties/b/items': (2, {'integer': 1, 'string': 1}, 0),
+            '#/properties/c~1d': (1, {'object': 1}, 0),
+            '#/properties/c~1d/properties/e~0': (1, {'boolean': 1}, 0)})
+        self.assertGreater(builder.stats()['#']['seconds'], 0)
+
+    def test_scalar_arrays(self):
+        # every item counts, not just one of each type
+        builder = SchemaBuilder(profile=True)
+        builder.add_object({'a': [1, 2, 3, 4, 5]})
+        builder.add_objects([{'a': [1, 2]}, {'a': ['x', 2.5]}])
+        self.assertEqual(
+            counts(builder.stats())['#/properties/a/items'],
+            (9, {'integer': 7, 'string': 1, 'number': 1}, 0))
+
+    def test_same_schema(self):
+        builder = SchemaBuilder(profile=True)
+        expected = SchemaBuilder()
+        for obj in OBJECTS:
+            builder.add_object(obj)
+            expected.add_object(obj)
+        self.assertEqual(builder.to_schema(), expected.to_schema())
+
+    def test_batch_same_counts(self):
+        single = SchemaBuilder(profile=True)
+        batch = SchemaBuilder(profile=True)
+        for obj in OBJECTS:
+            single.add_object(obj)
+        batch.add_objects(OBJECTS)
+        self.assertEqual(batch.to_schema(), single.to_schema())
+        self.assertEqual(counts(batch.stats()), counts(single.stats()))
+
+    def test_merge(self):
+        first = SchemaBuilder(profile=True)
+        second = SchemaBuilder(profile=True)
+        first.add_object({'a': 1})
+        second.add_object({'a': 'x', 'b': 2})
+        first |= second
+        self.assertEqual(counts(first.stats()), {
+            '#': (2, {'object': 2}, 0),
+            '#/properties/a': (2, {'integer': 1, 'string': 1}, 0),
+            '#/properties/b': (1, {'integer': 1}, 0)})
+
+    def test_pattern_properties(self):
+        builder = MapSchemaBuilder(profile=True)
+        builder.add_object({'1': 1, '2': 2, '3': 3})
+        builder.add_object({'4': 'x'})
+        stats = counts(builder.stats())
+        self.assertEqual(stats['#/patternProperties/^[0-9]+$'],
+                         (4, {'integer': 3, 'string': 1}, 0))
+
+    def test_fallbacks(self):
+        class Key(str):
+            pass
+
+        builder = SchemaBuilder(profile=True)
+        builder.add_object([Key('a'), 'b'])
+        self.assertEqual(builder.stats()['#/items']['fallbacks'], 1)
+
+    def test_pickle(self):
+        builder = SchemaBuilder(profile=True)
+        builder.add_object({'a': 1})
+        copy = pickle.loads(pickle.dumps(builder))
+        self.assertEqual(counts(copy.stats()), counts(builder.stats()))
+
+    def test_format(self):
+        builder = SchemaBuilder(profile=True)
+        builder.add_object({'a': 1})
+        lines = format_stats(builder.stats()).splitlines()
+        self.assertEqual(lines[0].split(),
+                         ['seconds', 'values', 'fallbacks', 'types', 'path'])
+        self.assertEqual(lines[2].split()[1:], ['1', '0', 'integer:1',
+                                                '#/properties/a'])